@@ -0,0 +1,179 @@
+"""轉檔效能基準測試
+
+以合成 PDF 跑 DPI × 格式 × 旋轉 × 行程數 的組合，輸出 JSON：
+每秒頁數、各階段 (渲染 / 編碼 / 寫檔) 平均耗時與峰值記憶體 (RSS)。
+每個組合在獨立子行程中執行，峰值記憶體互不干擾。
+
+    python -m benchmarks.bench_convert --quick --out bench.json
+    python -m benchmarks.bench_convert --baseline bench.json --threshold 10
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows 無 resource 模組，峰值記憶體以 null 表示
+    resource = None
+
+from .synthetic import DOCUMENTS, generate
+
+FULL_MATRIX = {"dpi": [72, 200, 300, 600], "fmt": ["PNG", "JPG"], "angle": [0, 90],
+               "workers": sorted({1, os.cpu_count() or 1})}
+QUICK_MATRIX = {"dpi": [72, 200], "fmt": ["PNG", "JPG"], "angle": [0],
+                "workers": sorted({1, min(2, os.cpu_count() or 1)})}
+QUICK_DOCS = ["text", "scans", "small_pages"]
+
+
+def case_key(case):
+    return f"{case['doc']}|dpi={case['dpi']}|fmt={case['fmt']}|rot={case['angle']}|w={case['workers']}"
+
+
+def _peak_rss_mb():
+    """本行程與已結束子行程 (平行轉檔的工作行程) 的峰值 RSS，單位 MB"""
+    if resource is None:
+        return None, None
+    unit = 1 if sys.platform == "darwin" else 1024  # macOS 單位為 bytes，Linux 為 KB
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / (1 << 20)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / (1 << 20)
+    return round(own, 1), round(children, 1)
+
+
+def _stage_timings(report, pages):
+    """由執行報告換算渲染 / 編碼 / 寫檔各階段的每頁平均耗時 (秒)
+
+    同步模式 (queue_depth=0) 時編碼與寫檔合併記為 save 階段。
+    """
+    stages = report.get("stages", {}) if report else {}
+    return {name: round(stages[name]["wall_total"] / pages, 5)
+            for name in ("render", "encode", "write", "save", "render_tiled") if name in stages and pages}
+
+
+def run_case(case):
+    """於子行程中執行單一組合 (由 --run-case 呼叫)"""
+    from pdfconv.engine import ConversionEngine, make_settings
+
+    settings = make_settings(dpi=case["dpi"], fmt=case["fmt"], angle=case["angle"], workers=case["workers"],
+                             profile=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, os.path.basename(case["path"]))
+        shutil.copyfile(case["path"], pdf_path)
+        pages = [0]
+        errors = []
+        report = {}
+
+        def on_event(kind, data):
+            if kind == "progress": pages[0] = data
+            elif kind == "error": errors.append(data)
+            elif kind == "report": report.update(data)
+
+        t0 = time.perf_counter()
+        status = ConversionEngine(settings, on_event=on_event).run([pdf_path])
+        elapsed = time.perf_counter() - t0
+
+        out_dir = os.path.join(tmp, os.path.splitext(os.path.basename(pdf_path))[0] + "_images")
+        out_bytes = sum(e.stat().st_size for e in os.scandir(out_dir)) if os.path.isdir(out_dir) else 0
+
+    rss, children_rss = _peak_rss_mb()
+    return {
+        "key": case_key(case), **{k: case[k] for k in ("doc", "dpi", "fmt", "angle", "workers")},
+        "status": status, "errors": errors, "pages": pages[0], "seconds": round(elapsed, 4),
+        "pages_per_sec": round(pages[0] / elapsed, 3) if elapsed > 0 else None,
+        "bytes_written": out_bytes, "stage_seconds_per_page": _stage_timings(report, pages[0]),
+        "peak_rss_mb": rss, "peak_worker_rss_mb": children_rss,
+    }
+
+
+def compare(results, baseline, threshold):
+    """與基準結果比較每秒頁數，回傳退步超過 threshold% 的組合"""
+    base = {r["key"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        old = base.get(r["key"])
+        if not old or not old.get("pages_per_sec") or not r.get("pages_per_sec"):
+            continue
+        change = (r["pages_per_sec"] - old["pages_per_sec"]) / old["pages_per_sec"] * 100
+        r["change_pct"] = round(change, 1)
+        if change < -threshold:
+            regressions.append({"key": r["key"], "baseline": old["pages_per_sec"],
+                                "current": r["pages_per_sec"], "change_pct": r["change_pct"]})
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bench_convert", description="PDF 轉圖片效能基準測試")
+    parser.add_argument("--quick", action="store_true", help="縮小測試矩陣與文件種類，快速確認")
+    parser.add_argument("--docs", nargs="+", choices=list(DOCUMENTS), help="只測試指定的文件種類")
+    parser.add_argument("--dpi", nargs="+", type=int, help="覆寫 DPI 清單")
+    parser.add_argument("--formats", nargs="+", type=str.upper, choices=["PNG", "JPG", "WEBP", "TIFF"],
+                        help="覆寫格式清單")
+    parser.add_argument("--rotations", nargs="+", type=int, choices=[0, 90, 180, 270], help="覆寫旋轉角度清單")
+    parser.add_argument("--workers", nargs="+", type=int, help="覆寫平行行程數清單")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "pdfconv-bench-corpus"),
+                        help="合成 PDF 存放位置 (已存在則沿用)")
+    parser.add_argument("--out", help="結果 JSON 輸出路徑 (預設輸出至標準輸出)")
+    parser.add_argument("--baseline", help="與先前的結果 JSON 比較")
+    parser.add_argument("--threshold", type=float, default=10.0, help="每秒頁數退步超過此百分比即標示 (預設: 10)")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case))))
+        return 0
+
+    matrix = dict(QUICK_MATRIX if args.quick else FULL_MATRIX)
+    for key, override in (("dpi", args.dpi), ("fmt", args.formats), ("angle", args.rotations), ("workers", args.workers)):
+        if override: matrix[key] = override
+    docs = args.docs or (QUICK_DOCS if args.quick else list(DOCUMENTS))
+    paths = generate(args.corpus, docs)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    for doc, dpi, fmt, angle, workers in itertools.product(docs, matrix["dpi"], matrix["fmt"],
+                                                           matrix["angle"], matrix["workers"]):
+        case = {"doc": doc, "path": paths[doc], "dpi": dpi, "fmt": fmt, "angle": angle, "workers": workers}
+        proc = subprocess.run([sys.executable, "-m", "benchmarks.bench_convert", "--run-case", json.dumps(case)],
+                              cwd=root, capture_output=True, text=True)
+        if proc.returncode != 0:
+            result = {"key": case_key(case), "status": "crashed", "errors": [proc.stderr.strip()[-2000:]]}
+        else:
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{result['key']:<48} {result.get('pages_per_sec') or 0:>9.2f} 頁/秒  "
+              f"RSS {result.get('peak_rss_mb') or 0:>7.1f} MB  {result['status']}", file=sys.stderr)
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpu_count": os.cpu_count(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "matrix": matrix, "docs": docs, "results": results,
+    }
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare(results, json.load(f), args.threshold)
+        for reg in report["regressions"]:
+            print(f"⚠️ 效能退步 {reg['change_pct']}%：{reg['key']} ({reg['baseline']} → {reg['current']} 頁/秒)",
+                  file=sys.stderr)
+        exit_code = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""啟動時間基準測試
+
+每個項目以全新的子行程重複執行，記錄從啟動到結束 (或視窗顯示) 的時間，輸出中位數與 p90 (毫秒)：
+
+- python：空的直譯器，作為基準
+- gui_import：載入圖形介面模組 (不含 pypdfium2 / Pillow)
+- engine_import：載入轉檔引擎 (pypdfium2 / Pillow)
+- cli_help：python -m pdfconv --help
+- gui_window / gui_engine：圖形介面視窗完成第一次繪製、背景載入引擎完成的時間 (需要顯示環境)
+- exe_window / exe_engine：以 --exe 指定打包後的執行檔，量測同上 (比較 onefile 與 onedir)
+
+    python -m benchmarks.bench_startup --repeat 20 --out startup.json
+    python -m benchmarks.bench_startup --exe "dist/PDF轉圖片小工具/PDF轉圖片小工具.exe"
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBE_ENV = "PDFCONV_STARTUP_PROBE"  # 與 pdf_image_converter.STARTUP_PROBE_ENV 相同
+
+COMMAND_CASES = {
+    "python": ["-c", "pass"],
+    "gui_import": ["-c", "import pdf_image_converter"],
+    "engine_import": ["-c", "import pdfconv.engine"],
+    "cli_help": ["-m", "pdfconv", "--help"],
+}
+
+
+def has_display():
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def time_command(cmd):
+    """執行到結束的秒數"""
+    t0 = time.perf_counter()
+    subprocess.run(cmd, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+
+def time_window(cmd):
+    """啟動到視窗完成繪製、引擎載入完成的秒數 (程式於 PROBE_ENV 指定的檔案寫入兩個時間點)"""
+    fd, probe_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        t0 = time.time()
+        subprocess.run(cmd, cwd=ROOT, check=True, env=dict(os.environ, **{PROBE_ENV: probe_path}))
+        with open(probe_path, encoding="utf-8") as f:
+            probe = json.load(f)
+    finally:
+        os.remove(probe_path)
+    return probe["window"] - t0, probe["engine"] - t0
+
+
+def summarize(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {"median_ms": round(statistics.median(ms), 1), "min_ms": round(ms[0], 1),
+            "p90_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.9))], 1), "runs": len(ms)}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bench_startup", description="PDF 轉圖片工具啟動時間基準測試")
+    parser.add_argument("--repeat", type=int, default=10, help="每個項目重複次數 (預設: 10)")
+    parser.add_argument("--exe", help="另外量測打包後的執行檔 (視窗顯示與引擎載入時間)")
+    parser.add_argument("--out", help="結果 JSON 輸出路徑 (預設輸出至標準輸出)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = {}
+    for name, cmd_args in COMMAND_CASES.items():
+        time_command([sys.executable] + cmd_args)  # 預熱磁碟快取，不列入統計
+        results[name] = summarize([time_command([sys.executable] + cmd_args) for _ in range(args.repeat)])
+
+    windows = [("gui", [sys.executable, "pdf_image_converter.py"])]
+    if args.exe:
+        windows.append(("exe", [os.path.abspath(args.exe)]))
+    if has_display():
+        for name, cmd in windows:
+            time_window(cmd)
+            samples = [time_window(cmd) for _ in range(args.repeat)]
+            results[f"{name}_window"] = summarize([s[0] for s in samples])
+            results[f"{name}_engine"] = summarize([s[1] for s in samples])
+    else:
+        print("⚠️ 沒有顯示環境，略過視窗啟動時間", file=sys.stderr)
+
+    for name, r in results.items():
+        print(f"{name:<16} 中位數 {r['median_ms']:>8.1f} ms  p90 {r['p90_ms']:>8.1f} ms", file=sys.stderr)
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                       "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "results": results}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""產生基準測試用的合成 PDF (固定亂數種子，每次產生的內容相同)
+
+直接輸出精簡的 PDF 結構，不依賴額外套件；掃描頁的影像以 Pillow 編成 JPEG 內嵌。
+"""
+import io
+import os
+import random
+import zlib
+
+from PIL import Image, ImageFilter
+
+A4 = (595, 842)
+A2 = (1191, 1684)
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua ut enim ad minim veniam quis nostrud").split()
+
+
+class MiniPdf:
+    """最小化的 PDF 寫出器：每頁一個內容串流，可附帶 Helvetica 字型與影像"""
+
+    def __init__(self):
+        self.objects = []
+
+    def _add(self, body):
+        self.objects.append(body)
+        return len(self.objects)
+
+    def _stream(self, attrs, data, compress=True):
+        if compress:
+            data = zlib.compress(data)
+            attrs += b" /Filter /FlateDecode"
+        return self._add(b"<< " + attrs + b" /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+
+    def save(self, path, pages):
+        """pages: [(寬, 高, 內容串流 bytes, {影像名稱: JPEG bytes 與尺寸})]"""
+        font = self._add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        self.objects.append(None)  # 預留 Pages 物件位置，待所有頁面建立後填入
+        pages_id = len(self.objects)
+        kids = []
+        for width, height, content, images in pages:
+            xobjs = b""
+            for name, (jpeg, (iw, ih)) in images.items():
+                img = self._stream(b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+                                   b"/BitsPerComponent 8 /Filter /DCTDecode" % (iw, ih), jpeg, compress=False)
+                xobjs += b"/%s %d 0 R " % (name.encode(), img)
+            contents = self._stream(b"", content)
+            kids.append(self._add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+                b"/Resources << /Font << /F1 %d 0 R >> /XObject << %s>> >> >>"
+                % (pages_id, width, height, contents, font, xobjs)))
+        self.objects[pages_id - 1] = (b"<< /Type /Pages /Kids [%s] /Count %d >>"
+                                      % (b" ".join(b"%d 0 R" % k for k in kids), len(kids)))
+        catalog = self._add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+        out = io.BytesIO()
+        out.write(b"%PDF-1.7\n")
+        offsets = []
+        for i, body in enumerate(self.objects, 1):
+            offsets.append(out.tell())
+            out.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+        xref = out.tell()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.objects) + 1))
+        for off in offsets:
+            out.write(b"%010d 00000 n \n" % off)
+        out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                  % (len(self.objects) + 1, catalog, xref))
+        with open(path, "wb") as f:
+            f.write(out.getvalue())
+
+
+def _text_page(rng, size):
+    width, height = size
+    lines = [b"BT /F1 9 Tf 11 TL 40 %d Td" % (height - 50)]
+    for _ in range((height - 90) // 11):
+        text = " ".join(rng.choice(WORDS) for _ in range(16))
+        lines.append(b"(%s) '" % text.encode())
+    lines.append(b"ET")
+    return b"\n".join(lines)
+
+
+def _vector_page(rng, size, paths=4000):
+    width, height = size
+    ops = [b"0.3 w"]
+    for _ in range(paths):
+        x, y = rng.uniform(20, width - 20), rng.uniform(20, height - 20)
+        ops.append(b"%.2f %.2f %.2f RG" % (rng.random(), rng.random(), rng.random()))
+        ops.append(b"%.1f %.1f m %.1f %.1f %.1f %.1f %.1f %.1f c S" % (
+            x, y, x + rng.uniform(-80, 80), y + rng.uniform(-80, 80),
+            x + rng.uniform(-80, 80), y + rng.uniform(-80, 80), x + rng.uniform(-80, 80), y + rng.uniform(-80, 80)))
+    return b"\n".join(ops)
+
+
+def _scan_image(rng, px_size):
+    """模擬掃描頁：帶雜訊的灰白底與文字列色塊"""
+    im = Image.effect_noise(px_size, 24).convert("RGB").point(lambda v: 200 + v // 5)
+    base = Image.new("RGB", px_size, (235, 232, 225))
+    im = Image.blend(base, im, 0.5)
+    stripe = Image.new("RGB", (px_size[0] - 200, 14), (40, 40, 40))
+    for y in range(120, px_size[1] - 120, 36):
+        if rng.random() < 0.85:
+            im.paste(stripe.resize((rng.randint(px_size[0] // 3, px_size[0] - 200), 14)), (100, y))
+    im = im.filter(ImageFilter.GaussianBlur(0.6))
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", quality=80)
+    return buf.getvalue(), px_size
+
+
+DOCUMENTS = {
+    # 名稱: (頁數, 頁面尺寸, 產生函式)
+    "text": (20, A4, lambda rng, size: (_text_page(rng, size), {})),
+    "scans": (8, A4, lambda rng, size: (
+        b"q %d 0 0 %d 0 0 cm /Im1 Do Q" % size, {"Im1": _scan_image(rng, (1240, 1754))})),
+    "vector": (4, A4, lambda rng, size: (_vector_page(rng, size), {})),
+    "small_pages": (200, (200, 120), lambda rng, size: (
+        b"BT /F1 8 Tf 10 60 Td (%s) Tj ET" % " ".join(rng.choice(WORDS) for _ in range(5)).encode(), {})),
+    "huge_pages": (2, A2, lambda rng, size: (_vector_page(rng, size, paths=12000), {})),
+}
+
+
+def generate(out_dir, names=None, seed=1234):
+    """於 out_dir 產生合成 PDF，回傳 {名稱: 路徑}；已存在的檔案直接沿用"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for name in names or DOCUMENTS:
+        count, size, make_page = DOCUMENTS[name]
+        path = os.path.join(out_dir, f"{name}.pdf")
+        if not os.path.exists(path):
+            rng = random.Random(f"{seed}:{name}")
+            pages = []
+            for _ in range(count):
+                content, images = make_page(rng, size)
+                pages.append((size[0], size[1], content, images))
+            MiniPdf().save(path, pages)
+        paths[name] = path
+    return paths
@@ -1,13 +1,18 @@
+import base64
+import math
 import os
 import sys
 import threading
 import queue
-import webbrowser  # 用於開啟瀏覽器
+import time
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image
 
-import pypdfium2 as pdfium
+# 只載入不依賴 pypdfium2 / Pillow 的模組；轉檔引擎見 load_engine()
+from pdfconv.encoders import OUTPUT_FORMATS
+from pdfconv.scheduler import default_workers
+from pdfconv.sizing import page_dpi
 
 try:
     from tkinterdnd2 import TkinterDnD, DND_FILES
@@ -19,6 +24,41 @@ except Exception:
 
 APP_TITLE = "PDF轉圖片小工具"
 
+# 編碼設定檔的介面名稱 -> 引擎設定值
+ENCODER_LABELS = {"快速": "fast", "平衡": "balanced", "最小檔案": "smallest"}
+
+# 色彩模式的介面名稱 -> 引擎設定值
+COLOR_LABELS = {"彩色": "color", "自動": "auto", "灰階": "gray", "黑白": "mono"}
+
+# 單頁像素上限的介面名稱 -> 百萬像素 (超過的頁面自動降低 DPI)
+MAX_MP_LABELS = {"不限制": 0, "1600 萬": 16, "3200 萬": 32, "6400 萬": 64, "1 億": 100}
+
+# 平行行程數的預設上限：保留一個核心給介面，小型工作也不必啟動整組行程，需要時可在介面上調高
+GUI_DEFAULT_WORKERS = 4
+
+
+def gui_default_workers():
+    return max(1, min(GUI_DEFAULT_WORKERS, default_workers() - 1))
+
+
+# ================== 📜 介面更新節流 ==================
+UI_REFRESH_MS = 100        # 處理背景訊息的間隔
+QUEUE_BATCH_MAX = 5000     # 每次最多處理的訊息數，避免長時間佔住 UI 執行緒
+PROGRESS_MAX_FPS = 4       # 進度條與速度每秒最多更新次數
+LOG_MAX_LINES = 1000       # 紀錄視窗保留的行數 (環形緩衝)，完整紀錄可另存記錄檔
+LOG_FILE_PATH = os.path.join(os.path.expanduser("~"), "pdf_image_converter.log")
+
+# ================== 🖼️ 頁面預覽 ==================
+PREVIEW_PX = 340           # 預覽圖最長邊
+PREVIEW_THUMB_PX = PREVIEW_PX // 3  # 先行渲染的縮圖 (放大 3 倍作為替代圖)
+PREVIEW_POLL_MS = 50       # 檢查預覽結果的間隔
+
+# ================== 🚀 啟動加速 ==================
+ENGINE_WARMUP_MS = 200     # 視窗顯示後多久開始於背景載入轉檔引擎
+# 設定此環境變數 (值為檔案路徑) 時，視窗顯示且引擎載入完成後將兩個時間點寫入該檔並結束，
+# 供 benchmarks.bench_startup 量測 (--noconsole 打包後沒有標準輸出，因此寫檔)
+STARTUP_PROBE_ENV = "PDFCONV_STARTUP_PROBE"
+
 # ================== 🎨 現代模組化配色 (緊湊版) ==================
 COLORS = {
     "bg": "#E5E7EB",          # 背景灰
@@ -34,6 +74,24 @@ COLORS = {
     "accent": "#3B82F6"       # 裝飾色條
 }
 
+def load_engine():
+    """載入轉檔引擎 (連同 pypdfium2 / Pillow，約需上百毫秒)；已載入時直接回傳"""
+    from pdfconv import engine
+    return engine
+
+
+def warm_engine():
+    """於背景執行緒預先載入轉檔引擎，使用者按下轉檔時多半已就緒 (同時按下時 import 鎖會等待其完成)"""
+    thread = threading.Thread(target=load_engine, daemon=True)
+    thread.start()
+    return thread
+
+
+def open_url(url):
+    import webbrowser  # 只在點擊連結時才載入
+    webbrowser.open(url)
+
+
 def get_base_dir():
     """取得程式執行基底路徑 (修正支援 PyInstaller --onefile)"""
     if getattr(sys, 'frozen', False):
@@ -152,23 +210,43 @@ class AboutDialog(tk.Toplevel):
         link = tk.Label(row, text=url, font=("Microsoft JhengHei", 9, "underline"),
                         bg=COLORS["card_bg"], fg=COLORS["primary"], cursor="hand2")
         link.pack(side=tk.LEFT, padx=(5, 0))
-        link.bind("<Button-1>", lambda e: webbrowser.open(url))
+        link.bind("<Button-1>", lambda e: open_url(url))
 
 # ================== 主程式 ==================
 class PDFImageConverter:
     def __init__(self, root):
         self.root = root
         self.root.title(APP_TITLE)
-        self.root.geometry("850x620") 
-        self.root.minsize(750, 550)
+        self.root.geometry("1240x640")
+        self.root.minsize(1100, 600)
         self.root.configure(bg=COLORS["bg"])
 
         self.base_dir = get_base_dir()
         self.queue = queue.Queue()
         self.stop_event = threading.Event()
+        self.open_when_done = False
+        self.log_fp = None
+        self.pending_progress = None
+        self.last_progress_time = 0.0
+        self.run_start = None
+        self.converting = False
 
         self.selected_files = []
+        # 頁面預覽：渲染器於第一次選擇檔案時才建立 (見 _preview_renderer)
+        self.previewer = None
+        self.preview_queue = queue.Queue()
+        self.preview_files = []
+        self.preview_path = None
+        self.preview_page = 1
+        self.preview_mtimes = {}
+        self.preview_photo = None
+        self.preview_shown_px = 0
         self.auto_open_var = tk.BooleanVar(value=False)
+        self.incremental_var = tk.BooleanVar(value=False)
+        self.skip_blank_var = tk.BooleanVar(value=False)
+        self.dedup_var = tk.BooleanVar(value=False)
+        self.log_file_var = tk.BooleanVar(value=False)
+        self.speed_var = tk.StringVar(value="")
         self.rotation_var = tk.StringVar(value="0")
         
         # 修改: 初始化為空字串，以便顯示 Placeholder
@@ -177,22 +255,35 @@ class PDFImageConverter:
         self.page_end_var = tk.StringVar(value="")
         
         self.output_format_var = tk.StringVar(value="PNG")
+        self.encoder_var = tk.StringVar(value="平衡")
+        self.color_var = tk.StringVar(value="彩色")
+        self.fit_px_var = tk.StringVar(value="")
+        self.max_mp_var = tk.StringVar(value="不限制")
         self.output_mode_var = tk.StringVar(value="folder")
+        self.workers_var = tk.StringVar(value=str(gui_default_workers()))
         self.file_summary_var = tk.StringVar(value="尚未選擇檔案")
+        self.preview_file_var = tk.StringVar(value="")
+        self.preview_page_var = tk.StringVar(value="")
+        self.preview_info_var = tk.StringVar(value="")
 
         # 定義 Placeholder 文字 (用於後續比對)
         self.PH_DPI = "預設: 200"
         self.PH_START = "預設: 1"
         self.PH_END = "預設: 最末頁"
+        self.PH_FIT = "留空: 依 DPI"
 
         self._setup_style()
         self._build_ui()
+        self.rotation_var.trace_add("write", lambda *args: self._show_preview())
+        for var in (self.dpi_var, self.fit_px_var, self.max_mp_var):
+            var.trace_add("write", lambda *args: self._update_preview_nav())
 
         if DND_AVAILABLE:
             self.root.drop_target_register(DND_FILES)
             self.root.dnd_bind("<<Drop>>", self.on_drop)
             
-        self.root.after(100, self.process_queue)
+        self.root.after(UI_REFRESH_MS, self.process_queue)
+        self.root.after(PREVIEW_POLL_MS, self._poll_preview)
         # 修改: 移除啟動時的 "pypdfium2 核心已載入" 訊息
 
     def _setup_style(self):
@@ -258,13 +349,20 @@ class PDFImageConverter:
         main_area = tk.Frame(self.root, bg=COLORS["bg"], padx=16, pady=16)
         main_area.pack(fill=tk.BOTH, expand=True)
 
-        self._build_file_card(main_area)
-        tk.Frame(main_area, bg=COLORS["bg"], height=10).pack(fill=tk.X)
+        side = tk.Frame(main_area, bg=COLORS["bg"])
+        side.pack(side=tk.RIGHT, fill=tk.Y, padx=(10, 0))
+        self._build_preview_card(side)
+
+        body = tk.Frame(main_area, bg=COLORS["bg"])
+        body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self._build_file_card(body)
+        tk.Frame(body, bg=COLORS["bg"], height=10).pack(fill=tk.X)
 
-        self._build_settings_card(main_area)
-        tk.Frame(main_area, bg=COLORS["bg"], height=10).pack(fill=tk.X)
+        self._build_settings_card(body)
+        tk.Frame(body, bg=COLORS["bg"], height=10).pack(fill=tk.X)
 
-        self._build_action_card(main_area)
+        self._build_action_card(body)
 
     def _create_card_frame(self, parent):
         card = tk.Frame(parent, bg=COLORS["card_bg"], padx=20, pady=15)
@@ -286,9 +384,42 @@ class PDFImageConverter:
         row.pack(fill=tk.X)
         
         ttk.Button(row, text="選擇 PDF 檔案...", style="Secondary.TButton", command=self.select_pdfs).pack(side=tk.LEFT)
+        ttk.Button(row, text="選擇資料夾...", style="Secondary.TButton",
+                   command=self.select_folder).pack(side=tk.LEFT, padx=(8, 0))
         tk.Label(row, textvariable=self.file_summary_var, font=("Microsoft JhengHei", 9), 
                  bg=COLORS["card_bg"], fg=COLORS["primary"]).pack(side=tk.LEFT, padx=(12, 0))
 
+    def _build_preview_card(self, parent):
+        card = self._create_card_frame(parent)
+        card.pack_configure(fill=tk.BOTH, expand=True)
+        self._build_section_header(card, "頁面預覽")
+
+        self.preview_combo = ttk.Combobox(card, textvariable=self.preview_file_var, state="readonly")
+        self.preview_combo.pack(fill=tk.X)
+        self.preview_combo.bind("<<ComboboxSelected>>", lambda e: self._open_preview(self.preview_combo.current()))
+
+        box = tk.Frame(card, bg=COLORS["input_bg"], width=PREVIEW_PX, height=PREVIEW_PX)
+        box.config(highlightbackground=COLORS["border"], highlightthickness=1)
+        box.pack(pady=8)
+        box.pack_propagate(False)
+        self.preview_label = tk.Label(box, bg=COLORS["input_bg"], fg=COLORS["text_sub"], text="選擇 PDF 檔案後顯示預覽",
+                                      font=("Microsoft JhengHei", 9), wraplength=PREVIEW_PX - 20)
+        self.preview_label.pack(fill=tk.BOTH, expand=True)
+        # 滑鼠滾輪翻頁 (Windows / macOS 為 MouseWheel，X11 為 Button-4 / Button-5)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.preview_label.bind(seq, self._on_preview_wheel)
+
+        nav = tk.Frame(card, bg=COLORS["card_bg"])
+        nav.pack(fill=tk.X)
+        ttk.Button(nav, text="◀", width=3, style="Secondary.TButton",
+                   command=lambda: self._step_preview(-1)).pack(side=tk.LEFT)
+        ttk.Button(nav, text="▶", width=3, style="Secondary.TButton",
+                   command=lambda: self._step_preview(1)).pack(side=tk.RIGHT)
+        tk.Label(nav, textvariable=self.preview_page_var, bg=COLORS["card_bg"],
+                 font=("Microsoft JhengHei", 9)).pack(side=tk.LEFT, expand=True)
+        tk.Label(card, textvariable=self.preview_info_var, bg=COLORS["card_bg"], fg=COLORS["text_sub"],
+                 font=("Microsoft JhengHei", 8), wraplength=PREVIEW_PX, justify="left").pack(fill=tk.X, pady=(6, 0))
+
     def _build_settings_card(self, parent):
         card = self._create_card_frame(parent)
         self._build_section_header(card, "轉檔參數")
@@ -303,15 +434,23 @@ class PDFImageConverter:
         self._make_input(grid, 0, 2, "🔄 畫面旋轉", self.rotation_var, is_combo=True, values=["0", "90", "180", "270"])
         
         self._make_input(grid, 1, 0, "📄 結束頁碼", self.page_end_var, placeholder=self.PH_END)
-        self._make_input(grid, 1, 2, "🎨 圖片格式", self.output_format_var, is_combo=True, values=["PNG", "JPG"])
+        self._make_input(grid, 1, 2, "🎨 圖片格式", self.output_format_var, is_combo=True, values=OUTPUT_FORMATS)
 
         self._make_input(grid, 2, 0, "🔍 解析度 (DPI)", self.dpi_var, placeholder=self.PH_DPI)
+        self._make_input(grid, 3, 0, "⚡ 平行行程數", self.workers_var, is_combo=True,
+                         values=[str(n) for n in sorted({1, 2, 4, 8, 16, default_workers()}) if n <= default_workers()])
+        self._make_input(grid, 3, 2, "🗜️ 壓縮方式", self.encoder_var, is_combo=True, values=list(ENCODER_LABELS))
+        self._make_input(grid, 4, 0, "🌗 色彩模式", self.color_var, is_combo=True, values=list(COLOR_LABELS))
+        self._make_input(grid, 4, 2, "📏 最長邊 (px)", self.fit_px_var, placeholder=self.PH_FIT)
+        self._make_input(grid, 5, 0, "📐 單頁像素上限", self.max_mp_var, is_combo=True, values=list(MAX_MP_LABELS))
         
         mode_f = tk.Frame(grid, bg=COLORS["card_bg"])
         mode_f.grid(row=2, column=2, columnspan=2, sticky="w", padx=10, pady=4)
         tk.Label(mode_f, text="📂 輸出位置：", bg=COLORS["card_bg"], font=("Microsoft JhengHei", 9)).pack(side=tk.LEFT)
         ttk.Radiobutton(mode_f, text="建立資料夾", variable=self.output_mode_var, value="folder").pack(side=tk.LEFT, padx=6)
-        ttk.Radiobutton(mode_f, text="同層目錄", variable=self.output_mode_var, value="same").pack(side=tk.LEFT)
+        ttk.Radiobutton(mode_f, text="同層目錄", variable=self.output_mode_var, value="same").pack(side=tk.LEFT, padx=6)
+        ttk.Radiobutton(mode_f, text="ZIP", variable=self.output_mode_var, value="zip").pack(side=tk.LEFT, padx=6)
+        ttk.Radiobutton(mode_f, text="多頁 TIFF", variable=self.output_mode_var, value="tiff").pack(side=tk.LEFT)
 
     def _build_action_card(self, parent):
         card = self._create_card_frame(parent)
@@ -321,6 +460,10 @@ class PDFImageConverter:
         act_row.pack(fill=tk.X, pady=(0, 10))
 
         ttk.Checkbutton(act_row, text="完成後開啟資料夾", variable=self.auto_open_var).pack(side=tk.LEFT)
+        ttk.Checkbutton(act_row, text="略過已轉換頁面", variable=self.incremental_var).pack(side=tk.LEFT, padx=(12, 0))
+        ttk.Checkbutton(act_row, text="略過空白頁", variable=self.skip_blank_var).pack(side=tk.LEFT, padx=(12, 0))
+        ttk.Checkbutton(act_row, text="合併重複頁面", variable=self.dedup_var).pack(side=tk.LEFT, padx=(12, 0))
+        ttk.Checkbutton(act_row, text="寫入記錄檔", variable=self.log_file_var).pack(side=tk.LEFT, padx=(12, 0))
 
         self.btn_container = tk.Frame(act_row, bg=COLORS["card_bg"])
         self.btn_container.pack(side=tk.RIGHT)
@@ -331,7 +474,9 @@ class PDFImageConverter:
         self.cancel_btn = ttk.Button(self.btn_container, text="⛔ 終止作業", style="Danger.TButton", command=self.cancel_convert)
         
         self.progress = ttk.Progressbar(card, orient="horizontal", mode="determinate")
-        self.progress.pack(fill=tk.X, pady=(0, 8))
+        self.progress.pack(fill=tk.X, pady=(0, 2))
+        tk.Label(card, textvariable=self.speed_var, font=("Microsoft JhengHei", 8),
+                 bg=COLORS["card_bg"], fg=COLORS["text_sub"], anchor="e").pack(fill=tk.X, pady=(0, 4))
 
         log_box = tk.Frame(card, bg=COLORS["input_bg"], bd=1, relief="solid")
         log_box.config(highlightthickness=0)
@@ -387,74 +532,276 @@ class PDFImageConverter:
     def select_pdfs(self):
         files = filedialog.askopenfilenames(title="選擇 PDF", filetypes=[("PDF", "*.pdf")])
         if files:
-            self.selected_files = list(files)
-            count = len(files)
-            name = os.path.basename(files[0])
-            msg = f"{name}" if count == 1 else f"{name} 等 {count} 個檔案"
-            self.file_summary_var.set(msg)
-            self.log(f"已選擇: {msg}")
+            self._set_selection(list(files), "已選擇")
+
+    def select_folder(self):
+        folder = filedialog.askdirectory(title="選擇資料夾 (含子資料夾內的 PDF)")
+        if folder:
+            self._set_selection([folder], "已選擇")
 
     def on_drop(self, event):
-        raw = event.data.strip()
-        if not raw: return
-        paths = []
-        temp = ""
-        in_brace = False
-        for char in raw:
-            if char == "{": in_brace = True
-            elif char == "}": in_brace = False; paths.append(temp); temp = ""
-            elif char == " " and not in_brace: 
-                if temp: paths.append(temp); temp = ""
-            else: temp += char
-        if temp: paths.append(temp)
-        
-        pdfs = [p for p in paths if p.lower().endswith(".pdf")]
-        if pdfs:
-            self.selected_files = pdfs
-            count = len(pdfs)
-            name = os.path.basename(pdfs[0])
-            msg = f"{name}" if count == 1 else f"{name} 等 {count} 個檔案"
-            self.file_summary_var.set(msg)
-            self.log(f"拖曳載入: {msg}")
+        # tkinterdnd2 以 Tcl 清單傳回路徑 (含空白的路徑以大括號包住)，交給 Tcl 自己拆解
+        paths = self.root.tk.splitlist(event.data)
+        items = [p for p in paths if os.path.isdir(p) or p.lower().endswith(".pdf")]
+        if items:
+            self._set_selection(items, "拖曳載入")
+
+    def _set_selection(self, items, verb):
+        """記錄選擇的檔案與資料夾；資料夾於轉檔時才遞迴搜尋 PDF，邊找邊轉"""
+        self.selected_files = items
+        folders = sum(1 for p in items if os.path.isdir(p))
+        name = os.path.basename(os.path.normpath(items[0]))
+        msg = f"{name}" if len(items) == 1 else f"{name} 等 {len(items)} 個項目"
+        if folders:
+            msg += f" (含 {folders} 個資料夾)"
+        self.file_summary_var.set(msg)
+        self.log(f"{verb}: {msg}")
+        self._load_preview(items)
+
+    # ---------- 🖼️ 頁面預覽 ----------
+    def _preview_renderer(self):
+        if self.previewer is None:
+            from pdfconv.preview import PreviewRenderer
+            # 結果於背景執行緒送達，轉交 _poll_preview 於主執行緒顯示
+            self.previewer = PreviewRenderer(lambda *result: self.preview_queue.put(result))
+        return self.previewer
+
+    def _load_preview(self, items):
+        """預覽選擇中的 PDF 檔案 (資料夾內容於轉檔時才搜尋，不列入預覽)"""
+        self.preview_files = [p for p in items if os.path.isfile(p) and p.lower().endswith(".pdf")]
+        self.preview_combo.config(values=[os.path.basename(p) for p in self.preview_files])
+        if self.preview_files:
+            self.preview_combo.current(0)
+            self._open_preview(0)
+        else:
+            self.preview_path = None
+            self.preview_file_var.set("")
+            self._set_preview_text("資料夾內的 PDF 於轉檔時才搜尋，無法預覽")
+            self._update_preview_nav()
+
+    def _open_preview(self, index):
+        if not 0 <= index < len(self.preview_files):
+            return
+        path = self.preview_files[index]
+        renderer = self._preview_renderer()
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        if self.preview_mtimes.get(path, mtime) != mtime:
+            renderer.forget(path)  # 檔案已被替換，舊的預覽作廢
+        self.preview_mtimes[path] = mtime
+        self.preview_path = path
+        self.preview_page = 1
+        self._show_preview()
+
+    def _step_preview(self, delta):
+        if self.preview_path is None:
+            return
+        page = self.preview_page + delta
+        count = self._preview_renderer().page_count(self.preview_path)
+        if page < 1 or (count is not None and page > count):
+            return
+        self.preview_page = page
+        self._show_preview()
+
+    def _on_preview_wheel(self, event):
+        self._step_preview(-1 if event.num == 4 or event.delta > 0 else 1)
+
+    def _show_preview(self):
+        """顯示目前頁面：已快取直接顯示，否則先放大較低解析度的結果，並排入渲染"""
+        if self.preview_path is None:
+            return
+        renderer = self._preview_renderer()
+        path, page, angle = self.preview_path, self.preview_page, int(self.rotation_var.get())
+        self.preview_shown_px = 0
+        hit = renderer.lookup(path, page, PREVIEW_PX, angle)
+        low = None
+        if hit is not None:
+            self._draw_preview(hit)
+        else:
+            low = renderer.placeholder(path, page, PREVIEW_PX, angle)
+            if low is not None:
+                self._draw_preview(low)
+            else:
+                self._set_preview_text("⏳ 產生預覽中...")
+        # 最後排入的最先渲染：縮圖 -> 清晰版 -> 前後頁
+        keys = self._neighbour_keys() + [(path, page, PREVIEW_PX, angle)]
+        if hit is None and low is None:
+            keys.append((path, page, PREVIEW_THUMB_PX, angle))
+        renderer.request(*keys)
+        self._update_preview_nav()
+
+    def _neighbour_keys(self):
+        """前後頁的預覽請求；轉檔進行中不預先渲染，把 CPU 留給轉檔"""
+        count = self._preview_renderer().page_count(self.preview_path)
+        if self.converting or count is None:
+            return []
+        angle = int(self.rotation_var.get())
+        return [(self.preview_path, n, PREVIEW_PX, angle)
+                for n in (self.preview_page + 1, self.preview_page - 1) if 1 <= n <= count]
+
+    def _draw_preview(self, preview):
+        photo = tk.PhotoImage(data=base64.b64encode(preview["png"]).decode("ascii"))
+        longest = max(preview["width"], preview["height"])
+        if PREVIEW_PX // longest >= 2:  # 低解析度的替代圖，放大至預覽尺寸
+            photo = photo.zoom(PREVIEW_PX // longest)
+        self.preview_photo = photo  # 保留參照，否則圖片會被回收
+        self.preview_label.config(image=photo, text="")
+        self.preview_shown_px = longest
+
+    def _set_preview_text(self, text):
+        self.preview_photo = None
+        self.preview_label.config(image="", text=text)
+        self.preview_shown_px = 0
+
+    def _poll_preview(self):
+        """顯示背景完成的預覽；與轉檔訊息分開處理，互不延誤"""
+        try:
+            while True:
+                key, preview, error = self.preview_queue.get_nowait()
+                path, page, px, angle = key
+                if (path, page, angle) != (self.preview_path, self.preview_page, int(self.rotation_var.get())):
+                    continue  # 前後頁或已離開的頁面，結果已在快取中
+                if error is not None:
+                    if self.preview_shown_px == 0:
+                        self._set_preview_text(f"⚠️ 無法預覽：{error}")
+                    continue
+                if px > self.preview_shown_px:
+                    self._draw_preview(preview)
+                if px == PREVIEW_PX:
+                    self._preview_renderer().request(*self._neighbour_keys())
+                self._update_preview_nav()
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(PREVIEW_POLL_MS, self._poll_preview)
+
+    def _update_preview_nav(self):
+        """頁碼與依目前設定的輸出尺寸"""
+        if self.preview_path is None:
+            self.preview_page_var.set("")
+            self.preview_info_var.set("")
+            return
+        renderer = self._preview_renderer()
+        count = renderer.page_count(self.preview_path)
+        self.preview_page_var.set(f"第 {self.preview_page} / {count if count is not None else '?'} 頁")
+        size = renderer.page_size(self.preview_path, self.preview_page)
+        if size is None:
+            self.preview_info_var.set("")
+            return
+        dpi = page_dpi(size, {"dpi": max(1, self._parse_input(self.dpi_var.get(), self.PH_DPI, 200)),
+                              "fit_px": max(0, self._parse_input(self.fit_px_var.get(), self.PH_FIT, 0)),
+                              "max_mp": MAX_MP_LABELS.get(self.max_mp_var.get(), 0), "min_dpi": 0, "max_dpi": 0})
+        width, height = math.ceil(size[0] * dpi / 72), math.ceil(size[1] * dpi / 72)
+        if int(self.rotation_var.get()) in (90, 270):
+            width, height = height, width
+        self.preview_info_var.set(f"📏 {size[0] * 25.4 / 72:.0f} × {size[1] * 25.4 / 72:.0f} mm"
+                                  f" → 輸出 {width} × {height} px ({dpi:.0f} DPI)")
+
+    def close_preview(self):
+        if self.previewer is not None:
+            self.previewer.close()
 
     def log(self, msg):
         self.queue.put(("log", msg))
 
-    def _update_log(self, msg):
-        self.log_text.insert(tk.END, f"{msg}\n")
+    def _flush_log(self, lines):
+        """一次插入累積的紀錄，並只保留最後 LOG_MAX_LINES 行"""
+        if not lines: return
+        if self.log_fp:
+            try: self.log_fp.write("\n".join(lines) + "\n")
+            except OSError: self.log_fp = None
+        lines = lines[-LOG_MAX_LINES:]
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        total = int(self.log_text.index("end-1c").split(".")[0]) - 1
+        if total > LOG_MAX_LINES:
+            self.log_text.delete("1.0", f"{total - LOG_MAX_LINES + 1}.0")
         self.log_text.see(tk.END)
 
+    def _refresh_progress(self, force=False):
+        """節流更新進度條，並顯示每秒頁數與預估剩餘時間"""
+        now = time.monotonic()
+        if self.pending_progress is None: return
+        if not force and now - self.last_progress_time < 1.0 / PROGRESS_MAX_FPS: return
+        current = self.pending_progress
+        self.pending_progress = None
+        self.last_progress_time = now
+        self.progress['value'] = current
+
+        elapsed = now - self.run_start if self.run_start else 0
+        if current and elapsed > 0:
+            rate = current / elapsed
+            remaining = (self.progress['maximum'] - current) / rate
+            self.speed_var.set(f"{current}/{int(self.progress['maximum'])} 頁 · {rate:.1f} 頁/秒 · 剩餘約 {self._format_duration(remaining)}")
+
+    @staticmethod
+    def _format_duration(seconds):
+        m, s = divmod(int(seconds + 0.5), 60)
+        h, m = divmod(m, 60)
+        return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+    def _open_log_file(self):
+        if not self.log_file_var.get(): return
+        try:
+            self.log_fp = open(LOG_FILE_PATH, "a", encoding="utf-8")
+            self.log(f"📝 記錄檔：{LOG_FILE_PATH}")
+        except OSError as e:
+            self.log(f"無法開啟記錄檔: {e}")
+
+    def _close_log_file(self):
+        if self.log_fp:
+            self.log_fp.close()
+            self.log_fp = None
+
+    # 修改: 解析輸入值時，處理 Placeholder 文字 (視為使用預設值)
+    def _parse_input(self, val_str, placeholder, default_val):
+        val = val_str.strip()
+        if not val or val == placeholder:
+            return default_val
+        try:
+            return int(val)
+        except:
+            return default_val
+
     def start_convert(self):
         if not self.selected_files:
             messagebox.showwarning("提示", "請先選擇 PDF 檔案")
             return
 
-        # 修改: 解析輸入值時，處理 Placeholder 文字 (視為使用預設值)
-        def parse_input(val_str, placeholder, default_val):
-            val = val_str.strip()
-            if not val or val == placeholder:
-                return default_val
-            try:
-                return int(val)
-            except:
-                return default_val
-
-        dpi = parse_input(self.dpi_var.get(), self.PH_DPI, 200)
-        s = parse_input(self.page_start_var.get(), self.PH_START, None)
-        e = parse_input(self.page_end_var.get(), self.PH_END, None)
+        dpi = self._parse_input(self.dpi_var.get(), self.PH_DPI, 200)
+        s = self._parse_input(self.page_start_var.get(), self.PH_START, None)
+        e = self._parse_input(self.page_end_var.get(), self.PH_END, None)
+        fit_px = self._parse_input(self.fit_px_var.get(), self.PH_FIT, 0)
         
-        settings = {
-            "dpi": dpi, "start": s, "end": e,
-            "angle": int(self.rotation_var.get()),
-            "fmt": self.output_format_var.get(),
-            "mode": self.output_mode_var.get(),
-            "open": self.auto_open_var.get()
-        }
+        try:
+            settings = load_engine().make_settings(
+                dpi=dpi, start=s, end=e,
+                fit_px=fit_px, max_mp=MAX_MP_LABELS[self.max_mp_var.get()],
+                angle=int(self.rotation_var.get()),
+                fmt=self.output_format_var.get(),
+                encoder=ENCODER_LABELS[self.encoder_var.get()],
+                color=COLOR_LABELS[self.color_var.get()],
+                mode=self.output_mode_var.get(),
+                workers=int(self.workers_var.get()),
+                incremental=self.incremental_var.get(),
+                skip_blank=self.skip_blank_var.get(),
+                dedup=self.dedup_var.get()
+            )
+        except ValueError as err:
+            messagebox.showwarning("提示", str(err))
+            return
+        self.open_when_done = self.auto_open_var.get()
+        self.converting = True
 
         self.convert_btn.pack_forget()
         self.cancel_btn.pack(side=tk.RIGHT)
         self.cancel_btn.config(state="normal")
         self.progress['value'] = 0
+        self.speed_var.set("")
+        self.pending_progress = None
+        self.run_start = None
+        self._open_log_file()
         self.log("===============================")
         self.log("🚀 轉檔作業開始...")
         self.stop_event.clear()
@@ -468,122 +815,13 @@ class PDFImageConverter:
             self.log("🛑 正在停止...")
 
     def worker(self, settings):
-        try:
-            tasks = []
-            total_pages = 0
-            
-            for f in self.selected_files:
-                if self.stop_event.is_set(): raise InterruptedError()
-                info = self._get_pdf_info(f)
-                if not info: continue
-                
-                p_total = info["Pages"]
-                s = settings["start"] or 1
-                e = settings["end"] or p_total
-                e = min(e, p_total)
-                if s > e: continue
-                pages = list(range(s, e+1))
-                tasks.append({"path": f, "pages": pages, "pw": info.get("_pw")})
-                total_pages += len(pages)
-
-            if total_pages == 0:
-                self.queue.put(("error", "無頁面可轉換"))
-                return
-
-            self.queue.put(("set_max", total_pages))
-            self.log(f"📊 分析完成：共 {total_pages} 頁待處理")
-
-            current = 0
-            scale_factor = settings["dpi"] / 72.0 
-
-            for task in tasks:
-                if self.stop_event.is_set(): raise InterruptedError()
-                base = os.path.splitext(os.path.basename(task["path"]))[0]
-                out_dir = os.path.dirname(task["path"])
-                if settings["mode"] == "folder":
-                    out_dir = os.path.join(out_dir, base + "_images")
-                    os.makedirs(out_dir, exist_ok=True)
-                
-                self.log(f"📂 正在處理：{base}")
-
-                try:
-                    pdf = pdfium.PdfDocument(task["path"], password=task["pw"])
-                    
-                    for p_num in task["pages"]:
-                        if self.stop_event.is_set(): raise InterruptedError()
-                        
-                        page_index = p_num - 1
-                        page = pdf[page_index]
-                        bitmap = page.render(scale=scale_factor)
-                        pil_image = bitmap.to_pil()
-                        
-                        bitmap.close()
-                        page.close()
-
-                        if settings["angle"]: 
-                            pil_image = pil_image.rotate(settings["angle"], expand=True)
-
-                        ext = settings["fmt"].lower()
-                        fname = f"page_{p_num}.{ext}"
-                        save_path = self._unique_path(os.path.join(out_dir, fname))
-                        
-                        fmt_param = "JPEG" if ext in ["jpg", "jpeg"] else "PNG"
-                        if fmt_param == "JPEG": 
-                            pil_image = pil_image.convert("RGB")
-                            
-                        pil_image.save(save_path, fmt_param)
-                        self.log(f"  ➜ 第 {p_num} 頁轉換成功")
-
-                        current += 1
-                        self.queue.put(("progress", current))
-                    
-                    pdf.close()
-
-                except Exception as e:
-                    self.log(f"❌ 檔案處理錯誤: {str(e)}")
-                    continue
-                
-                if settings["open"] and not self.stop_event.is_set():
-                    try: os.startfile(out_dir)
-                    except: pass
-            
-            self.queue.put(("done", None))
-
-        except InterruptedError:
-            self.queue.put(("cancelled", None))
-        except Exception as e:
-            self.queue.put(("error", str(e)))
-
-    def _get_pdf_info(self, path):
-        pw = None
-        for _ in range(2):
-            try:
-                pdf = pdfium.PdfDocument(path, password=pw)
-                page_count = len(pdf)
-                pdf.close()
-                return {"Pages": page_count, "_pw": pw}
-            except Exception as e:
-                err_str = str(e).lower()
-                if "password" in err_str or "incorrect" in err_str or "crypt" in err_str:
-                    pw = self.ask_password_ui(path)
-                    if not pw: return None
-                else:
-                    if pw is None:
-                         pw = self.ask_password_ui(path)
-                         if not pw: return None
-                    else:
-                        self.log(f"讀取失敗: {os.path.basename(path)} ({e})")
-                        return None
-        return None
-
-    def _unique_path(self, path):
-        if not os.path.exists(path): return path
-        base, ext = os.path.splitext(path)
-        i = 1
-        while True:
-            new_p = f"{base}_{i}{ext}"
-            if not os.path.exists(new_p): return new_p
-            i += 1
+        engine = load_engine().ConversionEngine(settings, on_event=lambda kind, data: self.queue.put((kind, data)),
+                                                ask_password=self.ask_password_ui, stop_event=self.stop_event)
+        if any(os.path.isdir(p) for p in self.selected_files):
+            from pdfconv.discovery import iter_inputs
+            engine.run(iter_inputs(self.selected_files, recursive=True))
+        else:
+            engine.run(self.selected_files)
 
     def ask_password_ui(self, path):
         evt = threading.Event()
@@ -593,40 +831,81 @@ class PDFImageConverter:
         return res.get("pw")
 
     def process_queue(self):
+        lines = []
         try:
-            while True:
+            for _ in range(QUEUE_BATCH_MAX):
                 kind, data = self.queue.get_nowait()
-                if kind == "log": self._update_log(data)
+                if kind == "log": lines.append(data)
                 elif kind == "set_max":
+                    # 總頁數隨分析進度遞增，只有第一次才重設進度與計時
                     self.progress['maximum'] = data
-                    self.progress['value'] = 0
-                elif kind == "progress": self.progress['value'] = data
-                elif kind == "ask_pw":
-                    path, evt, res = data
-                    dialog = CleanPasswordDialog(self.root, os.path.basename(path))
-                    self.root.wait_window(dialog)
-                    res["pw"] = dialog.password
-                    evt.set()
-                elif kind in ["done", "error", "cancelled"]:
-                    self.cancel_btn.pack_forget()
-                    self.convert_btn.pack(side=tk.RIGHT)
-                    if kind == "done":
-                        self.progress['value'] = self.progress['maximum']
-                        self.log("✨ 恭喜！所有轉檔作業已完成。")
-                        messagebox.showinfo("完成", "所有轉檔作業已完成！")
-                    elif kind == "cancelled":
-                        self.log("⚠️ 作業已手動取消")
-                        messagebox.showinfo("取消", "作業已取消")
-                    elif kind == "error":
-                        messagebox.showerror("錯誤", f"發生錯誤: {data}")
+                    if self.run_start is None:
+                        self.progress['value'] = 0
+                        self.run_start = time.monotonic()
+                elif kind == "progress": self.pending_progress = data
+                elif kind == "file_done":
+                    if self.open_when_done:
+                        try: os.startfile(data)
+                        except: pass
+                else:
+                    # 跳出對話框前，先把累積的紀錄與進度顯示出來
+                    self._flush_log(lines)
+                    lines = []
+                    self._refresh_progress(force=True)
+                    self._handle_dialog_message(kind, data)
         except queue.Empty: pass
-        finally: self.root.after(100, self.process_queue)
+        finally:
+            self._flush_log(lines)
+            self._refresh_progress()
+            self.root.after(UI_REFRESH_MS, self.process_queue)
+
+    def _handle_dialog_message(self, kind, data):
+        if kind == "ask_pw":
+            path, evt, res = data
+            dialog = CleanPasswordDialog(self.root, os.path.basename(path))
+            self.root.wait_window(dialog)
+            res["pw"] = dialog.password
+            evt.set()
+        elif kind in ["done", "error", "cancelled"]:
+            self.converting = False
+            self.cancel_btn.pack_forget()
+            self.convert_btn.pack(side=tk.RIGHT)
+            if self.run_start:
+                elapsed = time.monotonic() - self.run_start
+                done_pages = int(self.progress['value'])
+                rate = done_pages / elapsed if elapsed > 0 else 0
+                self.speed_var.set(f"{done_pages} 頁 · 平均 {rate:.1f} 頁/秒 · 耗時 {self._format_duration(elapsed)}")
+            if kind == "done":
+                self.progress['value'] = self.progress['maximum']
+                self._flush_log(["✨ 恭喜！所有轉檔作業已完成。"])
+                self._close_log_file()
+                messagebox.showinfo("完成", "所有轉檔作業已完成！")
+            elif kind == "cancelled":
+                self._flush_log(["⚠️ 作業已手動取消"])
+                self._close_log_file()
+                messagebox.showinfo("取消", "作業已取消")
+            elif kind == "error":
+                self._flush_log([f"❌ 發生錯誤: {data}"])
+                self._close_log_file()
+                messagebox.showerror("錯誤", f"發生錯誤: {data}")
 
     def show_about(self):
         AboutDialog(self.root)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # PyInstaller 打包後子行程需要
     if DND_AVAILABLE: root = TkinterDnD.Tk()
     else: root = tk.Tk()
-    PDFImageConverter(root)
-    root.mainloop()
\ No newline at end of file
+    app = PDFImageConverter(root)
+    probe_path = os.environ.get(STARTUP_PROBE_ENV)
+    if probe_path:
+        root.update()  # 完成第一次繪製，視窗已可操作
+        shown = time.time()
+        warm_engine().join()
+        with open(probe_path, "w", encoding="utf-8") as f:
+            f.write(f'{{"window": {shown}, "engine": {time.time()}}}')
+        root.destroy()
+    else:
+        root.after(ENGINE_WARMUP_MS, warm_engine)
+        root.mainloop()
+        app.close_preview()
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""PDF 轉圖片核心套件：無介面的轉檔引擎與命令列工具
+
+引擎相依的 pypdfium2 / Pillow 載入約需上百毫秒；以下名稱在第一次使用時才載入 engine，
+只需要設定常數的程式 (例如圖形介面啟動時) 不必等待。
+"""
+import importlib
+
+_LAZY = {
+    "DEFAULT_SETTINGS": "engine",
+    "ConversionEngine": "engine",
+    "collect_inputs": "discovery",
+    "default_workers": "scheduler",
+    "iter_convert": "engine",
+    "iter_inputs": "discovery",
+    "make_settings": "engine",
+}
+
+__all__ = [
+    "DEFAULT_SETTINGS",
+    "ConversionEngine",
+    "collect_inputs",
+    "default_workers",
+    "iter_convert",
+    "iter_inputs",
+    "make_settings",
+]
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
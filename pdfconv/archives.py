@@ -0,0 +1,176 @@
+"""封存輸出：每個 PDF 的所有頁面寫入單一 ZIP 或多頁 TIFF
+
+大量頁面寫到網路磁碟 (SMB/NFS) 時，逐頁建立、檢查、關閉檔案的成本遠高於寫入本身，
+資料夾也會變得極大。封存模式把編碼好的頁面直接附加到同一個檔案，不產生暫存的單頁檔案。
+ZIP 以 stored (不再壓縮) 方式寫入。兩種封存檔都依頁碼順序附加：提早完成的頁面先暫存 (只保留已編碼的資料)，
+等前面的頁面寫入後再附加；暫存總量超過 ARCHIVE_PENDING_MB 時，其餘頁面改存暫存檔，記憶體用量不隨頁數增加。
+重複頁面合併時，ZIP 內只存一份，其餘記錄於封存檔內的 duplicates.json (頁面名稱 -> 原始頁面)。
+"""
+import json
+import os
+import tempfile
+import zipfile
+
+from PIL import TiffImagePlugin
+
+ARCHIVE_MODES = {"zip": "zip", "tiff": "tif"}  # 輸出模式 -> 副檔名
+
+
+DUPLICATES_NAME = "duplicates.json"
+
+ARCHIVE_PENDING_MB = 64   # 等待前面頁面時留在記憶體中的已編碼頁面上限 (MB)，超過的改存暫存檔
+
+
+class OrderedArchiveWriter:
+    """依頁碼順序附加頁面；子類別實作 _append(名稱, 資料) 與 _close()"""
+
+    def __init__(self, path, pages, max_pending=ARCHIVE_PENDING_MB << 20):
+        self.path = path
+        self.order = list(pages)   # 預期的頁碼順序
+        self.waiting = set(self.order)
+        self.next = 0
+        self.pending = {}          # 提早完成、尚未輪到的頁面：頁碼 -> [(名稱, bytes 或暫存檔中的 (位移, 長度))]
+        self.complete = set()      # pending 中已完成整頁 (主頁面已送達或略過) 的頁碼
+        self.pending_bytes = 0
+        self.max_pending = max_pending
+        self.spill = None          # 超過上限的頁面存放的暫存檔
+
+    def add(self, p_num, name, data, last=True):
+        """加入一個項目；同一頁的額外尺寸先送達 (last=False)，主頁面送達即代表整頁完成"""
+        if p_num not in self.waiting:
+            self._append(name, data)  # 未預期的頁面，直接附加
+            return
+        entries = self.pending.setdefault(p_num, [])
+        if p_num != self.order[self.next] and self.pending_bytes + len(data) > self.max_pending:
+            if self.spill is None:
+                self.spill = tempfile.TemporaryFile(prefix="pdfconv-archive-")
+            self.spill.seek(0, os.SEEK_END)
+            entries.append((name, (self.spill.tell(), len(data))))
+            self.spill.write(data)
+        else:
+            entries.append((name, data))
+            self.pending_bytes += len(data)
+        if last:
+            self.complete.add(p_num)
+            self._flush()
+
+    def skip(self, p_num):
+        """不輸出的頁面 (空白或重複頁面)：不再等待它，後續頁面可以繼續附加"""
+        if p_num in self.waiting:
+            self.pending.setdefault(p_num, [])
+            self.complete.add(p_num)
+            self._flush()
+
+    def _flush(self):
+        while self.next < len(self.order) and self.order[self.next] in self.complete:
+            self._write_page(self.order[self.next])
+            self.next += 1
+
+    def _write_page(self, p_num):
+        self.waiting.discard(p_num)
+        self.complete.discard(p_num)
+        for name, data in self.pending.pop(p_num, ()):
+            if isinstance(data, tuple):
+                offset, size = data
+                self.spill.seek(offset)
+                data = self.spill.read(size)
+            else:
+                self.pending_bytes -= len(data)
+            self._append(name, data)
+
+    def close(self):
+        """關閉檔案；缺頁 (轉換失敗) 時，已暫存的後續頁面依序附加"""
+        try:
+            for p_num in sorted(self.pending):
+                self._write_page(p_num)
+            self._close()
+        finally:
+            if self.spill is not None:
+                self.spill.close()
+
+
+class ZipArchiveWriter(OrderedArchiveWriter):
+    def __init__(self, path, pages, max_pending=ARCHIVE_PENDING_MB << 20):
+        super().__init__(path, pages, max_pending)
+        self.zf = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        self.links = {}   # 重複頁面名稱 -> 原始頁面
+
+    def _append(self, name, data):
+        self.zf.writestr(name, data)
+
+    def _close(self):
+        if self.links:
+            self.zf.writestr(DUPLICATES_NAME, json.dumps(self.links, ensure_ascii=False, indent=1))
+        self.zf.close()
+
+
+class TiffArchiveWriter(OrderedArchiveWriter):
+    def __init__(self, path, pages, max_pending=ARCHIVE_PENDING_MB << 20):
+        super().__init__(path, pages, max_pending)
+        self.fp = open(path, "w+b")  # AppendingTiffWriter 會回頭讀取並修正 IFD 位移
+        self.tf = TiffImagePlugin.AppendingTiffWriter(self.fp)
+
+    def _append(self, name, data):
+        self.tf.write(data)
+        self.tf.newFrame()
+
+    def _close(self):
+        self.tf.close()
+        self.fp.close()
+
+
+class ArchiveSet:
+    """管理各來源 PDF 對應的封存檔；第一頁寫入時才建立檔案"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.writers = {}   # 來源路徑 -> writer
+        self.skipped = {}   # 封存檔建立前就已略過的頁面：來源路徑 -> {頁碼}
+
+    def _writer(self, path, archive, pages):
+        writer = self.writers.get(path)
+        if writer is None:
+            skipped = self.skipped.pop(path, ())
+            cls = ZipArchiveWriter if self.mode == "zip" else TiffArchiveWriter
+            writer = cls(archive, [p for p in pages if p not in skipped])
+            self.writers[path] = writer
+        return writer
+
+    def write(self, path, archive, pages, p_num, name, data, last=True):
+        """將一頁 (last=False 時為其額外尺寸) 附加到 archive，回傳供紀錄顯示的位置 (封存檔路徑/頁面名稱)"""
+        writer = self._writer(path, archive, pages)
+        writer.add(p_num, name, data, last)
+        return f"{writer.path}/{name}"
+
+    def skip(self, path, archive, pages, p_num):
+        """略過不輸出的頁面；封存檔尚未建立時先記下 (全部略過時不建立空的封存檔)"""
+        writer = self.writers.get(path)
+        if writer is None:
+            self.skipped.setdefault(path, set()).add(p_num)
+        else:
+            writer.skip(p_num)
+
+    def link(self, path, archive, pages, name, original):
+        """重複頁面 (僅 ZIP)：不再存一份，記錄於 duplicates.json；original 為原始頁面的位置
+
+        呼叫端另以 skip() 告知不再等待該頁。
+        """
+        writer = self._writer(path, archive, pages)
+        prefix = writer.path + "/"
+        if original.startswith(prefix):
+            original = original[len(prefix):]   # 同一封存檔內只記頁面名稱
+        else:
+            original = os.path.relpath(original, os.path.dirname(writer.path))
+        writer.links[name] = original.replace(os.sep, "/")
+        return f"{writer.path}/{name}"
+
+    def finish(self, path):
+        """來源檔案全部頁面完成 (或失敗) 時關閉其封存檔"""
+        self.skipped.pop(path, None)
+        writer = self.writers.pop(path, None)
+        if writer is not None:
+            writer.close()
+
+    def close_all(self):
+        for path in list(self.writers):
+            self.finish(path)
@@ -0,0 +1,40 @@
+"""點陣圖緩衝區池：同尺寸頁面重複使用渲染緩衝區，不必每頁重新配置
+
+高 DPI 時單頁緩衝區可達數百 MB，重複配置/釋放會推高峰值記憶體並浪費時間。
+緩衝區在圖片編碼完成 (不再被 PIL 圖片引用) 後才歸還。
+"""
+import ctypes
+import threading
+
+import pypdfium2 as pdfium
+import pypdfium2.internal as pdfium_i
+
+
+class BitmapPool:
+    def __init__(self, limit=4):
+        self.limit = limit      # 最多保留的閒置緩衝區數量
+        self.free = {}          # 位元組大小 -> [ctypes 緩衝區]
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def maker(self, width, height, format, rev_byteorder=False):
+        """作為 page.render(bitmap_maker=...) 使用"""
+        stride = width * pdfium_i.BitmapTypeToNChannels[format]
+        size = stride * height
+        with self.lock:
+            bufs = self.free.get(size)
+            buffer = bufs.pop() if bufs else None
+            if buffer is not None:
+                self.count -= 1
+        if buffer is None:
+            buffer = (ctypes.c_ubyte * size)()
+        return pdfium.PdfBitmap.new_native(width, height, format, rev_byteorder=rev_byteorder, buffer=buffer)
+
+    def release(self, buffer):
+        """歸還緩衝區；呼叫後不得再使用任何引用此緩衝區的圖片"""
+        if buffer is None:
+            return
+        with self.lock:
+            if self.count < self.limit:
+                self.free.setdefault(len(buffer), []).append(buffer)
+                self.count += 1
@@ -0,0 +1,297 @@
+"""命令列介面：python -m pdfconv 輸入檔案或資料夾 [選項]"""
+import argparse
+import getpass
+import itertools
+import os
+import sys
+import time
+
+from .discovery import SCAN_THREADS, iter_inputs
+from .encoders import OUTPUT_FORMATS
+from .engine import (COLOR_MODES, ENCODER_PROFILES, OUTPUT_MODES, READ_MODES, ROTATIONS, ConversionEngine,
+                     make_settings)
+
+# partial：整批跑完，但有檔案或頁面未能轉換 (含隔離的頁面)
+EXIT_CODES = {"done": 0, "error": 1, "partial": 3, "cancelled": 130}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pdfconv", description="將 PDF 轉換為圖片 (不需圖形介面)")
+    parser.add_argument("inputs", nargs="*",
+                        help="PDF 檔案、資料夾或萬用字元路徑，例如 \"D:/掃描/**/*.pdf\" (--serve / --work-from / --coordinate 模式不需要)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="遞迴搜尋資料夾內的 PDF")
+    parser.add_argument("--scan-threads", type=int, default=SCAN_THREADS,
+                        help=f"同時列舉的資料夾數，網路磁碟上的大型資料夾樹可調高 (預設: {SCAN_THREADS})")
+    parser.add_argument("--dpi", type=int, default=200, help="解析度 (預設: 200)")
+    parser.add_argument("--fit-px", type=int, default=0, metavar="PX",
+                        help="每頁最長邊縮放至此像素數，取代固定 DPI (可搭配 --min-dpi / --max-dpi 限制範圍)")
+    parser.add_argument("--max-mp", type=float, default=0, metavar="MP",
+                        help="單頁像素數上限 (百萬像素)，超過的頁面 (如 A0 圖面) 自動降低 DPI 渲染 (預設: 0 不限制)")
+    parser.add_argument("--min-dpi", type=int, default=0, help="--fit-px 算出的 DPI 下限 (預設: 0 不限制)")
+    parser.add_argument("--max-dpi", type=int, default=0, help="--fit-px 算出的 DPI 上限 (預設: 0 不限制)")
+    parser.add_argument("--start", type=int, default=None, help="起始頁碼 (預設: 1)")
+    parser.add_argument("--end", type=int, default=None, help="結束頁碼 (預設: 最末頁)")
+    parser.add_argument("--rotate", type=int, default=0, choices=ROTATIONS, help="旋轉角度")
+    parser.add_argument("--format", dest="fmt", default="PNG", type=str.upper, choices=OUTPUT_FORMATS, help="圖片格式")
+    parser.add_argument("--encoder", default="balanced", choices=ENCODER_PROFILES,
+                        help="編碼設定檔：fast 壓縮快但檔案較大、balanced 預設、smallest 檔案最小但較耗 CPU")
+    parser.add_argument("--color", default="color", type=str.lower, choices=COLOR_MODES,
+                        help="色彩模式：color 全彩 (預設)、gray 8-bit 灰階、mono 1-bit 黑白 (僅 PNG/TIFF，其他格式改為灰階)、"
+                             "auto 逐頁偵測，黑白頁面輸出 1-bit、灰階頁面輸出灰階")
+    parser.add_argument("--variant", dest="variants", action="append", default=[], metavar="SUFFIX:PX[:FMT[:ENCODER]]",
+                        help="額外輸出的尺寸 (可重複)，由同一次渲染縮小產生，例如 thumb:150:JPG、preview:1024:WEBP")
+    parser.add_argument("--mode", default="folder", choices=OUTPUT_MODES,
+                        help="輸出位置：folder 建立資料夾、same 同層目錄、zip 每個 PDF 一個 ZIP、"
+                             "tiff 每個 PDF 一個多頁 TIFF")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量轉換：依輸出資料夾的 manifest 略過已轉換且未變更的頁面")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="平行行程數 (預設: 1)")
+    parser.add_argument("--queue-depth", type=int, default=4,
+                        help="渲染→編碼→寫檔 管線的佇列上限，0 表示逐頁同步處理 (預設: 4)")
+    parser.add_argument("--encoders", type=int, default=2, help="每個行程的編碼執行緒數 (預設: 2)")
+    parser.add_argument("--open-docs", type=int, default=32, help="同時保持開啟的 PDF 數量上限 (預設: 32)")
+    parser.add_argument("--read", default="lazy", choices=READ_MODES,
+                        help="PDF 讀取方式：lazy 由 pdfium 依需要讀取 (預設)、mmap 記憶體對應、"
+                             "prefetch 以背景執行緒整檔循序預讀 (適合網路磁碟)")
+    parser.add_argument("--max-page-mb", type=int, default=0,
+                        help="單頁點陣圖超過此大小 (MB) 時改為分帶渲染，限制記憶體用量 (預設: 0 停用)")
+    parser.add_argument("--skip-blank", action="store_true", help="略過空白頁 (以低解析度試渲染判斷，不輸出圖片)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="內容相同的頁面只編碼一次，其餘以硬連結取代 (ZIP 模式記錄於 duplicates.json)")
+    parser.add_argument("--memory-budget-mb", type=int, default=0,
+                        help="平行轉檔時同時渲染中的點陣圖估計總量上限 (MB)，避免多個超大頁面同時渲染 (預設: 0 不限制)")
+    parser.add_argument("--page-timeout", type=float, default=0,
+                        help="單頁渲染時間上限 (秒)，超過即結束該子行程並隔離此頁，其餘頁面照常轉換 (預設: 0 不限制)")
+    parser.add_argument("--page-memory-mb", type=int, default=0,
+                        help="渲染子行程的記憶體上限 (MB)，超過即結束該子行程並隔離此頁 (預設: 0 不限制)")
+    parser.add_argument("--quarantine-report", metavar="PATH", default=None,
+                        help="將無法轉換的頁面 (檔案、頁碼、原因) 寫為 JSON")
+    parser.add_argument("--profile", action="store_true", help="量測各階段耗時，結束時輸出摘要")
+    parser.add_argument("--profile-report", metavar="PATH", default=None,
+                        help="將執行報告 (各階段耗時分布、最慢的頁面與檔案) 寫為 JSON，隱含 --profile")
+    parser.add_argument("--watch", action="store_true",
+                        help="常駐監看模式：持續監看輸入資料夾，新放入的 PDF 寫入完成後自動轉檔 (Ctrl+C 結束)")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="監看模式：檔案大小與修改時間持續不變多少秒才視為寫入完成 (預設: 2)")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="監看模式：未安裝 watchdog 時的輪詢間隔秒數 (預設: 2)")
+    parser.add_argument("--serve", type=int, metavar="PORT", default=None,
+                        help="HTTP 服務模式：於指定埠接受 POST /convert，以串流 ZIP 回傳各頁圖片")
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP 服務綁定的位址 (預設: 127.0.0.1，僅限本機)")
+    parser.add_argument("--concurrency", type=int, default=2,
+                        help="HTTP 服務：同時轉檔的請求數，每個各有 --workers 個行程 (預設: 2)")
+    parser.add_argument("--max-queue", type=int, default=8, help="HTTP 服務：等待中的請求上限，超過回傳 503 (預設: 8)")
+    parser.add_argument("--queue-timeout", type=float, default=30.0, help="HTTP 服務：等待轉檔名額的秒數上限 (預設: 30)")
+    parser.add_argument("--request-timeout", type=float, default=300.0,
+                        help="HTTP 服務：單一請求的轉檔時間上限秒數，逾時即取消 (預設: 300)")
+    parser.add_argument("--max-upload-mb", type=int, default=512, help="HTTP 服務：上傳檔案大小上限 (預設: 512 MB)")
+    parser.add_argument("--path-root", action="append", default=[], metavar="DIR",
+                        help="HTTP 服務：允許以 path 參數直接讀取的資料夾 (可重複，預設不允許)")
+    parser.add_argument("--submit-to", metavar="DIR", default=None,
+                        help="分散式轉檔：將輸入切成工作項目寫入共用佇列資料夾 (不在本機轉檔)")
+    parser.add_argument("--work-from", metavar="DIR", default=None,
+                        help="分散式轉檔：作為節點持續領取佇列資料夾中的項目轉檔，全部完成後結束 (轉檔設定以建立工作時為準)")
+    parser.add_argument("--coordinate", metavar="DIR", default=None,
+                        help="分散式轉檔：定期顯示整體進度並回收失聯節點的項目，全部完成後結束")
+    parser.add_argument("--item-pages", type=int, default=32, help="分散式轉檔：每個工作項目的頁數 (預設: 32)")
+    parser.add_argument("--lease", type=float, default=60.0,
+                        help="分散式轉檔：節點心跳停止多少秒後回收其項目 (預設: 60)")
+    parser.add_argument("--retry-failed", action="store_true", help="分散式轉檔：協調者啟動時將失敗的項目重新排入")
+    parser.add_argument("--password", default=None, help="加密 PDF 的開啟密碼")
+    parser.add_argument("-q", "--quiet", action="store_true", help="只顯示錯誤訊息")
+    return parser
+
+
+def make_password_prompt(password):
+    """有指定 --password 時直接使用；否則於互動終端機詢問，非互動環境則略過加密檔"""
+    def ask(path):
+        if password is not None:
+            return password
+        if not sys.stdin.isatty():
+            return None
+        try:
+            return getpass.getpass(f"檔案「{os.path.basename(path)}」需要密碼 (直接 Enter 略過): ") or None
+        except EOFError:
+            return None
+    return ask
+
+
+def make_reporter(quiet):
+    def on_event(kind, data):
+        if kind == "log" and not quiet:
+            print(data, file=sys.stderr)
+        elif kind == "error":
+            print(f"錯誤: {data}", file=sys.stderr)
+        elif kind == "cancelled":
+            print("⚠️ 作業已取消", file=sys.stderr)
+        elif kind == "report" and not quiet:
+            print_report(data)
+    return on_event
+
+
+def print_report(report):
+    """以表格列出各階段耗時摘要"""
+    print(f"📈 各階段耗時 (共 {report['pages']} 頁，{report['wall_seconds']:.2f} 秒)", file=sys.stderr)
+    print(f"  {'階段':<14}{'次數':>7}{'總計(s)':>10}{'CPU(s)':>10}{'p50(ms)':>10}{'p99(ms)':>10}", file=sys.stderr)
+    for name, st in sorted(report["stages"].items(), key=lambda kv: kv[1]["wall_total"], reverse=True):
+        print(f"  {name:<14}{st['count']:>7}{st['wall_total']:>10.3f}{st['cpu_total']:>10.3f}"
+              f"{st['p50'] * 1000:>10.1f}{st['p99'] * 1000:>10.1f}", file=sys.stderr)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        settings = make_settings(dpi=args.dpi, fit_px=args.fit_px, max_mp=args.max_mp, min_dpi=args.min_dpi,
+                                 max_dpi=args.max_dpi, start=args.start, end=args.end, angle=args.rotate,
+                                 fmt=args.fmt, encoder=args.encoder, color=args.color, variants=args.variants,
+                                 mode=args.mode,
+                                 workers=args.workers, queue_depth=args.queue_depth, encoders=args.encoders,
+                                 open_docs=args.open_docs, read=args.read, incremental=args.incremental,
+                                 max_page_mb=args.max_page_mb, memory_budget_mb=args.memory_budget_mb,
+                                 skip_blank=args.skip_blank, dedup=args.dedup,
+                                 page_timeout=args.page_timeout, page_memory_mb=args.page_memory_mb,
+                                 quarantine_report=args.quarantine_report, profile=args.profile, profile_report=args.profile_report)
+    except ValueError as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        return 2
+
+    if args.serve is not None:
+        return run_server(args, settings)
+    if args.work_from:
+        return run_node(args, settings)
+    if args.coordinate:
+        return run_coordinator(args)
+    if not args.inputs:
+        print("錯誤: 請指定 PDF 檔案或資料夾", file=sys.stderr)
+        return 2
+    if args.watch:
+        return run_watch(args, settings)
+
+    # 邊探索邊轉檔：找到第一個 PDF 即開始，不等整個資料夾樹列舉完
+    files = iter_inputs(args.inputs, recursive=args.recursive, threads=args.scan_threads)
+    head = list(itertools.islice(files, 2))
+    if not head:
+        print("錯誤: 找不到任何 PDF 檔案", file=sys.stderr)
+        return 1
+    files = itertools.chain(head, files) if len(head) > 1 else head  # 單一檔案維持串列，引擎可判斷是否值得平行
+    if args.submit_to:
+        return run_submit(args, settings, list(files))
+
+    engine = ConversionEngine(settings, on_event=make_reporter(args.quiet),
+                              ask_password=make_password_prompt(args.password))
+    try:
+        status = engine.run(files)
+        failed = engine.failed_files()
+        if status == "done" and failed:
+            print(f"⚠️ {len(failed)} 個檔案有頁面未能轉換", file=sys.stderr)
+            status = "partial"
+    except KeyboardInterrupt:
+        print("⚠️ 作業已取消", file=sys.stderr)
+        status = "cancelled"
+    return EXIT_CODES[status]
+
+
+def run_watch(args, settings):
+    from .watch import WatchService
+
+    dirs = [d for d in args.inputs if os.path.isdir(d)]
+    if len(dirs) != len(args.inputs):
+        print("錯誤: 監看模式的輸入必須是資料夾", file=sys.stderr)
+        return 2
+    # 常駐服務不能停下來等待輸入密碼，只使用 --password
+    service = WatchService(dirs, settings, recursive=args.recursive, settle=args.settle,
+                           poll_interval=args.poll_interval, on_event=make_reporter(args.quiet),
+                           ask_password=lambda path: args.password)
+    try:
+        service.serve()
+    except KeyboardInterrupt:
+        print("⚠️ 已停止監看", file=sys.stderr)
+    return 0
+
+
+def run_server(args, settings):
+    from .server import ConversionServer
+
+    log = make_reporter(args.quiet)
+    server = ConversionServer((args.host, args.serve), settings, concurrency=args.concurrency,
+                              max_queue=args.max_queue, queue_timeout=args.queue_timeout,
+                              request_timeout=args.request_timeout, max_upload_mb=args.max_upload_mb,
+                              path_roots=args.path_root, on_log=lambda msg: log("log", msg))
+    print(f"🌐 HTTP 轉檔服務已啟動：http://{args.host}:{server.server_address[1]}/convert", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("⚠️ 服務已停止", file=sys.stderr)
+    finally:
+        server.server_close()
+    return 0
+
+
+def run_submit(args, settings, files):
+    from .distributed import WorkQueue
+
+    log = make_reporter(args.quiet)
+    try:
+        job = WorkQueue(args.submit_to).submit(files, settings, password=args.password,
+                                               item_pages=max(1, args.item_pages), on_log=lambda msg: log("log", msg))
+    except ValueError as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        return 2
+    print(f"📮 已建立工作：{job['files']} 個檔案、{job['pages']} 頁，切成 {len(job['items'])} 個項目 -> {args.submit_to}",
+          file=sys.stderr)
+    return 0 if job["items"] else 1
+
+
+def run_node(args, settings):
+    from .distributed import QueueNode
+
+    # 節點不能停下來等待輸入密碼，只使用 --password
+    node = QueueNode(args.work_from, settings, lease=args.lease, poll_interval=args.poll_interval,
+                     on_event=make_reporter(args.quiet), ask_password=lambda path: args.password)
+    try:
+        node.serve()
+    except KeyboardInterrupt:
+        print("⚠️ 節點已停止，處理中的項目已放回佇列", file=sys.stderr)
+    return 0
+
+
+def format_status(status):
+    pct = status["done_pages"] / status["pages"] * 100 if status["pages"] else 100.0
+    line = (f"📊 {status['done_pages']}/{status['pages']} 頁 ({pct:.1f}%)｜項目 待處理 {status['todo']}、"
+            f"處理中 {status['claimed']}、完成 {status['done']}、失敗 {status['failed']}")
+    busy = [n for n in status["nodes"] if n.get("item")]
+    return line + f"｜工作中節點 {len(busy)}/{len(status['nodes'])}"
+
+
+def run_coordinator(args):
+    from .distributed import WorkQueue, coordinate
+
+    if args.retry_failed:
+        count = WorkQueue(args.coordinate).requeue_failed()
+        print(f"🔁 已重新排入 {count} 個失敗的項目", file=sys.stderr)
+    last = {}
+
+    def on_status(status):
+        now = time.monotonic()
+        line = format_status(status)
+        if "at" in last and now > last["at"]:
+            rate = (status["done_pages"] - last["pages"]) / (now - last["at"])
+            remaining = status["pages"] - status["done_pages"] - status["failed_pages"]
+            if rate > 0:
+                line += f"｜{rate:.1f} 頁/秒，預估剩餘 {remaining / rate / 60:.1f} 分鐘"
+        last.update(at=now, pages=status["done_pages"])
+        for item_id in status["reaped"]:
+            print(f"♻️ 回收失聯節點的項目：{item_id}", file=sys.stderr)
+        print(line, file=sys.stderr)
+
+    try:
+        status = coordinate(args.coordinate, lease=args.lease, interval=args.poll_interval, on_status=on_status)
+    except KeyboardInterrupt:
+        print("⚠️ 已停止監控 (節點仍會繼續處理)", file=sys.stderr)
+        return 0
+    if status["failed"]:
+        print(f"❌ {status['failed']} 個項目失敗 ({status['failed_pages']} 頁)，可加上 --retry-failed 重新排入",
+              file=sys.stderr)
+        return 1
+    print("🏁 所有項目皆已完成", file=sys.stderr)
+    return 0
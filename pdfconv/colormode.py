@@ -0,0 +1,88 @@
+"""色彩模式：彩色 / 灰階 / 黑白 (1-bit)，auto 依頁面內容逐頁判斷
+
+大部分輸入是黑白文字，以彩色渲染與儲存既浪費記憶體也拖慢編碼。
+灰階頁面直接以 pdfium 的灰階模式渲染 (每像素 1 位元組，約為彩色的 1/3 ~ 1/4)，
+黑白頁面再以固定門檻轉為 1-bit，PNG / TIFF 輸出可再縮小數倍 (TIFF 使用 CCITT Group 4)；
+JPEG / WebP 沒有 1-bit 格式，黑白頁面改以灰階輸出。
+
+auto 模式的判斷 (不需全解析度渲染)：
+- 文字或路徑使用彩色 -> color
+- 含非 1-bit 圖片或漸層時以低解析度試渲染，有明顯色彩的像素超過門檻 -> color
+- 其餘：所有圖片皆為 1-bit、文字與路徑只用純黑或純白 -> mono，否則 -> gray
+"""
+import ctypes
+
+import pypdfium2.raw as pdfium_c
+from PIL import ImageChops
+
+from .encoders import pil_format
+from .profiler import NULL_PROFILER
+
+COLOR_MODES = ["auto", "color", "gray", "mono"]
+
+# 可輸出 1-bit 的 Pillow 格式
+BILEVEL_FORMATS = ("PNG", "TIFF")
+
+PROBE_DPI = 36
+COLOR_DELTA = 24         # RGB 通道最大差值超過此值視為有色彩 (容忍掃描與 JPEG 的色偏)
+COLOR_RATIO = 0.001      # 有色彩的像素比例超過此值即為彩色頁面
+
+
+def _has_color(page):
+    bitmap = page.render(scale=PROBE_DPI / 72.0, rev_byteorder=True)
+    image = bitmap.to_pil()
+    r, g, b = image.split()
+    delta = ImageChops.lighter(ImageChops.lighter(ImageChops.difference(r, g), ImageChops.difference(g, b)),
+                               ImageChops.difference(r, b))
+    colored = sum(delta.histogram()[COLOR_DELTA + 1:])
+    bitmap.close()
+    return colored > COLOR_RATIO * image.width * image.height
+
+
+def _object_color(getter, raw):
+    """文字或路徑的填色 / 線條色：bw (純黑白或透明) / gray / color"""
+    rgba = [ctypes.c_uint() for _ in range(4)]
+    if not getter(raw, *[ctypes.byref(c) for c in rgba]):
+        return "bw"
+    r, g, b, a = (c.value for c in rgba)
+    if a == 0:
+        return "bw"
+    if not r == g == b:
+        return "color"
+    return "bw" if r in (0, 255) else "gray"
+
+
+def detect_color_mode(page):
+    """先檢查頁面物件；只有圖片與漸層的色彩無法由物件得知，需要時才試渲染"""
+    bilevel, probe = True, False
+    for obj in page.get_objects():
+        if obj.type == pdfium_c.FPDF_PAGEOBJ_IMAGE:
+            if obj.get_metadata().bits_per_pixel != 1:
+                bilevel, probe = False, True
+        elif obj.type in (pdfium_c.FPDF_PAGEOBJ_TEXT, pdfium_c.FPDF_PAGEOBJ_PATH):
+            for getter in (pdfium_c.FPDFPageObj_GetFillColor, pdfium_c.FPDFPageObj_GetStrokeColor):
+                color = _object_color(getter, obj.raw)
+                if color == "color":
+                    return "color"
+                if color == "gray":
+                    bilevel = False
+        elif obj.type == pdfium_c.FPDF_PAGEOBJ_SHADING:
+            bilevel, probe = False, True
+    if probe and _has_color(page):
+        return "color"
+    return "mono" if bilevel else "gray"
+
+
+def page_color_mode(pdf, p_num, settings, prof=NULL_PROFILER, path=None):
+    """決定此頁實際使用的色彩模式：color / gray / mono"""
+    mode = settings["color"]
+    if mode == "auto":
+        with prof.stage("color_probe", path, p_num):
+            page = pdf[p_num - 1]
+            try:
+                mode = detect_color_mode(page)
+            finally:
+                page.close()
+    if mode == "mono" and pil_format(settings["fmt"]) not in BILEVEL_FORMATS:
+        mode = "gray"
+    return mode
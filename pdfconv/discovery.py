@@ -0,0 +1,169 @@
+"""輸入探索：檔案、資料夾與萬用字元 (glob) 展開為 PDF 清單
+
+網路磁碟上的大型資料夾樹，逐層 os.walk 的時間幾乎都花在等待每次目錄列舉的往返；
+iter_inputs 以多個執行緒同時對不同資料夾呼叫 os.scandir (DirEntry 直接帶有檔案類型，
+不必逐檔 stat)，找到的 PDF 立即產出，引擎邊探索邊分析、轉檔，不必等整棵樹走完。
+萬用字元路徑 (例如 D:/掃描/**/*.pdf) 也一樣：拆成不含萬用字元的起始資料夾與其後各層的樣式，
+由 walk_pdfs 平行走訪起始資料夾，只進入可能符合樣式的子資料夾，逐一比對後產出。
+"""
+import fnmatch
+import glob
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 預設同時列舉的資料夾數 (網路磁碟延遲高，執行緒數可大於 CPU 核心數)
+SCAN_THREADS = 8
+
+
+def is_pdf_name(name):
+    return name.lower().endswith(".pdf")
+
+
+def has_wildcard(path):
+    return any(c in path for c in "*?[")
+
+
+def split_pattern(pattern):
+    """萬用字元路徑拆為 (不含萬用字元的起始資料夾, 其後各層的樣式清單)；起始資料夾可能為空字串 (目前資料夾)"""
+    root, parts = pattern, []
+    while has_wildcard(root):
+        root, part = os.path.split(root)
+        if part:
+            parts.append(part)
+        elif root == pattern:
+            break  # 無法再拆 (例如只剩磁碟機代號)
+        pattern = root
+    return root, parts[::-1]
+
+
+def _name_match(name, part):
+    # 與 glob 相同：萬用字元不符合以 . 開頭的隱藏檔名
+    if name.startswith(".") and not part.startswith("."):
+        return False
+    return fnmatch.fnmatch(name, part)
+
+
+def match_parts(names, parts, partial=False):
+    """相對路徑的各層名稱是否符合樣式 (** 符合任意層)；partial 時判斷資料夾底下是否可能有符合的檔案"""
+    if not names:
+        return bool(parts) if partial else all(p == "**" for p in parts)
+    if not parts:
+        return False
+    if parts[0] == "**":
+        if match_parts(names, parts[1:], partial):
+            return True
+        return not names[0].startswith(".") and match_parts(names[1:], parts, partial)
+    return _name_match(names[0], parts[0]) and match_parts(names[1:], parts[1:], partial)
+
+
+def walk_pdfs(root, recursive=True, threads=SCAN_THREADS, enter=None):
+    """平行走訪資料夾，逐一產出其中的 PDF 路徑
+
+    同一資料夾內的檔案依名稱排序，資料夾之間的順序不固定；不跟隨資料夾的符號連結，
+    無法讀取的資料夾直接略過 (同 os.walk)。提前停止迭代時，尚未開始的列舉會被取消。
+    enter(子資料夾路徑) 回傳 False 的資料夾不進入。
+    """
+    found = queue.Queue()
+    stop = threading.Event()
+    lock = threading.Lock()
+    pending = [0]
+    executor = ThreadPoolExecutor(max(1, threads), thread_name_prefix="pdfconv-scan")
+
+    def submit(path):
+        with lock:
+            pending[0] += 1
+        executor.submit(scan, path)
+
+    def scan(path):
+        files = []
+        try:
+            if stop.is_set():
+                return
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            for entry in entries:
+                try:
+                    if recursive and entry.is_dir(follow_symlinks=False):
+                        if enter is None or enter(entry.path):
+                            submit(entry.path)
+                    elif is_pdf_name(entry.name) and entry.is_file():
+                        files.append(entry.path)
+                except OSError:
+                    continue
+        except OSError:
+            pass
+        finally:
+            found.put(files)
+            with lock:
+                pending[0] -= 1
+                if pending[0] == 0:
+                    found.put(None)  # 所有資料夾都已列舉完
+
+    submit(root)
+    try:
+        while True:
+            files = found.get()
+            if files is None:
+                break
+            yield from files
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_inputs(paths, recursive=False, threads=SCAN_THREADS):
+    """展開輸入清單並逐一產出 PDF：檔案直接採用，資料夾搜尋其中的 PDF，含萬用字元的路徑以 glob 展開
+
+    萬用字元支援 ** (例如 D:/掃描/**/*.pdf)；重複出現的檔案只產出一次。
+    """
+    seen = set()
+
+    def once(path):
+        key = os.path.normcase(os.path.abspath(path))
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+
+    for p in paths:
+        if has_wildcard(p) and not os.path.exists(p):
+            root, parts = split_pattern(p)
+            if parts and is_pdf_name(parts[-1]) and os.path.isdir(root or os.curdir):
+                yield from filter(once, glob_pdfs(root, parts, threads))
+                continue
+            matches = glob.iglob(p, recursive=True)  # 也可能符合資料夾：交給 glob 逐一產出
+        else:
+            matches = [p]
+        for m in matches:
+            if os.path.isdir(m):
+                yield from filter(once, walk_pdfs(m, recursive, threads))
+            elif is_pdf_name(m) and once(m):
+                yield m
+
+
+def glob_pdfs(root, parts, threads=SCAN_THREADS):
+    """平行走訪 root，逐一產出相對路徑符合 parts 各層樣式的 PDF (產出的路徑與 glob 相同，不含 ./)"""
+    base = root or os.curdir
+
+    def rel_names(path):
+        return os.path.relpath(path, base).split(os.sep)
+
+    def enter(path):
+        return match_parts(rel_names(path), parts, partial=True)
+
+    recursive = len(parts) > 1 or parts[0] == "**"
+    for path in walk_pdfs(base, recursive, threads, enter):
+        names = rel_names(path)
+        if match_parts(names, parts):
+            yield os.path.join(root, *names) if root else os.path.join(*names)
+
+
+def collect_inputs(paths, recursive=False, threads=SCAN_THREADS):
+    """展開輸入清單為串列；同一資料夾或萬用字元找到的檔案依路徑排序，結果固定"""
+    files = []
+    for p in paths:
+        found = iter_inputs([p], recursive, threads)
+        files.extend(sorted(found) if os.path.isdir(p) or has_wildcard(p) else found)
+    return list(dict.fromkeys(files))
@@ -0,0 +1,388 @@
+"""多台電腦分工轉檔：以共用資料夾 (SMB/NFS) 作為工作佇列，不需要訊息佇列伺服器
+
+    python -m pdfconv 月結/ --dpi 300 --submit-to //nas/pdfq/0531   (建立工作：切成頁面範圍的工作項目)
+    python -m pdfconv --work-from //nas/pdfq/0531 -j 8               (每台節點各執行一份，可任意增減)
+    python -m pdfconv --coordinate //nas/pdfq/0531                   (彙整進度，並回收失聯節點的項目)
+
+佇列資料夾結構：
+    job.json                         轉檔設定與各項目的頁數 (最後寫入，出現後節點才開始領取)
+    todo/<項目>.<嘗試次數>.json      待處理
+    claimed/<項目>.<嘗試次數>@<節點>.json  處理中；節點定期更新修改時間作為心跳
+    done/<項目>.json / failed/<項目>.json  結果
+    nodes/<節點>.json                各節點的狀態
+
+- 領取、完成與回收都是單一 rename：同一項目只有一個節點能搶到，不需要鎖定檔案。
+- 修改時間連續 lease 秒沒有變化的 claimed 項目 (節點當機或斷線) 會被任一節點或協調者移回 todo；
+  是否逾時以本機單調時鐘觀察修改時間是否改變，不受各節點時鐘誤差影響。
+  同一項目逾時 MAX_ATTEMPTS 次即移到 failed，避免會讓節點當掉的項目無限重試。
+- 每頁輸出到固定路徑 (<檔名>_images/page_<頁碼>.<副檔名>) 並覆寫舊檔，項目重做不會產生重複的圖檔。
+- 所有節點都要能以相同路徑存取來源 PDF；各節點的平行行程數等資源設定可以不同，轉檔設定一律以 job.json 為準。
+"""
+import json
+import os
+import random
+import socket
+import threading
+import time
+
+from .encoders import extension
+from .engine import ConversionEngine, RenderPool, make_settings, needs_pool, output_dir, page_range
+from .sessions import DocumentSessions
+
+JOB_NAME = "job.json"
+QUEUE_DIRS = ("todo", "claimed", "done", "failed", "nodes")
+
+ITEM_PAGES = 32        # 每個工作項目的頁數
+LEASE_SECONDS = 60.0   # 心跳停止多久視為節點失聯 (須大於網路磁碟的屬性快取時間)
+MAX_ATTEMPTS = 3       # 同一項目因節點失聯而重新排入的次數上限
+
+# 由節點自己的硬體決定、不取自 job.json 的設定
+NODE_SETTINGS = ("workers", "queue_depth", "encoders", "open_docs", "read", "memory_budget_mb", "page_memory_mb",
+                 "profile", "profile_report", "quarantine_report")
+
+
+def node_name():
+    return f"{socket.gethostname()}-{os.getpid()}".replace("@", "_").replace(os.sep, "_")
+
+
+def _write_json(path, data):
+    """先寫暫存檔再更名，其他節點讀到的一定是完整內容"""
+    tmp = f"{path}.{node_name()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _parse_name(name):
+    """<項目>.<嘗試次數>[@<節點>].json -> (項目, 嘗試次數, 節點)"""
+    stem, _, node = name[:-len(".json")].partition("@")
+    item_id, _, attempt = stem.partition(".")
+    return item_id, int(attempt or 0), node or None
+
+
+def check_distributed(settings):
+    """分散式轉檔只支援各檔案獨立資料夾的輸出，且無法在節點之間共用 manifest 或重複頁面索引"""
+    if settings["mode"] != "folder":
+        raise ValueError("分散式轉檔只支援「建立資料夾」輸出 (--mode folder)")
+    if settings["incremental"]:
+        raise ValueError("分散式轉檔不支援增量轉換")
+    if settings["dedup"]:
+        raise ValueError("分散式轉檔不支援重複頁面合併")
+
+
+class WorkQueue:
+    def __init__(self, root, lease=LEASE_SECONDS):
+        self.root = root
+        self.lease = lease
+        self.seen = {}   # claimed 檔名 -> (修改時間, 最後一次變動的本機時間)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def names(self, sub):
+        try:
+            return sorted(n for n in os.listdir(self.path(sub)) if n.endswith(".json"))
+        except FileNotFoundError:
+            return []
+
+    def job(self):
+        """讀取 job.json；工作尚未建立完成時回傳 None"""
+        try:
+            return _read_json(self.path(JOB_NAME))
+        except FileNotFoundError:
+            return None
+
+    def submit(self, files, settings, password=None, item_pages=ITEM_PAGES, on_log=None):
+        """開啟各檔案取得頁數，切成工作項目寫入 todo，最後寫出 job.json；回傳 job"""
+        log = on_log or (lambda msg: None)
+        check_distributed(settings)
+        if os.path.exists(self.path(JOB_NAME)):
+            raise ValueError(f"佇列資料夾已有工作：{self.root}")
+        for sub in QUEUE_DIRS:
+            os.makedirs(self.path(sub), exist_ok=True)
+        sessions = DocumentSessions(1)
+        items, skipped = {}, []
+        for index, f in enumerate(files):
+            f = os.path.abspath(f)
+            try:
+                pages = page_range(settings, sessions.info(f, password)["Pages"])
+            except Exception as e:
+                log(f"⚠️ 無法開啟，略過：{os.path.basename(f)} ({e})")
+                skipped.append(f)
+                continue
+            finally:
+                sessions.release(f)
+            for i in range(0, len(pages), item_pages):
+                chunk = pages[i:i + item_pages]
+                item_id = f"{index:05d}-{chunk[0]:06d}"
+                _write_json(self.path("todo", f"{item_id}.0.json"), {"id": item_id, "path": f, "pages": chunk})
+                items[item_id] = len(chunk)
+        job = {"settings": {k: v for k, v in settings.items() if k not in NODE_SETTINGS},
+               "items": items, "pages": sum(items.values()), "files": len(files) - len(skipped),
+               "skipped": skipped, "created": time.time()}
+        _write_json(self.path(JOB_NAME), job)
+        return job
+
+    def claim(self, node):
+        """領取一個待處理項目，回傳 (項目內容, claimed 路徑)；沒有可領取的項目時回傳 None"""
+        names = self.names("todo")
+        # 從最前面的幾個項目中隨機挑選，多個節點同時領取時較少互相搶同一個
+        head = names[:8]
+        random.shuffle(head)
+        for name in head + names[8:]:
+            item_id, attempt, _ = _parse_name(name)
+            claimed = self.path("claimed", f"{item_id}.{attempt}@{node}.json")
+            try:
+                os.rename(self.path("todo", name), claimed)
+            except OSError:
+                continue  # 已被其他節點領走
+            if os.path.exists(self.path("done", f"{item_id}.json")):
+                os.remove(claimed)  # 失聯節點其實已完成，只是來不及回報
+                continue
+            return _read_json(claimed), claimed
+        return None
+
+    def heartbeat(self, claimed):
+        """更新處理中項目的修改時間；項目已被回收時回傳 False"""
+        try:
+            os.utime(claimed)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def finish(self, claimed, ok, record):
+        """回報結果：移到 done / failed 後寫入結果；項目已被回收 (租約逾時) 時回傳 False"""
+        item_id, _, _ = _parse_name(os.path.basename(claimed))
+        target = self.path("done" if ok else "failed", f"{item_id}.json")
+        try:
+            os.replace(claimed, target)
+        except FileNotFoundError:
+            return False
+        _write_json(target, record)
+        if ok:
+            try:
+                os.remove(self.path("failed", f"{item_id}.json"))  # 先前失敗、重新排入後成功
+            except FileNotFoundError:
+                pass
+        return True
+
+    def release(self, claimed):
+        """節點正常停止：把處理到一半的項目放回 todo (不計入嘗試次數)"""
+        item_id, attempt, _ = _parse_name(os.path.basename(claimed))
+        try:
+            os.rename(claimed, self.path("todo", f"{item_id}.{attempt}.json"))
+        except OSError:
+            pass
+
+    def requeue_failed(self):
+        """將 failed 的項目重新排入 todo，回傳數量"""
+        count = 0
+        for name in self.names("failed"):
+            item_id, _, _ = _parse_name(name)
+            try:
+                os.rename(self.path("failed", name), self.path("todo", f"{item_id}.0.json"))
+                count += 1
+            except OSError:
+                pass
+        return count
+
+    def reap(self):
+        """回收心跳停止超過 lease 秒的項目，回傳回收的項目 id"""
+        now = time.monotonic()
+        reaped, present = [], set()
+        for name in self.names("claimed"):
+            path = self.path("claimed", name)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            present.add(name)
+            prev = self.seen.get(name)
+            if prev is None or prev[0] != mtime:
+                self.seen[name] = (mtime, now)
+                continue
+            if now - prev[1] < self.lease:
+                continue
+            item_id, attempt, _ = _parse_name(name)
+            if attempt + 1 >= MAX_ATTEMPTS:
+                target = self.path("failed", f"{item_id}.json")
+            else:
+                target = self.path("todo", f"{item_id}.{attempt + 1}.json")
+            try:
+                os.rename(path, target)  # 多個回收者同時發現時只有一個會成功
+            except OSError:
+                continue
+            reaped.append(item_id)
+        for name in list(self.seen):
+            if name not in present:
+                del self.seen[name]
+        return reaped
+
+    def status(self):
+        """彙整佇列進度 (只列出資料夾，不讀取各項目內容)"""
+        job = self.job()
+        if job is None:
+            return None
+        sizes = job["items"]
+        counts = {sub: [_parse_name(n)[0] for n in self.names(sub)] for sub in ("todo", "claimed", "done", "failed")}
+        nodes = []
+        for name in self.names("nodes"):
+            try:
+                nodes.append(_read_json(self.path("nodes", name)))
+            except (OSError, ValueError):
+                continue
+        done_pages = sum(sizes.get(i, 0) for i in counts["done"])
+        failed_pages = sum(sizes.get(i, 0) for i in counts["failed"])
+        return {"items": len(sizes), "pages": job["pages"], "done_pages": done_pages, "failed_pages": failed_pages,
+                **{sub: len(ids) for sub, ids in counts.items()},
+                "finished": not counts["todo"] and not counts["claimed"], "nodes": nodes}
+
+
+class QueueNode:
+    """工作節點：持續領取項目並轉檔，直到佇列沒有待處理與處理中的項目；stop_event 設定後放回目前項目並停止"""
+
+    def __init__(self, root, node_settings, lease=LEASE_SECONDS, poll_interval=2.0,
+                 on_event=None, ask_password=None, stop_event=None):
+        self.queue = WorkQueue(root, lease)
+        self.node_settings = node_settings
+        self.poll_interval = poll_interval
+        self.on_event = on_event or (lambda kind, data: None)
+        self.ask_password = ask_password
+        self.stop_event = stop_event or threading.Event()
+        self.name = node_name()
+        self.stats = {"node": self.name, "host": socket.gethostname(), "pid": os.getpid(),
+                      "item": None, "items": 0, "pages": 0, "failed": 0, "started": time.time()}
+
+    def log(self, msg):
+        self.on_event("log", msg)
+
+    def settings(self, job):
+        """轉檔設定以 job.json 為準，資源相關的設定沿用本節點的命令列參數"""
+        overrides = {k: self.node_settings[k] for k in NODE_SETTINGS}
+        return make_settings(**dict(job["settings"], **overrides))
+
+    def serve(self):
+        job = None
+        while job is None:
+            job = self.queue.job()
+            if job is None:
+                if self.stop_event.wait(self.poll_interval):
+                    return
+        settings = self.settings(job)
+        pool = None
+        if needs_pool(settings):
+            pool = RenderPool(settings["workers"])
+            pool.warm()
+        self.log(f"🛰️ 節點 {self.name} 開始領取工作：{self.queue.root}")
+        try:
+            while not self.stop_event.is_set():
+                for item_id in self.queue.reap():
+                    self.log(f"♻️ 回收失聯節點的項目：{item_id}")
+                claimed = self.queue.claim(self.name)
+                if claimed is not None:
+                    self.process(*claimed, settings, pool)
+                    continue
+                if not self.queue.names("claimed"):
+                    break  # 沒有待處理也沒有處理中的項目：整個工作已結束
+                self._report_node()
+                self.stop_event.wait(self.poll_interval)
+        finally:
+            self.stats["item"] = None
+            self._report_node()
+            if pool is not None:
+                pool.shutdown()
+        self.log(f"🏁 節點 {self.name} 結束：完成 {self.stats['items']} 個項目、{self.stats['pages']} 頁")
+
+    def process(self, item, claimed, settings, pool):
+        """轉換一個項目；處理期間以背景執行緒送出心跳，租約遺失即取消"""
+        path = item["path"]
+        out_dir = output_dir(path, settings)
+        ext = extension(settings["fmt"])
+        plan = {path: {p: os.path.join(out_dir, f"page_{p}.{ext}") for p in item["pages"]}}
+        item_stop = threading.Event()
+        lost = threading.Event()
+        done = threading.Event()
+        self.stats["item"] = item["id"]
+        self._report_node()
+
+        def beat():
+            while not done.wait(min(10.0, self.queue.lease / 4)):
+                if self.stop_event.is_set():
+                    item_stop.set()
+                elif not self.queue.heartbeat(claimed):
+                    lost.set()
+                    item_stop.set()
+                    return
+                self._report_node()
+
+        beater = threading.Thread(target=beat, daemon=True)
+        beater.start()
+        first, last = item["pages"][0], item["pages"][-1]
+        self.log(f"📦 項目 {item['id']}：{os.path.basename(path)} 第 {first}-{last} 頁")
+        t0 = time.perf_counter()
+        engine = ConversionEngine(settings, on_event=self._forward, ask_password=self.ask_password,
+                                  stop_event=item_stop, pool=pool)
+        try:
+            status = engine.run([path], plan)
+        except KeyboardInterrupt:
+            self.queue.release(claimed)
+            raise
+        finally:
+            done.set()
+            beater.join()
+        seconds = time.perf_counter() - t0
+
+        if lost.is_set():
+            self.log(f"⚠️ 項目 {item['id']} 已逾時被其他節點回收，放棄本次結果")
+            return
+        if status == "cancelled":
+            self.queue.release(claimed)
+            return
+        result = engine.results.get(path) or {"status": "error", "outputs": [], "error": None}
+        ok = status == "done" and result["status"] == "done"
+        record = dict(item, node=self.name, seconds=round(seconds, 3), finished=time.time(),
+                      outputs=len(result["outputs"]),
+                      error=None if ok else (result["error"] or "無法開啟或無頁面可轉換"))
+        if not self.queue.finish(claimed, ok, record):
+            self.log(f"⚠️ 項目 {item['id']} 已逾時被其他節點回收，放棄本次結果")
+            return
+        if ok:
+            self.stats["items"] += 1
+            self.stats["pages"] += len(item["pages"])
+            self.log(f"✅ 項目 {item['id']} 完成：{len(item['pages'])} 頁，{seconds:.2f} 秒")
+        else:
+            self.stats["failed"] += 1
+            self.log(f"❌ 項目 {item['id']} 失敗：{record['error']}")
+
+    def _forward(self, kind, data):
+        # 逐頁紀錄只在本機顯示；結束事件由 process 彙整後回報
+        if kind in ("log", "error", "report"):
+            self.on_event(kind, data)
+
+    def _report_node(self):
+        try:
+            _write_json(self.queue.path("nodes", f"{self.name}.json"), dict(self.stats, updated=time.time()))
+        except OSError:
+            pass
+
+
+def coordinate(root, lease=LEASE_SECONDS, interval=5.0, on_status=None, stop_event=None):
+    """協調者：定期回收失聯節點的項目並送出整體進度，直到所有項目完成或失敗；回傳最後一次的進度"""
+    queue = WorkQueue(root, lease)
+    stop_event = stop_event or threading.Event()
+    on_status = on_status or (lambda status: None)
+    while True:
+        reaped = queue.reap()
+        status = queue.status()
+        if status is not None:
+            status["reaped"] = reaped
+            on_status(status)
+            if status["finished"]:
+                return status
+        if stop_event.wait(interval):
+            return status
@@ -0,0 +1,68 @@
+"""輸出格式與編碼設定檔 (encoder profile)
+
+PNG 的 zlib 壓縮常是每頁最耗時的步驟；設定檔讓使用者在 CPU 時間與檔案大小間取捨：
+fast 以較低壓縮率換取速度，balanced 為 Pillow 預設值 (與舊版輸出相同)，smallest 追求最小檔案。
+"""
+
+# 介面上可選的輸出格式
+OUTPUT_FORMATS = ["PNG", "JPG", "WEBP", "TIFF"]
+
+# 格式名稱 (含別名) -> Pillow 格式名稱
+PIL_FORMATS = {"PNG": "PNG", "JPG": "JPEG", "JPEG": "JPEG", "WEBP": "WEBP", "TIFF": "TIFF", "TIF": "TIFF"}
+
+# 輸出檔副檔名 (未列出者使用格式名稱小寫)
+EXTENSIONS = {"TIFF": "tif"}
+
+ENCODER_PROFILES = ["fast", "balanced", "smallest"]
+DEFAULT_PROFILE = "balanced"
+
+# Pillow 格式 -> 設定檔 -> save() 參數
+PROFILE_OPTIONS = {
+    "PNG": {
+        "fast": {"compress_level": 1},
+        "balanced": {"compress_level": 6},
+        "smallest": {"compress_level": 9, "optimize": True},
+    },
+    "JPEG": {  # JPEG 編碼本身就快，fast 與 balanced 相同
+        "fast": {"quality": 75},
+        "balanced": {"quality": 75},
+        "smallest": {"quality": 70, "subsampling": "4:2:0", "optimize": True, "progressive": True},
+    },
+    "WEBP": {
+        "fast": {"quality": 80, "method": 0},
+        "balanced": {"quality": 80, "method": 4},
+        "smallest": {"quality": 75, "method": 6},
+    },
+    "TIFF": {
+        "fast": {"compression": "raw"},
+        "balanced": {"compression": "tiff_lzw"},
+        "smallest": {"compression": "tiff_adobe_deflate"},
+    },
+}
+
+
+def pil_format(fmt):
+    """介面格式名稱 (PNG / JPG / WEBP / TIFF) 轉為 Pillow 格式名稱"""
+    return PIL_FORMATS[fmt.upper()]
+
+
+def extension(fmt):
+    fmt = fmt.upper()
+    return EXTENSIONS.get(fmt, fmt.lower())
+
+
+def save_options(fmt, profile=DEFAULT_PROFILE, mode=None):
+    """取得指定格式與設定檔的 save() 參數 (回傳新的 dict，可自由修改)；mode 為要儲存的圖片模式"""
+    options = dict(PROFILE_OPTIONS[pil_format(fmt)][profile])
+    if mode == "1" and pil_format(fmt) == "TIFF":
+        options["compression"] = "group4"  # 1-bit 圖片使用 CCITT Group 4，比 LZW / Deflate 小得多且一樣快
+    return options
+
+
+def supports_rgbx(fmt):
+    """Pillow 可直接以 RGBX 圖片存檔 (略過 X 通道) 的格式
+
+    PNG 不支援 RGBX；TIFF 雖可寫入，但會存成每像素 4 個樣本 (多一個未指定用途的通道)，
+    檔案大約多 1/3 且部分軟體無法正確讀取，兩者都需先以 RGB 渲染。
+    """
+    return pil_format(fmt) in ("JPEG", "WEBP")
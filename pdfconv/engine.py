@@ -0,0 +1,1158 @@
+"""PDF 轉圖片核心引擎 (不依賴 tkinter，可供 GUI / CLI / 排程共用)"""
+import io
+import itertools
+import json
+import math
+import os
+import queue
+import shutil
+import threading
+
+from PIL import Image
+
+from .archives import ARCHIVE_MODES, ArchiveSet
+from .bitmaps import BitmapPool
+from .colormode import COLOR_MODES, page_color_mode
+from .encoders import (DEFAULT_PROFILE, ENCODER_PROFILES, PIL_FORMATS, extension, pil_format, save_options,
+                       supports_rgbx)
+from .manifest import OutputManifest
+from .pagefilter import bitmap_digest, claim, is_blank
+from .pipeline import PagePipeline
+from .profiler import NULL_PROFILER, RunProfiler
+from .scheduler import ShardScheduler, page_cost, page_memory, shard_memory, split_by_cost
+from .sessions import DocumentSessions
+from .sizing import SIZING_KEYS, check_sizing, page_scale
+from .sources import READ_MODES, Prefetcher
+from .supervisor import SupervisedPool, WorkerLost, page_rendered, page_started
+from .tiling import render_tiled_to_file
+from .variants import encode_variant, normalize_variants, variant_filename
+
+# 平行轉檔時，每個子行程單次最多處理的頁數 (分片越小，進度與取消越即時)
+SHARD_MAX_PAGES = 8
+
+# 子行程崩潰時，同一頁最多嘗試的次數 (偶發的崩潰重試即可；逾時與超出記憶體不重試)
+PAGE_ATTEMPTS = 2
+
+OUTPUT_MODES = ["folder", "same"] + list(ARCHIVE_MODES)
+ROTATIONS = [0, 90, 180, 270]
+
+DEFAULT_SETTINGS = {
+    "dpi": 200,
+    "fit_px": 0,        # 最長邊縮放至此像素數，取代固定 DPI (0 = 停用)
+    "max_mp": 0,        # 單頁像素數上限 (百萬像素)，超過時該頁降低 DPI (0 = 不限制)
+    "min_dpi": 0,       # fit_px 算出的 DPI 下限 / 上限 (0 = 不限制)
+    "max_dpi": 0,
+    "start": None,      # 起始頁碼 (None = 第 1 頁)
+    "end": None,        # 結束頁碼 (None = 最末頁)
+    "angle": 0,
+    "fmt": "PNG",       # PNG / JPG / WEBP / TIFF
+    "encoder": DEFAULT_PROFILE,  # 編碼設定檔：fast / balanced / smallest
+    "color": "color",   # 色彩模式：color / gray / mono (1-bit) / auto (逐頁判斷)
+    "variants": [],     # 額外尺寸：[{"suffix", "max_px", "fmt", "encoder"}] 或 "thumb:150:JPG" 字串，由同一次渲染縮小產生
+    "mode": "folder",   # folder: 建立 <檔名>_images 資料夾；same: 輸出至 PDF 同層目錄；
+                        # zip / tiff: 所有頁面寫入同層的 <檔名>_images.zip / 多頁 .tif
+    "workers": 1,
+    "queue_depth": 4,   # 渲染→編碼→寫檔 管線的佇列上限 (0 = 逐頁同步處理)
+    "encoders": 2,      # 編碼執行緒數 (每個行程)
+    "open_docs": 32,    # 同時保持開啟的 PDF 數量上限 (LRU)
+    "read": "lazy",     # PDF 讀取方式：lazy (pdfium 依需要讀取) / mmap / prefetch (背景整檔預讀)，見 pdfconv.sources
+    "incremental": False,  # 依輸出資料夾的 manifest 略過已轉換且未變更的頁面
+    "max_page_mb": 0,   # 單頁點陣圖超過此大小 (MB) 時改為分帶渲染 (0 = 停用)
+    "skip_blank": False,  # 略過空白頁 (低解析度試渲染判斷)
+    "dedup": False,     # 內容相同的頁面只編碼一次，其餘以硬連結 (ZIP 模式為 duplicates.json) 取代
+    "memory_budget_mb": 0,  # 平行轉檔時同時渲染中的點陣圖估計總量上限 (MB，0 = 不限制)
+    "page_timeout": 0,  # 單頁渲染時間上限 (秒)，超過即結束該子行程並隔離此頁 (0 = 不限制)
+    "page_memory_mb": 0,  # 渲染子行程的記憶體上限 (MB)，超過即結束該子行程並隔離此頁 (0 = 不限制)
+    "quarantine_report": None,  # 隔離頁面報告 JSON 輸出路徑 (無法轉換的頁面與原因)
+    "profile": False,   # 記錄各階段耗時，結束時送出 report 事件
+    "profile_report": None,  # 執行報告 JSON 輸出路徑 (設定時自動啟用 profile)
+}
+
+
+def make_settings(**overrides):
+    """以預設值為基礎建立設定，並檢查參數是否合法"""
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(overrides)
+    settings["fmt"] = settings["fmt"].upper()
+    if settings["mode"] == "tiff":
+        settings["fmt"] = "TIFF"  # 多頁 TIFF 的每一頁都以 TIFF 編碼
+    if settings["dpi"] <= 0:
+        raise ValueError(f"DPI 必須大於 0: {settings['dpi']}")
+    check_sizing(settings)
+    if settings["angle"] not in ROTATIONS:
+        raise ValueError(f"不支援的旋轉角度: {settings['angle']}")
+    if settings["fmt"] not in PIL_FORMATS:
+        raise ValueError(f"不支援的圖片格式: {settings['fmt']}")
+    if settings["encoder"] not in ENCODER_PROFILES:
+        raise ValueError(f"不支援的編碼設定: {settings['encoder']}")
+    settings["color"] = settings["color"].lower()
+    if settings["color"] not in COLOR_MODES:
+        raise ValueError(f"不支援的色彩模式: {settings['color']}")
+    settings["variants"] = normalize_variants(settings["variants"], settings["fmt"], settings["encoder"])
+    if settings["variants"] and settings["mode"] == "tiff":
+        raise ValueError("多頁 TIFF 輸出不支援額外尺寸")
+    if settings["mode"] not in OUTPUT_MODES:
+        raise ValueError(f"不支援的輸出位置: {settings['mode']}")
+    if settings["dedup"] and settings["mode"] == "tiff":
+        raise ValueError("多頁 TIFF 輸出不支援重複頁面合併")
+    if settings["incremental"] and settings["mode"] in ARCHIVE_MODES:
+        raise ValueError("增量轉換不支援 ZIP / 多頁 TIFF 輸出")
+    settings["workers"] = max(1, int(settings["workers"]))
+    settings["queue_depth"] = max(0, int(settings["queue_depth"]))
+    settings["encoders"] = max(1, int(settings["encoders"]))
+    settings["open_docs"] = max(1, int(settings["open_docs"]))
+    if settings["read"] not in READ_MODES:
+        raise ValueError(f"不支援的讀取方式: {settings['read']}")
+    settings["max_page_mb"] = max(0, int(settings["max_page_mb"]))
+    settings["memory_budget_mb"] = max(0, int(settings["memory_budget_mb"]))
+    settings["page_timeout"] = max(0.0, float(settings["page_timeout"] or 0))
+    settings["page_memory_mb"] = max(0, int(settings["page_memory_mb"] or 0))
+    settings["profile"] = bool(settings["profile"] or settings["profile_report"])
+    return settings
+
+
+def needs_pool(settings):
+    """是否交給子行程渲染：多個行程，或設定了單頁時間 / 記憶體上限 (只有受監督的子行程能在渲染途中結束)"""
+    return settings["workers"] > 1 or bool(settings["page_timeout"] or settings["page_memory_mb"])
+
+
+def unique_path(path):
+    """若檔案已存在，於檔名後加上 _1, _2 ... 避免覆蓋"""
+    if not os.path.exists(path): return path
+    base, ext = os.path.splitext(path)
+    i = 1
+    while True:
+        new_p = f"{base}_{i}{ext}"
+        if not os.path.exists(new_p): return new_p
+        i += 1
+
+
+def page_range(settings, p_total):
+    """依設定的起訖頁碼計算實際要轉換的頁碼清單 (1-based)"""
+    s = settings["start"] or 1
+    e = min(settings["end"] or p_total, p_total)
+    return list(range(s, e + 1)) if s <= e else []
+
+
+def output_dir(path, settings):
+    """取得 (並建立) 該 PDF 的輸出資料夾 (封存模式為封存檔所在的資料夾)"""
+    base = os.path.splitext(os.path.basename(path))[0]
+    out_dir = os.path.dirname(path)
+    if settings["mode"] == "folder":
+        out_dir = os.path.join(out_dir, base + "_images")
+        os.makedirs(out_dir, exist_ok=True)
+    return out_dir
+
+
+# 同一行程內共用的渲染緩衝區池 (各子行程各自一份)
+_bitmaps = BitmapPool(limit=2)
+
+
+def render_page(pdf, p_num, settings, prof=NULL_PROFILER, path=None, color=None):
+    """渲染單一頁面，回傳 (PIL 圖片, 緩衝區)
+
+    旋轉直接交給 pdfium 處理 (PIL 的 rotate 為逆時針，pdfium 為順時針)，並直接輸出最終通道格式：
+    JPEG / WebP 使用 RGBX，PIL 圖片直接共用渲染緩衝區 (零複製)；PNG 與 TIFF 改以 RGB 輸出
+    (見 supports_rgbx)，由 PIL 複製一次後立即歸還緩衝區。
+    灰階頁面 (color 為 gray / mono) 以 pdfium 灰階模式渲染為 L (零複製)，mono 再轉為 1-bit。
+    回傳的緩衝區不為 None 時，須於圖片編碼完成後以 release_buffer() 歸還。
+
+    pdfium 旋轉的結果與先渲染再以 PIL 旋轉並非逐像素相同：內容有次像素的位移，反鋸齒邊緣因此不同。
+    依頁面內容約 2~40% 的像素不同，個別像素可差到約 200 個色階，整體平均約差 1 個色階；尺寸與方向則完全一致。
+    """
+    color = color or page_color_mode(pdf, p_num, settings, prof, path)
+    gray = color != "color"
+    zero_copy = gray or supports_rgbx(settings["fmt"])
+    with prof.stage("render", path, p_num):
+        page = pdf[p_num - 1]
+        bitmap = page.render(scale=page_scale(page.get_size(), settings), rotation=(360 - settings["angle"]) % 360,
+                             grayscale=gray, rev_byteorder=True, prefer_bgrx=zero_copy and not gray,
+                             bitmap_maker=_bitmaps.maker)
+    with prof.stage("to_pil", path, p_num):
+        pil_image = bitmap.to_pil()
+        if color == "mono":
+            pil_image = pil_image.convert("1", dither=Image.Dither.NONE)
+            zero_copy = False
+    page_rendered()  # 單頁逾時只計算渲染，編碼與寫檔不計入
+    buffer = bitmap.buffer
+
+    bitmap.close()
+    page.close()
+
+    if not zero_copy:
+        _bitmaps.release(buffer)
+        buffer = None
+    return pil_image, buffer
+
+
+def release_buffer(buffer):
+    _bitmaps.release(buffer)
+
+
+def save_format(settings):
+    return pil_format(settings["fmt"])
+
+
+def encoder_options(settings, mode=None):
+    """依編碼設定檔取得 save() 參數；mode 為圖片模式 (1-bit 圖片有專用的壓縮方式)"""
+    return save_options(settings["fmt"], settings["encoder"], mode)
+
+
+def save_image(image, fp, settings):
+    image.save(fp, save_format(settings), **encoder_options(settings, image.mode))
+
+
+def page_path(out_dir, p_num, settings, target=None, prof=NULL_PROFILER, path=None):
+    """輸出路徑：增量模式下覆寫舊輸出時使用 target，否則以頁碼命名並避免覆蓋"""
+    if target:
+        # 舊輸出可能是重複頁面的硬連結：先移除再重新寫入，避免連帶改寫其他頁面
+        stem = os.path.splitext(target)[0]
+        for old in [target] + [variant_filename(stem, v) for v in settings["variants"]]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+        return target
+    fname = f"page_{p_num}.{extension(settings['fmt'])}"
+    with prof.stage("unique_path", path, p_num):
+        return unique_path(os.path.join(out_dir, fname))
+
+
+def needs_tiling(pdf, p_num, settings, color="color"):
+    """整頁點陣圖是否超過 max_page_mb 記憶體預算 (灰階頁面每像素 1 位元組)"""
+    if not settings["max_page_mb"]:
+        return False
+    width, height = pdf.get_page_size(p_num - 1)
+    scale = page_scale((width, height), settings)
+    channels = 4 if color == "color" else 1
+    return math.ceil(width * scale) * math.ceil(height * scale) * channels > settings["max_page_mb"] << 20
+
+
+def render_tiled_page_to_file(pdf, p_num, out_dir, settings, target=None, prof=NULL_PROFILER, path=None,
+                              color="color"):
+    """分帶渲染超大頁面並直接寫檔，回傳輸出路徑；out_dir 為 None 時改為回傳編碼後的 bytes (封存模式)
+
+    分帶渲染不支援 1-bit，mono 頁面以灰階輸出。
+    """
+    dest = io.BytesIO() if out_dir is None else page_path(out_dir, p_num, settings, target, prof, path)
+    with prof.stage("render_tiled", path, p_num) as st:
+        page = pdf[p_num - 1]
+        try:
+            render_tiled_to_file(page, dest, page_scale(page.get_size(), settings), (360 - settings["angle"]) % 360,
+                                 save_format(settings), settings["max_page_mb"] << 20, encoder_options(settings),
+                                 grayscale=color != "color")
+        finally:
+            page.close()
+        if out_dir is None:
+            st.bytes = dest.tell()
+            return dest.getbuffer()
+        st.bytes = os.path.getsize(dest)
+    return dest
+
+
+def render_page_to_file(pdf, p_num, out_dir, settings, target=None, prof=NULL_PROFILER, path=None, color=None):
+    """渲染單一頁面並存檔，回傳輸出路徑 (同步模式下編碼與寫檔合併記為 save 階段)"""
+    pil_image, buffer = render_page(pdf, p_num, settings, prof, path, color)
+    save_path = page_path(out_dir, p_num, settings, target, prof, path)
+    try:
+        with prof.stage("save", path, p_num) as st:
+            save_image(pil_image, save_path, settings)
+            if prof.enabled: st.bytes = os.path.getsize(save_path)
+        variants = encode_variants(pil_image, settings, prof, path, p_num)
+    finally:
+        del pil_image
+        release_buffer(buffer)
+    write_variants(save_path, variants, prof, path, p_num)
+    return save_path
+
+
+def encode_variants(image, settings, prof=NULL_PROFILER, path=None, p_num=None):
+    """由主點陣圖縮小產生各額外尺寸，回傳 [(尺寸設定, bytes)]"""
+    result = []
+    for variant in settings["variants"]:
+        with prof.stage("variant", path, p_num) as st:
+            data = encode_variant(image, variant)
+            st.bytes = len(data)
+        result.append((variant, data))
+    return result
+
+
+def render_variants_direct(pdf, p_num, settings, prof=NULL_PROFILER, path=None, color="color"):
+    """分帶渲染的頁面沒有整頁點陣圖，額外尺寸改以各自的小解析度直接渲染"""
+    if not settings["variants"]:
+        return []
+    width, height = pdf.get_page_size(p_num - 1)
+    result = []
+    for variant in settings["variants"]:
+        scale = min(page_scale((width, height), settings), variant["max_px"] / max(width, height))
+        with prof.stage("variant", path, p_num) as st:
+            page = pdf[p_num - 1]
+            try:
+                bitmap = page.render(scale=scale, rotation=(360 - settings["angle"]) % 360,
+                                     grayscale=color != "color", rev_byteorder=True)
+                data = encode_variant(bitmap.to_pil(), variant)
+                bitmap.close()
+            finally:
+                page.close()
+            st.bytes = len(data)
+        result.append((variant, data))
+    return result
+
+
+def write_variants(save_path, variants, prof=NULL_PROFILER, path=None, p_num=None):
+    """額外尺寸寫在主輸出檔旁 (page_3.png -> page_3_thumb.jpg)，與主輸出檔一一對應故直接覆寫"""
+    stem = os.path.splitext(save_path)[0]
+    for variant, data in variants or ():
+        with prof.stage("write", path, p_num) as st:
+            with open(variant_filename(stem, variant), "wb") as f:
+                f.write(data)
+            st.bytes = len(data)
+
+
+def link_output(source, save_path, variants=()):
+    """重複頁面：以硬連結 (檔案系統不支援時改為複製) 建立輸出，額外尺寸一併處理"""
+    src_stem, dst_stem = os.path.splitext(source)[0], os.path.splitext(save_path)[0]
+    pairs = [(source, save_path)] + [(variant_filename(src_stem, v), variant_filename(dst_stem, v)) for v in variants]
+    for src, dst in pairs:
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
+    return save_path
+
+
+def encode_page(image, buffer, settings, prof=NULL_PROFILER, path=None, p_num=None):
+    """將渲染結果編碼為 bytes，並歸還渲染緩衝區"""
+    buf = io.BytesIO()
+    try:
+        with prof.stage("encode", path, p_num) as st:
+            save_image(image, buf, settings)
+            st.bytes = buf.tell()
+    finally:
+        del image
+        release_buffer(buffer)
+    return buf.getbuffer()
+
+
+def archive_name(p_num, settings):
+    """頁面在封存檔中的名稱"""
+    return f"page_{p_num}.{extension(settings['fmt'])}"
+
+
+def make_stages(settings, prof=NULL_PROFILER, sink=None):
+    """建立管線的 encode(item) / write(item, data) 兩段處理 (封存模式的同步處理也直接呼叫)
+
+    sink(task, p_num, data, variant=None) 不為 None 時 (封存模式)，編碼結果交給 sink 寫入而非個別存檔。
+    """
+    def encode(item):
+        if "skip" in item:
+            return None  # 空白或重複頁面，只經由管線回報
+        if "data" in item:
+            return item.pop("data")  # 分帶渲染時已編碼完成 (封存模式)
+        if "image" not in item:
+            return None  # 已由渲染端直接寫檔 (分帶渲染)
+        try:
+            item["variants"] = encode_variants(item["image"], settings, prof, item["path"], item["p_num"])
+        except Exception:
+            release_buffer(item.pop("buffer"))  # encode_page 不會執行，緩衝區在此歸還
+            raise
+        return encode_page(item.pop("image"), item.pop("buffer"), settings, prof, item["path"], item["p_num"])
+
+    def write(item, data):
+        if "skip" in item:
+            return None
+        if data is None:
+            write_variants(item["save_path"], item.get("variants"), prof, item["path"], item["p_num"])
+            return item["save_path"]
+        if sink is not None:
+            # 額外尺寸先寫入，主頁面寫入即代表整頁完成
+            for variant, variant_data in item.get("variants", ()):
+                sink(item["task"], item["p_num"], variant_data, variant)
+            return sink(item["task"], item["p_num"], data)
+        save_path = page_path(item["out_dir"], item["p_num"], settings, item["target"], prof, item["path"])
+        with prof.stage("write", item["path"], item["p_num"]) as st:
+            with open(save_path, "wb") as f:
+                f.write(data)
+            st.bytes = len(data)
+        write_variants(save_path, item.get("variants"), prof, item["path"], item["p_num"])
+        return save_path
+
+    return encode, write
+
+
+def make_pipeline(settings, on_page, on_error, prof=NULL_PROFILER, sink=None, on_skip=None):
+    """queue_depth > 0 時建立三段式管線，否則回傳 None (逐頁同步處理)
+
+    on_page(path, p_num, save_path) / on_error(path, exc, p_num) / on_skip(path, p_num, reason, original)
+    於寫檔執行緒中呼叫。
+    """
+    if settings["queue_depth"] <= 0:
+        return None
+
+    def on_written(item, save_path):
+        if "skip" in item:
+            on_skip(item["path"], item["p_num"], *item["skip"])
+        else:
+            on_page(item["path"], item["p_num"], save_path)
+
+    encode, write = make_stages(settings, prof, sink)
+    return PagePipeline(encode, write, on_written=on_written,
+                        on_error=lambda item, e: on_error(item["path"], e, item["p_num"]),
+                        encoders=settings["encoders"], depth=settings["queue_depth"])
+
+
+def skip_page(pipeline, on_skip, path, p_num, reason, original=None):
+    """回報不需輸出的頁面 (blank / duplicate)；有管線時經由管線，與 on_page 在同一個執行緒中回呼"""
+    if pipeline is not None:
+        pipeline.submit({"path": path, "p_num": p_num, "skip": (reason, original)})
+    else:
+        on_skip(path, p_num, reason, original)
+
+
+def render_unique(pdf, task, p_num, settings, pipeline, on_skip, prof=NULL_PROFILER, color=None):
+    """渲染一頁；啟用重複頁面合併且內容已出現過時回報 duplicate 並回傳 None"""
+    path = task["path"]
+    image, buffer = render_page(pdf, p_num, settings, prof, path, color)
+    if task.get("dedup") is None:
+        return image, buffer
+    original = claim(task["dedup"], bitmap_digest(image, buffer, prof, path, p_num), path, p_num)
+    if original is None:
+        return image, buffer
+    del image
+    release_buffer(buffer)
+    skip_page(pipeline, on_skip, path, p_num, "duplicate", original)
+    return None
+
+
+def convert_page(pdf, task, p_num, settings, pipeline, on_page, prof=NULL_PROFILER, sink=None, on_skip=None):
+    """轉換一頁：有管線時送入管線 (完成後由管線回呼 on_page)，否則直接存檔
+
+    封存模式 (sink 不為 None) 下頁面編碼後交給 sink 附加到封存檔，不建立單頁檔案。
+    空白頁 (skip_blank) 與重複頁面 (task["dedup"] 為雜湊索引時) 改以 on_skip 回報。
+    """
+    target = task.get("targets", {}).get(p_num)
+    path = task["path"]
+    if settings["skip_blank"] and is_blank(pdf, p_num, prof, path):
+        skip_page(pipeline, on_skip, path, p_num, "blank")
+        return
+    color = page_color_mode(pdf, p_num, settings, prof, path)
+    # 分帶渲染的超大頁面不做重複比對 (不會有整頁點陣圖)
+    tiled = needs_tiling(pdf, p_num, settings, color)
+    if sink is not None:
+        if tiled:
+            item = {"data": render_tiled_page_to_file(pdf, p_num, None, settings, prof=prof, path=path, color=color),
+                    "variants": render_variants_direct(pdf, p_num, settings, prof, path, color)}
+            page_rendered()
+        else:
+            rendered = render_unique(pdf, task, p_num, settings, pipeline, on_skip, prof, color)
+            if rendered is None:
+                return
+            item = {"image": rendered[0], "buffer": rendered[1]}
+        item.update(path=path, p_num=p_num, task=task)
+        if pipeline is not None:
+            pipeline.submit(item)
+            return
+        encode, write = make_stages(settings, prof, sink)
+        on_page(path, p_num, write(item, encode(item)))
+        return
+    if tiled:
+        save_path = render_tiled_page_to_file(pdf, p_num, task["out_dir"], settings, target, prof, path, color)
+        variants = render_variants_direct(pdf, p_num, settings, prof, path, color)
+        page_rendered()  # 分帶渲染邊渲染邊編碼，整頁一起計時
+        if pipeline is None:
+            write_variants(save_path, variants, prof, path, p_num)
+            on_page(task["path"], p_num, save_path)
+        else:
+            # 經由管線回報完成，確保 on_page 一律在同一個執行緒中呼叫
+            pipeline.submit({"path": task["path"], "p_num": p_num, "save_path": save_path, "variants": variants})
+        return
+    if pipeline is None and task.get("dedup") is None:
+        on_page(path, p_num, render_page_to_file(pdf, p_num, task["out_dir"], settings, target, prof, path, color))
+        return
+    rendered = render_unique(pdf, task, p_num, settings, pipeline, on_skip, prof, color)
+    if rendered is None:
+        return
+    item = {"path": task["path"], "out_dir": task["out_dir"], "p_num": p_num,
+            "target": target, "image": rendered[0], "buffer": rendered[1]}
+    if pipeline is not None:
+        pipeline.submit(item)
+        return
+    encode, write = make_stages(settings, prof)
+    on_page(path, p_num, write(item, encode(item)))
+
+
+def split_shards(task, costs, target):
+    """將任務依估計成本切成分片，讓各子行程能平均分攤工作"""
+    targets = task.get("targets", {})
+    shards = []
+    for pages, cost in split_by_cost(task["pages"], costs, target, SHARD_MAX_PAGES):
+        shards.append({"path": task["path"], "pw": task["pw"], "out_dir": task["out_dir"], "pages": pages,
+                       "targets": {p: targets[p] for p in pages if p in targets}, "cost": cost})
+    return shards
+
+
+# ================== ⚙️ 子行程渲染 ==================
+# 以下函式執行於 RenderPool 受監督的子行程中，每個子行程各自開啟 PdfDocument
+_proc_state = {"cancel": None, "events": None, "sessions": None, "generation": None}
+
+# 子行程內同時保持開啟的文件數；分片依檔案順序派送，少量即可涵蓋交錯的檔案
+PROC_OPEN_DOCS = 4
+
+
+def _pool_init(cancel_event, event_queue):
+    _proc_state["cancel"] = cancel_event
+    _proc_state["events"] = event_queue
+    _proc_state["sessions"] = DocumentSessions(PROC_OPEN_DOCS)
+
+
+def _render_shard(shard):
+    events = _proc_state["events"]
+
+    def put(kind, data):
+        # 附上批次代號：常駐行程池中，前一批取消後遲到的訊息由主行程丟棄
+        events.put((kind, data, shard["generation"]))
+
+    if _proc_state["generation"] != shard["generation"]:
+        # 常駐的行程池跨批次沿用；新的一批開始時關閉舊文件，來源檔可能已被替換
+        _proc_state["sessions"].close_all()
+        _proc_state["sessions"] = DocumentSessions(PROC_OPEN_DOCS)
+        _proc_state["generation"] = shard["generation"]
+    sessions = _proc_state["sessions"]
+    sessions.read = shard["settings"]["read"]  # 子行程沒有背景預讀，prefetch 時於開啟時整檔讀入
+    # 子行程各自量測，分片結束後一次送回主行程合併
+    prof = RunProfiler() if shard["settings"]["profile"] else NULL_PROFILER
+    sessions.prof = prof
+
+    def on_page(path, p_num, save_path):
+        if save_path is not None:  # 封存模式由主行程寫入後才算完成 (見 sink)
+            put("page_done", (path, p_num, save_path))
+
+    def sink(task, p_num, data, variant=None):
+        # 封存檔只能由主行程寫入，編碼好的頁面送回主行程附加
+        put("page_data", (task["path"], p_num, bytes(data), variant))
+
+    def on_error(path, e, p_num=None):
+        # p_num 為 None 表示整個檔案無法處理 (例如無法開啟)，否則只有該頁失敗，其餘頁面繼續
+        put("page_error", (path, str(e), p_num))
+
+    def on_skip(path, p_num, reason, original=None):
+        put("page_skipped", (path, p_num, reason, original))
+
+    archive = shard["settings"]["mode"] in ARCHIVE_MODES
+    pipeline = make_pipeline(shard["settings"], on_page, on_error, prof, sink if archive else None, on_skip)
+    try:
+        pdf = sessions.open(shard["path"], shard["pw"])
+        for p_num in shard["pages"]:
+            if _proc_state["cancel"].is_set():
+                if pipeline: pipeline.abort(); pipeline = None
+                return
+            page_started(p_num)  # 逾時由此起算；子行程若就此結束，主行程據此判定是哪一頁
+            try:
+                convert_page(pdf, shard, p_num, shard["settings"], pipeline, on_page, prof,
+                             sink if archive else None, on_skip)
+            except Exception as e:
+                on_error(shard["path"], e, p_num)
+    except Exception as e:
+        on_error(shard["path"], e)
+    finally:
+        if pipeline: pipeline.close()
+        if prof.enabled: put("profile", prof.take())
+        # 行程池常駐時子行程不會結束，以此訊息確認本分片的事件都已送達
+        put("shard_done", shard["id"])
+
+
+class RenderPool(SupervisedPool):
+    """轉檔子行程池
+
+    一般轉檔每批建立一個，結束即關閉；常駐服務 (資料夾監看) 則建立一次並預熱，
+    之後每批沿用，省去啟動行程與載入 pdfium 的時間。
+    子行程受監督：單頁逾時、超出記憶體上限或崩潰時只結束該子行程並自動重啟 (見 supervisor)。
+    """
+
+    def __init__(self, workers):
+        super().__init__(workers, _render_shard, _pool_init)
+        self.generation = 0
+        self.manager = None
+
+    def begin(self):
+        """開始新的一批：清除取消旗標與上一批殘留的訊息，回傳本批代號"""
+        self.cancel_event.clear()
+        while True:
+            try: self.events.get_nowait()
+            except queue.Empty: break
+        self.generation += 1
+        return self.generation
+
+    def shared_dict(self):
+        """各子行程共用的 dict (重複頁面索引)；第一次使用時才啟動 multiprocessing 管理行程"""
+        if self.manager is None:
+            self.manager = self.ctx.Manager()
+        return self.manager.dict()
+
+    def submit(self, shard):
+        settings = shard["settings"]
+        return super().submit(shard, timeout=settings["page_timeout"], memory_mb=settings["page_memory_mb"])
+
+    def shutdown(self):
+        super().shutdown()
+        if self.manager is not None:
+            self.manager.shutdown()
+            self.manager = None
+
+
+# ================== 🚀 轉檔引擎 ==================
+class ConversionEngine:
+    """批次轉檔引擎
+
+    進度以 on_event(kind, data) 回報，kind 與 GUI 佇列訊息一致：
+    log / set_max / progress / file_done / report / done / cancelled / error。
+    ask_password(path) 於遇到加密檔案時呼叫，回傳密碼或 None (略過此檔)。
+    啟用 profile 時，結束前會送出 report 事件 (各階段耗時統計)；
+    hooks 為自訂量測物件，見 pdfconv.profiler。
+    """
+
+    def __init__(self, settings, on_event=None, ask_password=None, stop_event=None, hooks=None, pool=None,
+                 archives=None):
+        self.settings = settings
+        self.on_event = on_event or (lambda kind, data: None)
+        self.ask_password = ask_password or (lambda path: None)
+        self.stop_event = stop_event or threading.Event()
+        self.profiler = RunProfiler(hooks) if settings["profile"] or hooks else NULL_PROFILER
+        self.prefetcher = Prefetcher(self.profiler) if settings["read"] == "prefetch" else None
+        self.sessions = DocumentSessions(settings["open_docs"], self.profiler, settings["read"], self.prefetcher)
+        self.manifests = {}  # 輸出資料夾 -> OutputManifest (增量模式)
+        # 封存模式的輸出；可傳入自訂物件 (介面同 ArchiveSet，例如 HTTP 串流)
+        self.archives = archives or (ArchiveSet(settings["mode"]) if settings["mode"] in ARCHIVE_MODES else None)
+        self.pool = pool     # 外部提供的常駐 RenderPool (None 則每批自行建立)
+        self.results = {}    # 來源路徑 -> {"status": done / error / skipped / cancelled, "outputs", "error"}
+        self.state = None
+        self.plan = {}
+
+    def emit(self, kind, data=None):
+        self.on_event(kind, data)
+
+    def log(self, msg):
+        self.emit("log", msg)
+
+    def run(self, files, plan=None):
+        """執行整批轉檔，回傳結束狀態 ("done" / "cancelled" / "error")
+
+        分析與渲染同時進行：第一個檔案分析完即開始轉檔，set_max 隨分析進度遞增。
+        plan 可指定個別檔案要轉換的頁面與輸出路徑 {路徑: {頁碼: 輸出路徑}} (取代起訖頁碼，
+        既有的輸出直接覆寫)，供分散式工作項目使用。
+        files 可以是串列或產生器 (例如 iter_inputs 邊探索邊產出)。
+        """
+        self.plan = plan or {}
+        try:
+            self.state = {"current": 0, "total": 0, "failed": set(), "remaining": {}, "tasks": {},
+                          "blank": 0, "duplicates": 0,
+                          # 重複頁面合併：雜湊索引、已寫出的頁面 -> 輸出路徑、等待原始頁面寫出的重複頁面
+                          "dedup": {} if self.settings["dedup"] else None, "written": {}, "waiting": {},
+                          # 已處理完的 (路徑, 頁碼)、子行程中斷時各頁的嘗試次數、無法轉換的頁面
+                          "handled": set(), "attempts": {}, "quarantine": []}
+            single = isinstance(files, (list, tuple)) and len(files) == 1
+            if self.prefetcher:
+                files = self.prefetcher.ahead(files)
+            tasks = self.iter_tasks(files)
+            first = next(tasks, None)
+            if first is not None:
+                tasks = itertools.chain([first], tasks)
+                # 有外部行程池時一律交給子行程渲染 (同一行程可能有其他引擎同時執行)；
+                # 設定了單頁時間 / 記憶體上限時也是，只有受監督的子行程能在渲染途中結束
+                limited = self.settings["page_timeout"] or self.settings["page_memory_mb"]
+                if self.pool is not None or limited or (self.settings["workers"] > 1 and
+                                                        (not single or len(first["pages"]) > 1)):
+                    self._render_parallel(tasks)
+                else:
+                    self._render_serial(tasks)
+
+            if self.state["blank"] or self.state["duplicates"]:
+                self.log(f"✂️ 略過 {self.state['blank']} 頁空白頁，{self.state['duplicates']} 頁重複頁面以連結取代")
+            if self.state["total"] == 0:
+                if self.settings["incremental"] and self.manifests:
+                    self.log("♻️ 所有頁面皆已轉換，無需重新處理")
+                    return self._finish("done")
+                return self._finish("error", "無頁面可轉換")
+            return self._finish("done")
+
+        except InterruptedError:
+            return self._finish("cancelled")
+        except Exception as e:
+            return self._finish("error", str(e))
+
+    def failed_files(self):
+        """本批有頁面未能轉換的來源檔 (整個檔案失敗或有頁面被隔離)"""
+        return [path for path, result in self.results.items() if result["status"] == "error"]
+
+    def _finish(self, status, data=None):
+        """收尾 (關閉文件、儲存 manifest、執行報告) 後送出結束事件"""
+        self.sessions.close_all()
+        if self.prefetcher:
+            self.prefetcher.close()
+        if self.state and status == "done":
+            for original, dups in self.state["waiting"].items():
+                for path, p_num in dups:  # 原始頁面轉換失敗，重複頁面無從連結
+                    self._page_failed(path, RuntimeError(
+                        f"第 {p_num} 頁與 {os.path.basename(original[0])} 第 {original[1]} 頁相同，但該頁轉換失敗"),
+                        p_num)
+        if self.state:
+            self._quarantine_report()
+        for manifest in self.manifests.values():
+            manifest.save()
+        if self.archives:
+            self.archives.close_all()
+        for result in self.results.values():
+            if result["status"] == "pending":
+                result["status"] = "cancelled" if status == "cancelled" else "error"
+        if self.profiler.enabled:
+            self._report()
+        self.emit(status, data)
+        return status
+
+    def iter_tasks(self, files):
+        """逐一分析檔案並產出 (檔案, 頁碼) 任務，邊分析邊交給渲染
+
+        無法直接開啟的檔案 (通常是加密檔) 延後到其他檔案都分析完才詢問密碼，
+        等待輸入密碼時不會拖住其餘檔案。每產出一個任務即更新總頁數 (set_max)。
+        """
+        deferred, skipped = [], 0
+        for f in files:
+            task = self._analyze_file(f, ask=False)
+            if task is None:
+                deferred.append(f)
+                continue
+            skipped += self._skip_converted(task)
+            if self._add_task(task):
+                yield task
+        if deferred:
+            self.log(f"🔒 {len(deferred)} 個檔案需要密碼，最後處理")
+        for f in deferred:
+            task = self._analyze_file(f, ask=True)
+            skipped += self._skip_converted(task)
+            if self._add_task(task):
+                yield task
+        if skipped:
+            self.log(f"♻️ 增量模式：略過 {skipped} 頁已轉換的頁面")
+        if self.state["total"]:
+            self.log(f"📊 分析完成：共 {self.state['total']} 頁待處理")
+
+    def _analyze_file(self, f, ask):
+        """讀取頁數並建立任務；ask=False 時無法開啟即回傳 None (稍後再詢問密碼)"""
+        if self.stop_event.is_set(): raise InterruptedError()
+        with self.profiler.stage("analyze"):  # 不歸屬檔案，避免與其中的 open 階段重複計入
+            info = self.get_pdf_info(f, ask)
+        if info is None and not ask:
+            return None
+        pages = page_range(self.settings, info["Pages"]) if info else []
+        targets = self.plan.get(f)
+        if targets is not None and info:
+            pages = [p for p in sorted(targets) if 1 <= p <= info["Pages"]]
+        self.results[f] = {"status": "pending" if pages else "skipped", "outputs": [], "error": None}
+        task = {"path": f, "pages": pages, "pw": info.get("_pw") if info else None, "out_dir": None}
+        if targets is not None:
+            task["targets"] = {p: targets[p] for p in pages}
+        if not pages:
+            return task
+        task["out_dir"] = output_dir(f, self.settings)
+        if self.archives:
+            base = os.path.splitext(os.path.basename(f))[0]
+            task["archive"] = unique_path(os.path.join(
+                task["out_dir"], f"{base}_images.{ARCHIVE_MODES[self.settings['mode']]}"))
+        return task
+
+    def _add_task(self, task):
+        """登記待轉換的任務並更新總頁數；沒有頁面時回傳 False"""
+        if not task["pages"]:
+            return False
+        state = self.state
+        state["tasks"][task["path"]] = task
+        if state["dedup"] is not None:
+            task["dedup"] = state["dedup"]
+        state["remaining"][task["path"]] = len(task["pages"])
+        state["total"] += len(task["pages"])
+        self.emit("set_max", state["total"])
+        return True
+
+    def get_pdf_info(self, path, ask=True):
+        """開啟文件並取得頁數等資訊；開啟的文件會保留在 sessions 中供渲染沿用
+
+        ask=False 時只嘗試不帶密碼開啟，失敗即回傳 None。
+        """
+        pw = None
+        for _ in range(2):
+            try:
+                return self.sessions.info(path, pw)
+            except Exception as e:
+                if not ask:
+                    return None
+                err_str = str(e).lower()
+                if "password" in err_str or "incorrect" in err_str or "crypt" in err_str:
+                    pw = self.ask_password(path)
+                    if not pw: return None
+                else:
+                    if pw is None:
+                        pw = self.ask_password(path)
+                        if not pw: return None
+                    else:
+                        self.log(f"讀取失敗: {os.path.basename(path)} ({e})")
+                        return None
+        return None
+
+    def _skip_converted(self, task):
+        """增量模式：比對 manifest，只保留新增或內容已變更的頁面，回傳略過的頁數"""
+        if not self.settings["incremental"] or not task["pages"]:
+            return 0
+        manifest = self.manifests.get(task["out_dir"])
+        if manifest is None:
+            manifest = self.manifests[task["out_dir"]] = OutputManifest(task["out_dir"])
+        source = os.path.basename(task["path"])
+        task["digest"] = manifest.source_digest(task["path"])
+
+        pages, targets = [], {}
+        for p_num in task["pages"]:
+            if manifest.is_done(task["digest"], p_num, self.settings):
+                continue
+            target = manifest.stale_target(source, p_num, extension(self.settings["fmt"]))
+            if target:
+                targets[p_num] = target
+            pages.append(p_num)
+        removed = manifest.prune(source, task["digest"])
+        if removed:
+            self.log(f"🧹 {source} 內容已變更，刪除 {removed} 個舊內容的輸出 (例如已不存在的頁面)")
+        skipped = len(task["pages"]) - len(pages)
+        task["pages"], task["targets"] = pages, targets
+        if not pages:
+            self.results[task["path"]]["status"] = "done"
+            self.sessions.release(task["path"])
+        return skipped
+
+    def _page_written(self, path, p_num, save_path, label):
+        """一頁寫檔完成：更新進度、manifest，並在整個檔案完成時送出 file_done"""
+        self.log(f"  ➜ {label}第 {p_num} 頁轉換成功")
+        self._page_done(path, p_num, save_path)
+
+    def _page_done(self, path, p_num, save_path):
+        """一頁處理完畢 (save_path 為 None 表示不輸出，例如空白頁)"""
+        state = self.state
+        state["current"] += 1
+        state["handled"].add((path, p_num))
+        self.emit("progress", state["current"])
+
+        task = state["tasks"][path]
+        if save_path is not None:
+            self.results[path]["outputs"].append(save_path)
+            manifest = self.manifests.get(task["out_dir"])
+            if manifest is not None and "digest" in task:
+                manifest.record(task["digest"], p_num, self.settings, os.path.basename(path), save_path)
+            if state["dedup"] is not None:
+                state["written"][(path, p_num)] = save_path
+                for dup in state["waiting"].pop((path, p_num), ()):
+                    self._link_duplicate(*dup, (path, p_num))
+
+        state["remaining"][path] -= 1
+        if state["remaining"][path] == 0:
+            manifest = self.manifests.get(task["out_dir"])
+            if manifest is not None:
+                manifest.save()
+            if self.archives:
+                self.archives.finish(path)
+                if self.results[path]["outputs"]:  # 全部為空白頁時不會建立封存檔
+                    self.results[path]["outputs"] = [task["archive"]]
+            if self.results[path]["status"] == "pending":
+                self.results[path]["status"] = "done"
+            self.emit("file_done", task["out_dir"])
+
+    def _page_skipped(self, path, p_num, reason, original=None):
+        """空白頁直接略過；重複頁面等原始頁面寫出後再以連結取代"""
+        task = self.state["tasks"][path]
+        if reason == "blank":
+            self.log(f"  ⬜ {os.path.basename(path)} 第 {p_num} 頁為空白頁，略過")
+            self.state["blank"] += 1
+            self.results[path].setdefault("blank_pages", []).append(p_num)
+            if self.archives:
+                self.archives.skip(path, task["archive"], task["pages"], p_num)
+            self._page_done(path, p_num, None)
+            return
+        original = tuple(original)
+        if original in self.state["written"]:
+            self._link_duplicate(path, p_num, original)
+        else:
+            self.state["waiting"].setdefault(original, []).append((path, p_num))
+
+    def _link_duplicate(self, path, p_num, original):
+        task = self.state["tasks"][path]
+        source = self.state["written"][original]
+        try:
+            if self.archives:
+                save_path = self.archives.link(path, task["archive"], task["pages"],
+                                               archive_name(p_num, self.settings), source)
+                self.archives.skip(path, task["archive"], task["pages"], p_num)
+            else:
+                target = page_path(task["out_dir"], p_num, self.settings, task.get("targets", {}).get(p_num),
+                                   self.profiler, path)
+                save_path = link_output(source, target, self.settings["variants"])
+        except OSError as e:
+            self._page_failed(path, e, p_num)
+            return
+        self.state["duplicates"] += 1
+        self.log(f"  🔗 {os.path.basename(path)} 第 {p_num} 頁與 {os.path.basename(original[0])} "
+                 f"第 {original[1]} 頁相同，以連結取代")
+        self._page_done(path, p_num, save_path)
+
+    def _report(self):
+        """彙整各階段耗時，送出 report 事件並視設定寫出 JSON"""
+        extra = {"settings": {k: self.settings[k]
+                              for k in ("dpi", *SIZING_KEYS, "fmt", "encoder", "color", "variants", "angle", "workers", "encoders")}}
+        path = self.settings["profile_report"]
+        try:
+            if path:
+                report = self.profiler.write_report(path, extra)
+                self.log(f"📈 執行報告已寫入：{path}")
+            else:
+                report = self.profiler.report(extra)
+        except OSError as e:
+            self.log(f"⚠️ 無法寫入執行報告：{e}")
+            return
+        self.emit("report", report)
+
+    def _archive_write(self, task, p_num, data, variant=None):
+        """封存模式：將編碼好的頁面 (或其額外尺寸) 附加到該 PDF 的封存檔"""
+        name = archive_name(p_num, self.settings)
+        if variant is not None:
+            name = variant_filename(os.path.splitext(name)[0], variant)
+        with self.profiler.stage("write", task["path"], p_num) as st:
+            st.bytes = len(data)
+            return self.archives.write(task["path"], task["archive"], task["pages"], p_num, name, data,
+                                       last=variant is None)
+
+    def _page_failed(self, path, e, p_num=None, reason="error"):
+        """p_num 為 None 時整個檔案無法處理；否則只隔離該頁 (記入隔離報告)，其餘頁面照常轉換"""
+        state = self.state
+        if path in state["failed"] or (path, p_num) in state["handled"]:
+            return  # 同一檔案的多個分片各自回報開啟失敗
+        state["quarantine"].append({"path": path, "page": p_num, "reason": reason, "error": str(e)})
+        self.results[path].update(status="error", error=str(e))
+        if p_num is None:
+            state["failed"].add(path)
+            self.log(f"❌ 檔案處理錯誤: {os.path.basename(path)} ({e})")
+            return
+        self.results[path].setdefault("quarantined", []).append(p_num)
+        self.log(f"🚫 {os.path.basename(path)} 第 {p_num} 頁無法轉換，已隔離 ({e})")
+        task = state["tasks"][path]
+        if self.archives:
+            self.archives.skip(path, task["archive"], task["pages"], p_num)
+        self._page_done(path, p_num, None)
+        for dup_path, dup_page in state["waiting"].pop((path, p_num), ()):
+            self._page_failed(dup_path, RuntimeError(f"與 {os.path.basename(path)} 第 {p_num} 頁相同，但該頁無法轉換"),
+                              dup_page)
+
+    def _worker_lost(self, shard, err):
+        """子行程在分片途中中斷 (逾時、超出記憶體或崩潰)：隔離出問題的頁面，回傳需要重新派送的頁面
+
+        崩潰可能是偶發的，同一頁先重試；重試仍崩潰或逾時、超出記憶體時才隔離。
+        """
+        state = self.state
+        path = shard["path"]
+        if path in state["failed"]:
+            return []
+        key = (path, err.page)
+        state["attempts"][key] = state["attempts"].get(key, 0) + 1
+        if key not in state["handled"] and (err.reason != "crash" or state["attempts"][key] >= PAGE_ATTEMPTS):
+            if err.page is None:  # 尚未開始任何一頁 (開啟文件時) 就中斷
+                self._page_failed(path, err, None, err.reason)
+                return []
+            self._page_failed(path, err, err.page, err.reason)
+        elif err.reason == "crash":
+            self.log(f"⚠️ 子行程異常結束，重試 {os.path.basename(path)}"
+                     + (f" 第 {err.page} 頁" if err.page is not None else ""))
+        waiting = {dup for dups in state["waiting"].values() for dup in dups}  # 已渲染，等待原始頁面寫出
+        return [p for p in shard["pages"] if (path, p) not in state["handled"] and (path, p) not in waiting]
+
+    def _quarantine_report(self):
+        """彙整無法轉換的頁面，視設定寫出 JSON"""
+        entries = self.state["quarantine"]
+        pages = sum(1 for entry in entries if entry["page"] is not None)
+        if pages:
+            self.log(f"🚫 共 {pages} 頁無法轉換，已隔離")
+        path = self.settings["quarantine_report"]
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"quarantined": entries}, f, ensure_ascii=False, indent=2)
+            self.log(f"📝 隔離報告已寫入：{path}")
+        except OSError as e:
+            self.log(f"⚠️ 無法寫入隔離報告：{e}")
+
+    def _render_serial(self, tasks):
+        on_page = lambda path, p_num, save_path: self._page_written(path, p_num, save_path, "")
+
+        # 管線跨檔案共用：前一個檔案最後幾頁的編碼/寫檔與下一個檔案的渲染重疊
+        sink = self._archive_write if self.archives else None
+        pipeline = make_pipeline(self.settings, on_page, self._page_failed, self.profiler, sink, self._page_skipped)
+        try:
+            for task in tasks:
+                if self.stop_event.is_set(): raise InterruptedError()
+                self.log(f"📂 正在處理：{os.path.splitext(os.path.basename(task['path']))[0]}")
+
+                try:
+                    pdf = self.sessions.open(task["path"], task["pw"])
+
+                    for p_num in task["pages"]:
+                        if self.stop_event.is_set(): raise InterruptedError()
+                        try:
+                            convert_page(pdf, task, p_num, self.settings, pipeline, on_page, self.profiler, sink,
+                                         self._page_skipped)
+                        except Exception as e:
+                            self._page_failed(task["path"], e, p_num)
+
+                except InterruptedError:
+                    raise
+                except Exception as e:
+                    self._page_failed(task["path"], e)
+                finally:
+                    self.sessions.release(task["path"])
+        except InterruptedError:
+            if pipeline: pipeline.abort(); pipeline = None
+            raise
+        finally:
+            if pipeline: pipeline.close()
+
+    def _render_parallel(self, tasks):
+        workers = self.pool.workers if self.pool else self.settings["workers"]
+        pool = self.pool or RenderPool(workers)
+        self.log(f"⚡ 平行轉檔：{pool.workers} 個行程")
+        try:
+            self._run_shards(pool, tasks)
+        finally:
+            if pool is not self.pool:
+                pool.shutdown()
+
+    def _run_shards(self, pool, tasks):
+        """分析出一個任務就估計成本、切成分片，交給排程器依成本派送，同時轉發已完成頁面的事件"""
+        generation = pool.begin()
+        shard_settings = dict(self.settings, profile=self.profiler.enabled)  # 只掛 hooks 時子行程也要量測
+        scheduler = ShardScheduler(pool.workers, self.settings["memory_budget_mb"] << 20,
+                                   ordered=self.archives is not None)
+        futures = {}  # 分片 id -> future
+        ids = itertools.count()
+        known_cost = 0.0
+        dedup = pool.shared_dict() if self.settings["dedup"] else None
+
+        def dispatch():
+            for shard in scheduler.take():
+                futures[shard["id"]] = pool.submit(shard)
+
+        def finished(shard_ids, lost):
+            # 以 shard_done 訊息為準，而非等待 future：常駐行程池的子行程不會結束，訊息可能晚於 future 完成送達
+            for shard_id in shard_ids:
+                scheduler.done(shard_id)
+                futures.pop(shard_id, None)
+            for err in lost:  # 子行程中斷，這些分片不會送出 shard_done
+                shard = err.item
+                if futures.pop(shard["id"], None) is None:
+                    continue
+                scheduler.done(shard["id"])
+                pages = self._worker_lost(shard, err)
+                if pages:  # 其餘頁面 (含崩潰時重試的頁面) 另成一個分片重新派送
+                    scheduler.add(dict(shard, id=next(ids), pages=pages,
+                                       cost=shard["cost"] * len(pages) / len(shard["pages"])))
+            dispatch()
+
+        try:
+            for task in tasks:
+                costs, memory = self._estimate(task)
+                # 子行程各自開啟文件；主行程的控制代碼先行關閉以釋放檔案描述元 (解析結果仍保留)
+                self.sessions.release(task["path"])
+                # 分片成本依目前已知的總成本決定：批次開頭切細讓各行程盡快開工，之後逐漸放大
+                known_cost += sum(costs.values())
+                for shard in split_shards(task, costs, known_cost / (pool.workers * 4)):
+                    shard.update(id=next(ids), settings=shard_settings, generation=generation, dedup=dedup,
+                                 memory=shard_memory([memory[p] for p in shard["pages"]], self.settings))
+                    scheduler.add(shard)
+                dispatch()
+                finished(*self._pump_events(pool, generation, futures, 0))
+            while scheduler.busy():
+                finished(*self._pump_events(pool, generation, futures, 0.1))
+        except BaseException:
+            # 取消、逾時或寫出失敗：停止其餘分片，行程池才能交給下一批使用
+            pool.cancel(list(futures.values()))
+            raise
+
+    def _estimate(self, task):
+        """估計任務中各頁的轉檔成本與點陣圖大小 (頁面尺寸 × 該頁 DPI，加上頁面物件數)"""
+        path = task["path"]
+        with self.profiler.stage("estimate", path):
+            meta = self.sessions.info(path, task["pw"])
+            objects = self.sessions.page_objects(path)
+        costs, memory = {}, {}
+        for p_num in task["pages"]:
+            size = meta["sizes"][p_num - 1]  # 旋轉不影響像素數
+            costs[p_num] = page_cost(size, objects[p_num - 1], self.settings)
+            memory[p_num] = page_memory(size, self.settings)
+        return costs, memory
+
+    def _pump_events(self, pool, generation, futures, timeout):
+        """轉發子行程目前送達的事件；timeout 為等待第一個事件的秒數
+
+        回傳 (已完成的分片 id, 子行程中斷的分片之 WorkerLost)。
+        """
+        done, lost = [], None
+        while True:
+            if self.stop_event.is_set():
+                raise InterruptedError()
+            try:
+                kind, data, event_generation = pool.events.get(timeout=timeout) if timeout else \
+                    pool.events.get_nowait()
+            except queue.Empty:
+                if lost is not None:
+                    return done, lost
+                lost = []
+                for fut in futures.values():
+                    if fut.done() and fut.exception():
+                        if not isinstance(fut.exception(), WorkerLost):
+                            raise fut.exception()  # 子行程無法啟動等無法恢復的錯誤
+                        lost.append(fut.exception())
+                if not lost:
+                    return done, lost
+                # 中斷前送出的事件在 future 結束前就已排入，再取一輪，頁面才不會被誤判為未完成
+                timeout = 0
+                continue
+            timeout = 0
+            if event_generation != generation:
+                continue
+            if kind == "shard_done":
+                done.append(data)
+            else:
+                self._forward_pool_event((kind, data))
+
+    def _forward_pool_event(self, event):
+        """將子行程回報的事件轉為 log / progress / file_done 事件"""
+        kind, data = event
+        if kind == "page_done":
+            path, p_num, save_path = data
+            self._page_written(path, p_num, save_path, f"{os.path.basename(path)} ")
+        elif kind == "page_data":
+            path, p_num, data, variant = data
+            save_path = self._archive_write(self.state["tasks"][path], p_num, data, variant)
+            if variant is None:
+                self._page_written(path, p_num, save_path, f"{os.path.basename(path)} ")
+        elif kind == "page_error":
+            self._page_failed(*data)
+        elif kind == "page_skipped":
+            self._page_skipped(*data)
+        elif kind == "profile":
+            self.profiler.extend(data)
+
+
+def iter_convert(files, settings, ask_password=None, stop_event=None):
+    """以產生器形式執行轉檔，逐一產出 (kind, data) 事件，直到 done / cancelled / error"""
+    events = queue.Queue()
+    engine = ConversionEngine(settings, on_event=lambda kind, data: events.put((kind, data)),
+                              ask_password=ask_password, stop_event=stop_event)
+    threading.Thread(target=engine.run, args=(files,), daemon=True).start()
+    while True:
+        kind, data = events.get()
+        yield kind, data
+        if kind in ("done", "cancelled", "error"):
+            return
@@ -0,0 +1,161 @@
+"""增量轉檔用的輸出清單 (manifest)
+
+每個輸出資料夾保存一份 .pdfconv-manifest.json，記錄
+「來源內容雜湊 + 頁碼 + 影響輸出的設定」→ 輸出檔名。
+重新執行時，清單中已有且檔案仍存在的頁面直接略過；
+來源內容或設定變更的頁面則覆寫原本的輸出檔 (格式改變時刪除舊檔)，不會再產生 page_N_1.png；
+來源內容變更後已不存在的頁面，其舊輸出一併刪除。
+"""
+import hashlib
+import json
+import os
+from collections import Counter
+
+MANIFEST_NAME = ".pdfconv-manifest.json"
+MANIFEST_VERSION = 1
+
+# 會改變輸出結果的設定；任一項不同即視為不同的輸出
+RENDER_KEYS = ["dpi", "angle", "fmt"]
+
+# 後來新增的設定：等於預設值時不列入鍵值，舊版 manifest 的紀錄仍然有效
+OPTIONAL_RENDER_KEYS = {"encoder": "balanced", "variants": [], "color": "color",
+                        "fit_px": 0, "max_mp": 0, "min_dpi": 0, "max_dpi": 0}
+
+
+def _key_value(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":")) if isinstance(value, (list, dict)) else value
+
+
+def settings_key(settings):
+    parts = [f"{k}={settings.get(k)}" for k in RENDER_KEYS]
+    parts += [f"{k}={_key_value(settings.get(k, v))}" for k, v in OPTIONAL_RENDER_KEYS.items()
+              if settings.get(k, v) != v]
+    return ",".join(parts)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class OutputManifest:
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        self.entries = {}   # "<hash>:<頁碼>:<設定>" -> {"file", "source"}
+        self.sources = {}   # 來源檔名 -> {"size", "mtime", "hash"}，檔案未變動時免重新計算雜湊
+        self.dirty = False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("entries", {})
+                self.sources = data.get("sources", {})
+        except (OSError, ValueError):
+            pass
+        # 來源檔名 -> 頁碼 -> 紀錄鍵值，用於找出內容或設定已變更的舊紀錄
+        self.by_source = {}
+        self.refs = Counter()   # 輸出檔 -> 使用它的紀錄數 (重複頁面的多筆紀錄可能指向同一檔案)
+        for key, entry in self.entries.items():
+            self._index(key, entry)
+
+    def source_digest(self, path):
+        """取得來源 PDF 的內容雜湊；大小與修改時間未變時沿用上次的結果"""
+        st = os.stat(path)
+        name = os.path.basename(path)
+        cached = self.sources.get(name)
+        if cached and cached["size"] == st.st_size and cached["mtime"] == st.st_mtime_ns:
+            return cached["hash"]
+        digest = file_digest(path)
+        self.sources[name] = {"size": st.st_size, "mtime": st.st_mtime_ns, "hash": digest}
+        self.dirty = True
+        return digest
+
+    @staticmethod
+    def key(digest, p_num, settings):
+        return f"{digest}:{p_num}:{settings_key(settings)}"
+
+    def is_done(self, digest, p_num, settings):
+        entry = self.entries.get(self.key(digest, p_num, settings))
+        return bool(entry) and os.path.exists(os.path.join(self.out_dir, entry["file"]))
+
+    def stale_target(self, source, p_num, ext):
+        """同一來源檔同一頁的舊紀錄 (內容或設定已變更)：移除紀錄，回傳副檔名為 ext 的舊輸出以便覆寫，
+
+        其餘副檔名不同的舊輸出 (格式已改變) 直接刪除。沒有可覆寫的舊輸出時回傳 None。
+        """
+        target = None
+        for key in self.by_source.get(source, {}).pop(p_num, []):
+            entry = self.entries.get(key)
+            if not entry:
+                continue
+            path = os.path.join(self.out_dir, entry["file"])
+            keep = target is None and os.path.splitext(path)[1].lower() == f".{ext}".lower()
+            self._drop(key, delete=not keep)
+            if keep:
+                target = path
+        return target
+
+    def prune(self, source, digest):
+        """來源內容已變更：刪除仍記錄著舊內容的輸出 (例如來源變短後已不存在的頁面)，回傳刪除的紀錄數"""
+        removed = 0
+        pages = self.by_source.get(source, {})
+        for p_num, keys in list(pages.items()):
+            stale = [k for k in keys if not k.startswith(f"{digest}:")]
+            for key in stale:
+                self._drop(key)
+            removed += len(stale)
+            if len(stale) == len(keys):
+                del pages[p_num]
+            elif stale:
+                pages[p_num] = [k for k in keys if k.startswith(f"{digest}:")]
+        return removed
+
+    def _index(self, key, entry):
+        pages = self.by_source.setdefault(entry["source"], {})
+        keys = pages.setdefault(int(key.split(":", 2)[1]), [])
+        if key not in keys:
+            keys.append(key)
+        self.refs[entry["file"]] += 1
+
+    def _drop(self, key, delete=True):
+        """移除一筆紀錄；delete 時一併刪除不再被任何紀錄使用的輸出檔"""
+        rel = self.entries.pop(key)["file"]
+        self.dirty = True
+        self.refs[rel] -= 1
+        if self.refs[rel] > 0:
+            return
+        del self.refs[rel]
+        if delete:
+            try:
+                os.remove(os.path.join(self.out_dir, rel))
+            except FileNotFoundError:
+                pass
+
+    def record(self, digest, p_num, settings, source, save_path):
+        key = self.key(digest, p_num, settings)
+        old = self.entries.get(key)
+        if old is not None:  # 同一鍵值重新輸出 (或另一個內容相同的來源檔)：改指向新的檔案
+            if old["source"] != source:
+                self.by_source[old["source"]][p_num].remove(key)
+            self._drop(key, delete=False)
+        entry = {"file": os.path.relpath(save_path, self.out_dir), "source": source}
+        self.entries[key] = entry
+        self._index(key, entry)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries, "sources": self.sources},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+        self.dirty = False
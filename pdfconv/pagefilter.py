@@ -0,0 +1,51 @@
+"""空白頁偵測與重複頁面合併
+
+掃描批次中常有空白分隔頁與重複的制式頁面 (封面、條款頁)，逐頁渲染、編碼、儲存很浪費。
+
+- 空白頁：沒有任何頁面物件者直接判定；其餘以低解析度灰階試渲染，
+  深色像素比例低於門檻即視為空白 (可容忍掃描雜點)，不進行全解析度渲染。
+- 重複頁面：全解析度渲染後、編碼前計算點陣圖雜湊；同一批次中已出現過的內容不再編碼，
+  由引擎改以硬連結 (無法建立時複製) 指向第一次輸出的檔案，ZIP 模式則記錄於封存檔內的 duplicates.json。
+  平行轉檔時雜湊索引由各子行程共用。
+"""
+import hashlib
+
+import pypdfium2.raw as pdfium_c
+
+from .profiler import NULL_PROFILER
+
+PROBE_DPI = 36           # 空白頁試渲染的解析度
+INK_LEVEL = 200          # 灰階值低於此視為有內容
+BLANK_INK_RATIO = 0.0005  # 有內容的像素比例不超過此值即為空白頁 (A4 約 60 個像素)
+
+
+def is_blank(pdf, p_num, prof=NULL_PROFILER, path=None):
+    with prof.stage("blank_check", path, p_num):
+        page = pdf[p_num - 1]
+        try:
+            if pdfium_c.FPDFPage_CountObjects(page.raw) == 0:
+                return True
+            bitmap = page.render(scale=PROBE_DPI / 72.0, grayscale=True)
+            image = bitmap.to_pil()
+            ink = sum(image.histogram()[:INK_LEVEL])
+            bitmap.close()
+            return ink <= BLANK_INK_RATIO * image.width * image.height
+        finally:
+            page.close()
+
+
+def bitmap_digest(image, buffer=None, prof=NULL_PROFILER, path=None, p_num=None):
+    """點陣圖內容雜湊；有渲染緩衝區時直接雜湊緩衝區 (不複製)"""
+    with prof.stage("hash", path, p_num):
+        h = hashlib.blake2b(f"{image.mode}:{image.size}".encode(), digest_size=16)
+        h.update(memoryview(buffer) if buffer is not None else image.tobytes())
+        return h.hexdigest()
+
+
+def claim(index, digest, path, p_num):
+    """登記頁面內容；已有相同內容的頁面時回傳其 (路徑, 頁碼)，否則回傳 None
+
+    index 可為一般 dict 或 multiprocessing 管理的共用 dict (setdefault 為單一原子操作)。
+    """
+    owner = tuple(index.setdefault(digest, (path, p_num)))
+    return None if owner == (path, p_num) else owner
@@ -0,0 +1,89 @@
+"""渲染 → 編碼 → 寫檔 三段式管線
+
+pdfium 不可跨執行緒同時使用，渲染固定在呼叫端執行緒；
+Pillow 編碼 (zlib / libjpeg) 會釋放 GIL，交給編碼執行緒池；
+最後由單一寫檔執行緒依序寫入磁碟，讓 I/O 延遲與渲染重疊。
+各段之間以有上限的佇列串接，高 DPI 時記憶體用量仍有上限。
+"""
+import queue
+import threading
+
+_STOP = object()
+
+
+class PagePipeline:
+    """encode(item) 回傳要寫入的 bytes；write(item, data) 寫檔並回傳輸出路徑。
+
+    每頁完成時呼叫 on_written(item, save_path)，失敗時呼叫 on_error(item, exc)；
+    兩個回呼都在寫檔執行緒中執行 (編碼失敗也經由寫檔佇列轉交)。on_written 拋出的例外同樣交給 on_error，
+    寫檔執行緒不會因此結束 (否則佇列塞滿後 submit / close 會永遠阻塞)。
+    """
+
+    def __init__(self, encode, write, on_written, on_error, encoders=2, depth=4):
+        self.encode = encode
+        self.write = write
+        self.on_written = on_written
+        self.on_error = on_error
+        self.encode_q = queue.Queue(maxsize=max(1, depth))
+        self.write_q = queue.Queue(maxsize=max(1, depth))
+        self.aborted = threading.Event()
+        self.encoders = [threading.Thread(target=self._encode_loop, daemon=True) for _ in range(max(1, encoders))]
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        for t in self.encoders:
+            t.start()
+        self.writer.start()
+
+    def submit(self, item):
+        """送入一頁 (item 需含 "image")，佇列已滿時阻塞等待，形成背壓"""
+        self.encode_q.put(item)
+
+    def close(self):
+        """等待所有已送入的頁面寫入完成"""
+        for _ in self.encoders:
+            self.encode_q.put(_STOP)
+        for t in self.encoders:
+            t.join()
+        self.write_q.put(_STOP)
+        self.writer.join()
+
+    def abort(self):
+        """取消作業：丟棄尚未處理的頁面並結束所有執行緒"""
+        self.aborted.set()
+        for q in (self.encode_q, self.write_q):
+            try:
+                while True: q.get_nowait()
+            except queue.Empty:
+                pass
+        self.close()
+
+    def _encode_loop(self):
+        while True:
+            item = self.encode_q.get()
+            if item is _STOP:
+                return
+            if self.aborted.is_set():
+                continue
+            try:
+                entry = (item, self.encode(item), None)
+            except Exception as e:
+                entry = (item, None, e)
+            finally:
+                item.pop("image", None)  # 編碼後即釋放點陣圖
+            self.write_q.put(entry)
+
+    def _write_loop(self):
+        while True:
+            entry = self.write_q.get()
+            if entry is _STOP:
+                return
+            if self.aborted.is_set():
+                continue
+            item, data, error = entry
+            if error is not None:
+                self.on_error(item, error)
+                continue
+            try:
+                save_path = self.write(item, data)
+                self.on_written(item, save_path)
+            except Exception as e:
+                self.on_error(item, e)
@@ -0,0 +1,225 @@
+"""頁面預覽：專屬的低優先權子行程以低解析度渲染，結果存入有記憶體上限的 LRU 快取
+
+pdfium 不是執行緒安全的，而圖形介面行程內可能正在轉檔 (單一行程時於背景執行緒渲染)，
+預覽因此交給另一個子行程，並調低其排程優先權，不與轉檔搶 CPU。
+請求以「最新的先處理」排隊，快速翻頁時只渲染使用者停下來的那一頁，過舊的請求直接丟棄。
+
+快取以 (檔案, 頁碼, scale, 角度) 為鍵，存放 PNG (Tk 可直接載入)，來回翻頁時不必重新渲染；
+同一頁已有較低解析度的結果時，可先放大顯示，等清晰的版本完成再替換。
+本模組不在載入時匯入 pypdfium2 / Pillow，圖形介面啟動時即可使用。
+"""
+import io
+import multiprocessing
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+PREVIEW_CACHE_MB = 64   # 快取的 PNG 總量上限
+PREVIEW_QUEUE_MAX = 16  # 等待中的請求上限，超過時丟棄最舊的
+
+# 子行程內同時保持開啟的文件數
+PREVIEW_OPEN_DOCS = 4
+
+# Windows 的 BELOW_NORMAL_PRIORITY_CLASS
+_BELOW_NORMAL = 0x4000
+
+_preview_state = {"sessions": None, "mtimes": {}}
+
+
+def preview_scale(size, px):
+    """頁面 (寬, 高) point 縮放至最長邊 px 像素的 scale"""
+    return px / max(size)
+
+
+def _preview_init():
+    """子行程啟動時調低優先權，轉檔時預覽只使用閒置的 CPU"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), _BELOW_NORMAL)
+        else:
+            os.nice(10)
+    except (OSError, AttributeError):
+        pass
+
+
+def _render_preview(path, page, px, angle):
+    """於子行程渲染一頁，回傳 PNG 與頁面資訊"""
+    from .sessions import DocumentSessions
+
+    if _preview_state["sessions"] is None:
+        _preview_state["sessions"] = DocumentSessions(PREVIEW_OPEN_DOCS)
+    sessions = _preview_state["sessions"]
+    mtime = os.path.getmtime(path)
+    if _preview_state["mtimes"].get(path, mtime) != mtime:  # 檔案已被替換，重新開啟
+        sessions.release(path)
+        sessions.meta.pop(path, None)
+    _preview_state["mtimes"][path] = mtime
+    sizes = sessions.info(path)["sizes"]
+    if not 1 <= page <= len(sizes):
+        raise IndexError(f"頁碼超出範圍: {page}")
+    scale = preview_scale(sizes[page - 1], px)
+    pdf_page = sessions.open(path)[page - 1]
+    try:
+        # angle 與轉檔設定相同為逆時針，pdfium 的 rotation 為順時針
+        image = pdf_page.render(scale=scale, rotation=(360 - angle) % 360, rev_byteorder=True).to_pil()
+    finally:
+        pdf_page.close()
+    buf = io.BytesIO()
+    image.save(buf, "PNG", compress_level=1)
+    return {"png": buf.getvalue(), "scale": scale, "width": image.width, "height": image.height, "sizes": sizes}
+
+
+class PreviewCache:
+    """以 PNG 位元組數計算上限的 LRU 快取，鍵為 (檔案, 頁碼, scale, 角度)"""
+
+    def __init__(self, max_bytes=PREVIEW_CACHE_MB << 20):
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            preview = self.items.get(key)
+            if preview is not None:
+                self.items.move_to_end(key)
+            return preview
+
+    def put(self, key, preview):
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old["png"])
+            self.items[key] = preview
+            self.nbytes += len(preview["png"])
+            while self.nbytes > self.max_bytes and len(self.items) > 1:
+                _, evicted = self.items.popitem(last=False)
+                self.nbytes -= len(evicted["png"])
+
+    def discard(self, path):
+        """移除某個檔案的所有預覽"""
+        with self.lock:
+            for key in [k for k in self.items if k[0] == path]:
+                self.nbytes -= len(self.items.pop(key)["png"])
+
+    def nearest(self, path, page, scale, angle):
+        """同一頁、同一角度中低於 scale 的最清晰結果 (作為放大顯示的替代圖)，沒有則回傳 None"""
+        with self.lock:
+            found = [(k[2], v) for k, v in self.items.items()
+                     if k[0] == path and k[1] == page and k[3] == angle and k[2] < scale]
+        return max(found, key=lambda item: item[0])[1] if found else None
+
+
+class PreviewRenderer:
+    """預覽請求的排程與快取
+
+    request() 不會阻塞；完成時於背景執行緒呼叫 on_ready((路徑, 頁碼, px, 角度), 預覽, 錯誤)，
+    圖形介面應轉交回主執行緒處理。子行程在第一次請求時才啟動。
+    """
+
+    def __init__(self, on_ready, cache=None):
+        self.on_ready = on_ready
+        self.cache = cache or PreviewCache()
+        self.sizes = {}              # 路徑 -> 各頁尺寸 (point)，渲染過任一頁後才知道
+        self.wanted = OrderedDict()  # 等待中的請求 (最新的在最後)
+        self.inflight = None
+        self.executor = None
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def page_count(self, path):
+        sizes = self.sizes.get(path)
+        return len(sizes) if sizes is not None else None
+
+    def page_size(self, path, page):
+        sizes = self.sizes.get(path)
+        return sizes[page - 1] if sizes is not None and 1 <= page <= len(sizes) else None
+
+    def lookup(self, path, page, px, angle):
+        """已快取的預覽；頁面尺寸未知或尚未渲染時回傳 None"""
+        size = self.page_size(path, page)
+        if size is None:
+            return None
+        return self.cache.get((path, page, preview_scale(size, px), angle))
+
+    def placeholder(self, path, page, px, angle):
+        """同一頁較低解析度的快取結果"""
+        size = self.page_size(path, page)
+        if size is None:
+            return None
+        return self.cache.nearest(path, page, preview_scale(size, px), angle)
+
+    def request(self, *keys):
+        """排入渲染，每個鍵為 (路徑, 頁碼, px, 角度)，已快取者略過；最後排入的請求最先處理
+
+        一次排入多個時先全部排隊再開始，最後一個一定最先渲染 (例如先縮圖、再清晰版、最後是前後頁)。
+        """
+        keys = [k for k in keys if self.lookup(*k) is None]
+        with self.lock:
+            for key in keys:
+                if key == self.inflight:
+                    continue
+                self.wanted.pop(key, None)
+                self.wanted[key] = True
+            while len(self.wanted) > PREVIEW_QUEUE_MAX:
+                self.wanted.popitem(last=False)
+        self._pump()
+
+    def forget(self, path):
+        """來源檔已變更：丟棄等待中的請求、頁面尺寸與快取 (快取鍵不含修改時間，由呼叫端決定何時呼叫)"""
+        with self.lock:
+            for key in [k for k in self.wanted if k[0] == path]:
+                del self.wanted[key]
+            self.sizes.pop(path, None)
+        self.cache.discard(path)
+
+    def _pump(self):
+        with self.lock:
+            if self.closed or self.inflight is not None or not self.wanted:
+                return
+            key, _ = self.wanted.popitem(last=True)
+            self.inflight = key
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn"),
+                                                    initializer=_preview_init)
+            executor = self.executor
+        try:
+            future = executor.submit(_render_preview, *key)
+        except RuntimeError as e:  # 子行程已中止 (BrokenProcessPool) 或已關閉
+            self._done(key, None, e)
+            return
+        future.add_done_callback(lambda f: self._finished(key, f))
+
+    def _finished(self, key, future):
+        try:
+            preview = future.result()
+        except Exception as e:
+            self._done(key, None, e)
+            return
+        path, page, px, angle = key
+        self.sizes[path] = preview.pop("sizes")
+        self.cache.put((path, page, preview["scale"], angle), preview)
+        self._done(key, preview, None)
+
+    def _done(self, key, preview, error):
+        with self.lock:
+            self.inflight = None
+            if isinstance(error, BrokenProcessPool) and self.executor is not None:
+                self.executor.shutdown(wait=False)
+                self.executor = None  # 子行程異常結束 (例如損毀的 PDF)，下一個請求重新啟動
+        if not self.closed:
+            self.on_ready(key, preview, error)
+        self._pump()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.wanted.clear()
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,173 @@
+"""各階段效能量測與執行報告
+
+記錄每個階段 (analyze / open / render / to_pil / encode / write / unique_path / render_tiled)
+的牆鐘時間、CPU 時間與寫入位元組，並可依頁面、檔案彙整。
+hooks 為具有 stage_start(stage, path, page) 及/或 stage_end(record) 方法的物件；
+平行轉檔時子行程的紀錄於分片完成後送回主行程，只會觸發 stage_end。
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+
+# 紀錄欄位：(階段, 檔案, 頁碼, 牆鐘秒數, CPU 秒數, 位元組)
+STAGE, FILE, PAGE, WALL, CPU, BYTES = range(6)
+
+TOP_N = 10
+
+# 位元組數即輸出大小的階段：管線寫檔、同步模式的編碼加寫檔 (save)、分帶渲染的串流寫檔
+OUTPUT_STAGES = ("write", "save", "render_tiled")
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "path", "page", "bytes", "t0", "c0")
+
+    def __init__(self, profiler, name, path, page):
+        self.profiler = profiler
+        self.name = name
+        self.path = path
+        self.page = page
+        self.bytes = 0
+
+    def __enter__(self):
+        for hook in self.profiler.hooks:
+            if hasattr(hook, "stage_start"):
+                hook.stage_start(self.name, self.path, self.page)
+        self.c0 = time.thread_time()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.t0
+        cpu = time.thread_time() - self.c0
+        self.profiler.add((self.name, self.path, self.page, wall, cpu, self.bytes))
+        return False
+
+
+class _NullStage:
+    bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    """未啟用量測時使用，不產生任何額外開銷"""
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name, path=None, page=None):
+        return self._stage
+
+    def add(self, record):
+        pass
+
+    def extend(self, records):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class RunProfiler:
+    enabled = True
+
+    def __init__(self, hooks=None):
+        self.hooks = list(hooks or [])
+        self.records = []
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def stage(self, name, path=None, page=None):
+        """with profiler.stage("encode", path, p_num) as st: ...; st.bytes = n"""
+        return _Stage(self, name, path, page)
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+        for hook in self.hooks:
+            if hasattr(hook, "stage_end"):
+                hook.stage_end(record)
+
+    def extend(self, records):
+        """合併子行程送回的紀錄"""
+        for record in records:
+            self.add(tuple(record))
+
+    def take(self):
+        """取出目前累積的紀錄並清空 (子行程送回主行程時使用)"""
+        with self.lock:
+            records, self.records = self.records, []
+        return records
+
+    def report(self, extra=None):
+        with self.lock:
+            records = list(self.records)
+
+        by_stage = defaultdict(list)
+        stage_cpu = defaultdict(float)
+        stage_bytes = defaultdict(int)
+        by_page = defaultdict(lambda: defaultdict(float))
+        by_file = defaultdict(lambda: {"wall": 0.0, "cpu": 0.0, "bytes": 0, "pages": set()})
+        for r in records:
+            by_stage[r[STAGE]].append(r[WALL])
+            stage_cpu[r[STAGE]] += r[CPU]
+            stage_bytes[r[STAGE]] += r[BYTES]
+            if r[FILE] is not None:
+                f = by_file[r[FILE]]
+                f["wall"] += r[WALL]
+                f["cpu"] += r[CPU]
+                f["bytes"] += r[BYTES]
+                if r[PAGE] is not None:
+                    f["pages"].add(r[PAGE])
+                    by_page[(r[FILE], r[PAGE])][r[STAGE]] += r[WALL]
+
+        stages = {}
+        for name, walls in by_stage.items():
+            walls.sort()
+            stages[name] = {
+                "count": len(walls),
+                "wall_total": round(sum(walls), 6),
+                "cpu_total": round(stage_cpu[name], 6),
+                "bytes": stage_bytes[name],
+                "p50": round(_percentile(walls, 50), 6),
+                "p90": round(_percentile(walls, 90), 6),
+                "p99": round(_percentile(walls, 99), 6),
+                "max": round(walls[-1], 6),
+            }
+
+        pages = sorted(({"file": k[0], "page": k[1], "wall": round(sum(v.values()), 6),
+                         "stages": {s: round(t, 6) for s, t in v.items()}} for k, v in by_page.items()),
+                       key=lambda p: p["wall"], reverse=True)
+        files = sorted(({"file": path, "pages": len(f["pages"]), "wall": round(f["wall"], 6),
+                         "cpu": round(f["cpu"], 6), "bytes": f["bytes"]} for path, f in by_file.items()),
+                       key=lambda f: f["wall"], reverse=True)
+        report = {
+            "wall_seconds": round(time.perf_counter() - self.started, 6),
+            "pages": len(by_page),
+            "bytes_written": sum(stage_bytes.get(name, 0) for name in OUTPUT_STAGES),
+            "stages": stages,
+            "slowest_pages": pages[:TOP_N],
+            "slowest_files": files[:TOP_N],
+        }
+        if extra:
+            report.update(extra)
+        return report
+
+    def write_report(self, path, extra=None):
+        report = self.report(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
@@ -0,0 +1,111 @@
+"""依成本排程的平行轉檔分片
+
+各頁的成本差異極大：向量工程圖或 600 DPI 的 A1 頁面可能比純文字頁慢上百倍，
+依檔案順序派送時，最後常只剩一個行程在處理落後的大頁面，其他核心閒置。
+
+- 每頁成本由頁面尺寸、該頁的渲染 DPI 與頁面物件數估算 (皆可不經渲染由 pdfium 取得)，單位約為毫秒，只用於互相比較。
+- 同一檔案的連續頁面依成本 (而非頁數) 切成分片，超大頁面自成一個分片。
+- 同時執行的分片數等於行程數，閒置的行程才會拿到下一個分片，且一律先派送成本最高者；
+  先做完的行程自動接手剩餘工作，不會有核心停在一個落後的大分片後面。
+- ZIP / 多頁 TIFF 封存輸出須依頁碼順序附加，改為依檔案與頁碼順序派送 (ordered)，
+  提早完成而需暫存等待的頁面只限於同時執行中的幾個分片。
+- 設定記憶體預算時，執行中分片的點陣圖估計用量合計不超過預算：
+  下一個分片放不下時先等待執行中的分片完成，單一分片超過預算時則等到沒有其他分片執行才派送。
+"""
+import heapq
+import itertools
+import math
+import os
+
+from .sizing import page_scale
+
+# 成本模型 (毫秒)：每百萬像素的渲染與編碼，以及每個頁面物件 (路徑、文字、圖片) 的解析與繪製
+PIXEL_COST = 25.0
+OBJECT_COST = 0.05
+
+
+def default_workers():
+    """預設平行行程數：使用全部 CPU 核心"""
+    return max(1, os.cpu_count() or 1)
+
+
+def page_pixels(size, settings):
+    scale = page_scale(size, settings)
+    width, height = size
+    return math.ceil(width * scale) * math.ceil(height * scale)
+
+
+def page_cost(size, objects, settings):
+    """估計單頁的轉檔成本 (約略毫秒)"""
+    return page_pixels(size, settings) / 1e6 * PIXEL_COST + objects * OBJECT_COST
+
+
+def page_memory(size, settings):
+    """渲染單頁的點陣圖位元組數 (灰階每像素 1 位元組)；分帶渲染的頁面以 max_page_mb 為上限"""
+    channels = 1 if settings["color"] in ("gray", "mono") else 4
+    nbytes = page_pixels(size, settings) * channels
+    if settings["max_page_mb"]:
+        nbytes = min(nbytes, settings["max_page_mb"] << 20)
+    return nbytes
+
+
+def shard_memory(page_bytes, settings):
+    """分片執行時同時存在的點陣圖：渲染中的一頁，加上管線佇列與各編碼執行緒手上的頁面"""
+    in_flight = 1
+    if settings["queue_depth"]:
+        in_flight += settings["queue_depth"] + settings["encoders"]
+    return sum(sorted(page_bytes, reverse=True)[:in_flight])
+
+
+def split_by_cost(pages, costs, target, max_pages):
+    """將連續頁面切成成本約為 target (且最多 max_pages 頁) 的分片，回傳 [(頁碼清單, 成本)]"""
+    chunks, chunk, total = [], [], 0.0
+    for p_num in pages:
+        cost = costs[p_num]
+        if chunk and (total + cost > target or len(chunk) >= max_pages):
+            chunks.append((chunk, total))
+            chunk, total = [], 0.0
+        chunk.append(p_num)
+        total += cost
+    if chunk:
+        chunks.append((chunk, total))
+    return chunks
+
+
+class ShardScheduler:
+    """決定下一個派送的分片：成本高者優先 (ordered 時依頁碼順序)，同時執行數與記憶體用量有上限"""
+
+    def __init__(self, slots, budget_bytes=0, ordered=False):
+        self.slots = max(1, slots)
+        self.budget = budget_bytes  # 0 = 不限制
+        self.ordered = ordered      # 依檔案與頁碼順序派送 (封存輸出)，而非成本高者優先
+        self.ready = []             # (優先順序, 加入順序, 分片) 的 heap
+        self.running = {}           # 分片 id -> 估計記憶體用量
+        self.order = itertools.count()
+        self.files = {}             # 來源路徑 -> 第一次加入的順序 (ordered 模式)
+
+    def add(self, shard):
+        if self.ordered:
+            priority = (self.files.setdefault(shard["path"], len(self.files)), shard["pages"][0])
+        else:
+            priority = -shard["cost"]
+        heapq.heappush(self.ready, (priority, next(self.order), shard))
+
+    def take(self):
+        """取出目前可以派送的分片"""
+        out = []
+        while self.ready and len(self.running) < self.slots:
+            shard = self.ready[0][2]
+            if self.budget and self.running and sum(self.running.values()) + shard["memory"] > self.budget:
+                break  # 不跳過最大的分片改派小的，避免大分片一直等不到記憶體
+            heapq.heappop(self.ready)
+            self.running[shard["id"]] = shard["memory"]
+            out.append(shard)
+        return out
+
+    def done(self, shard_id):
+        self.running.pop(shard_id, None)
+
+    def busy(self):
+        """還有等待或執行中的分片"""
+        return bool(self.ready or self.running)
@@ -0,0 +1,309 @@
+"""本機 HTTP 轉檔服務：其他程式上傳 PDF (或指定路徑)，以串流 ZIP 取回各頁圖片
+
+    POST /convert?dpi=300&start=1&end=5&angle=0&fmt=PNG&encoder=fast   (本文為 PDF)
+    POST /convert?dpi=150&skip_blank=1&dedup=1                           (略過空白頁、合併重複頁面)
+    POST /convert?dpi=300&color=auto                                     (黑白頁面自動輸出灰階 / 1-bit)
+    POST /convert?fit_px=2000&max_dpi=300                                (最長邊 2000 px，最高 300 DPI)
+    POST /convert?path=D:/共用/報告.pdf&dpi=150                          (需以 --path-root 允許)
+    GET  /health
+
+- 每頁完成即以 chunked 傳輸寫入 ZIP (stored)，不等整份文件轉完，也不在伺服器上留下圖檔。
+- 同時轉檔的請求數固定為 concurrency，每個名額各有一個預熱的子行程池；
+  超過名額的請求進入有上限的等待佇列，佇列已滿或等待逾時回傳 503。
+- 每個請求有自己的 stop_event：逾時或用戶端中斷連線時設定，引擎隨即取消剩餘頁面。
+- 轉檔失敗且尚未送出任何頁面時回傳 JSON 錯誤；已開始串流後失敗則直接中斷連線
+  (不送出 chunked 結尾)，用戶端會得到不完整的回應而非看似成功的 ZIP。
+"""
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .archives import DUPLICATES_NAME
+from .engine import ConversionEngine, RenderPool, make_settings
+
+
+def _flag(value):
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+# 請求可覆寫的設定 -> 型別
+REQUEST_SETTINGS = {"dpi": int, "fit_px": int, "max_mp": float, "min_dpi": int, "max_dpi": int,
+                    "start": int, "end": int, "angle": int, "fmt": str, "encoder": str,
+                    "color": str, "skip_blank": _flag, "dedup": _flag}
+
+COPY_CHUNK = 1 << 20
+
+
+class ChunkedWriter:
+    """以 HTTP/1.1 chunked 編碼寫出；第一次寫入時才送出回應標頭"""
+
+    def __init__(self, handler, filename):
+        self.handler = handler
+        self.filename = filename
+        self.started = False
+
+    def write(self, data):
+        if not data:
+            return 0
+        if not self.started:
+            self.started = True
+            h = self.handler
+            h.send_response(200)
+            h.send_header("Content-Type", "application/zip")
+            h.send_header("Content-Disposition", f'attachment; filename="{self.filename}"')
+            h.send_header("Transfer-Encoding", "chunked")
+            h.end_headers()
+        out = self.handler.wfile
+        out.write(b"%x\r\n" % len(data))
+        out.write(data)
+        out.write(b"\r\n")
+        return len(data)
+
+    def flush(self):
+        self.handler.wfile.flush()
+
+    def end(self):
+        self.handler.wfile.write(b"0\r\n\r\n")
+        self.handler.wfile.flush()
+
+
+class StreamingZip:
+    """供 ConversionEngine(archives=...) 使用：頁面完成即寫入回應串流"""
+
+    def __init__(self, writer, stop_event):
+        self.writer = writer
+        self.stop_event = stop_event
+        self.zf = zipfile.ZipFile(writer, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        self.links = {}   # 重複頁面名稱 -> 原始頁面名稱
+
+    def write(self, path, archive, pages, p_num, name, data, last=True):
+        try:
+            self.zf.writestr(name, data)
+            self.writer.flush()
+        except OSError:
+            self.stop_event.set()  # 用戶端已中斷連線，取消其餘頁面
+            raise
+        return name
+
+    def skip(self, path, archive, pages, p_num):
+        pass
+
+    def link(self, path, archive, pages, name, original):
+        self.links[name] = original
+        return name
+
+    def finish(self, path):
+        pass
+
+    def close_all(self):
+        pass
+
+    def close(self):
+        """寫出 ZIP 目錄與 chunked 結尾"""
+        if self.links:
+            self.zf.writestr(DUPLICATES_NAME, json.dumps(self.links, ensure_ascii=False, indent=1))
+        self.zf.close()
+        self.writer.end()
+
+    def abort(self):
+        """放棄這份 ZIP：不寫出目錄 (否則 ZipFile 回收時仍會寫入已回應過錯誤的連線)"""
+        self.zf.fp = None
+
+
+class AdmissionQueue:
+    """轉檔名額：固定數量的 slot (各自的行程池) 加上有上限的等待佇列"""
+
+    def __init__(self, slots, max_waiting):
+        self.free = queue.Queue()
+        for slot in slots:
+            self.free.put(slot)
+        self.total = len(slots)
+        self.max_waiting = max_waiting
+        self.waiting = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """取得名額；佇列已滿或等待逾時回傳 None"""
+        with self.lock:
+            if self.waiting >= self.max_waiting and self.free.empty():
+                return None
+            self.waiting += 1
+        try:
+            return self.free.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        finally:
+            with self.lock:
+                self.waiting -= 1
+
+    def release(self, slot):
+        self.free.put(slot)
+
+    def stats(self):
+        with self.lock:
+            return {"slots": self.total, "busy": self.total - self.free.qsize(), "waiting": self.waiting}
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "pdfconv"
+
+    def log_message(self, format, *args):
+        self.server.log(f"🌐 {self.address_string()} {format % args}")
+
+    def send_json(self, code, payload, headers=None):
+        if code >= 400:
+            self.close_connection = True  # 上傳內容可能尚未讀取，不能沿用此連線
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self.send_json(200, {"status": "ok", **self.server.admission.stats()})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/convert":
+            self.send_json(404, {"error": "not found"})
+            return
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            overrides = {k: conv(params[k]) for k, conv in REQUEST_SETTINGS.items() if params.get(k)}
+            settings = make_settings(**dict(self.server.base_settings, **overrides, mode="zip", incremental=False))
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        tmp_dir = tempfile.mkdtemp(prefix="pdfconv-")
+        try:
+            source = self.receive_source(params, tmp_dir)
+            if source is None:
+                return
+            slot = self.server.admission.acquire(self.server.queue_timeout)
+            if slot is None:
+                self.send_json(503, {"error": "伺服器忙碌中，請稍後再試"}, {"Retry-After": "5"})
+                return
+            try:
+                self.convert(source, settings, slot, params.get("password"))
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+                self.server.log(f"⚠️ 用戶端已中斷連線：{os.path.basename(source)}")
+            finally:
+                self.server.admission.release(slot)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def receive_source(self, params, tmp_dir):
+        """取得要轉換的 PDF 路徑：允許的本機路徑，或將上傳內容寫入暫存檔"""
+        if params.get("path"):
+            path = os.path.realpath(params["path"])
+            roots = self.server.path_roots
+            if not any(os.path.commonpath([path, r]) == r for r in roots):
+                self.send_json(403, {"error": "不允許存取此路徑 (請以 --path-root 設定允許的資料夾)"})
+                return None
+            if not os.path.isfile(path):
+                self.send_json(404, {"error": f"找不到檔案: {params['path']}"})
+                return None
+            return path
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self.send_json(400, {"error": "請上傳 PDF 內容或指定 path"})
+            return None
+        if length > self.server.max_upload:
+            self.send_json(413, {"error": "檔案過大"})
+            return None
+        name = os.path.basename(params.get("name") or "upload.pdf")
+        if not name.lower().endswith(".pdf"):
+            name += ".pdf"
+        path = os.path.join(tmp_dir, name)
+        with open(path, "wb") as f:
+            remaining = length
+            while remaining:
+                chunk = self.rfile.read(min(COPY_CHUNK, remaining))
+                if not chunk:
+                    raise ConnectionError("上傳中斷")
+                f.write(chunk)
+                remaining -= len(chunk)
+        return path
+
+    def convert(self, source, settings, pool, password):
+        stop = threading.Event()
+        timer = threading.Timer(self.server.request_timeout, stop.set)
+        timer.daemon = True
+        base = os.path.splitext(os.path.basename(source))[0]
+        writer = ChunkedWriter(self, f"{base}_images.zip".encode("ascii", "replace").decode())
+        stream = StreamingZip(writer, stop)
+        errors = []
+
+        def on_event(kind, data):
+            if kind == "error":
+                errors.append(data)
+
+        engine = ConversionEngine(settings, on_event=on_event, ask_password=lambda path: password,
+                                  stop_event=stop, pool=pool, archives=stream)
+        timer.start()
+        try:
+            status = engine.run([source])
+        finally:
+            timer.cancel()
+
+        result = engine.results.get(source) or {"status": "error", "error": None}
+        if status == "done" and result["status"] == "done":
+            stream.close()
+            return
+        stream.abort()
+        if not writer.started:
+            if stop.is_set():
+                self.send_json(504, {"error": "轉檔逾時"})
+            else:
+                error = result.get("error")
+                if not error:
+                    error = "無法開啟 PDF (加密檔請提供 password)" if result["status"] == "skipped" else \
+                        (errors[0] if errors else "轉檔失敗")
+                self.send_json(422, {"error": error})
+            return
+        # 已開始串流：中斷連線，讓用戶端知道回應不完整
+        self.server.log(f"⚠️ 轉檔未完成，中斷串流：{os.path.basename(source)} ({status})")
+        self.close_connection = True
+
+
+class ConversionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, base_settings, concurrency=2, max_queue=8, queue_timeout=30.0,
+                 request_timeout=300.0, max_upload_mb=512, path_roots=(), on_log=None):
+        self.base_settings = base_settings
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.max_upload = max_upload_mb << 20
+        self.path_roots = [os.path.realpath(r) for r in path_roots]
+        self.on_log = on_log or (lambda msg: None)
+        # 每個名額一個預熱的行程池：同時執行的請求互不干擾，總行程數 = concurrency × workers
+        self.pools = [RenderPool(base_settings["workers"]) for _ in range(max(1, concurrency))]
+        for pool in self.pools:
+            pool.warm()
+        self.admission = AdmissionQueue(self.pools, max_queue)
+        super().__init__(address, ConversionHandler)
+
+    def log(self, msg):
+        self.on_log(msg)
+
+    def server_close(self):
+        super().server_close()
+        for pool in self.pools:
+            pool.shutdown()
@@ -0,0 +1,91 @@
+"""文件工作階段：分析階段開啟的 PDF 直接沿用到渲染階段
+
+每個 PDF 只開啟 (解密) 一次；已開啟的文件以 LRU 方式保留，
+超過上限時關閉最久未使用的文件，避免大批次耗盡檔案描述元。
+頁數、頁面尺寸與密碼等解析結果則一直保留，重新開啟時不必再詢問密碼。
+pdfium 不是執行緒安全的；同一行程內有多個引擎同時執行時 (例如 HTTP 服務)，
+開啟與關閉文件以 PDFIUM_LOCK 序列化，渲染則交給各自的子行程池。
+檔案的讀取方式 (lazy / mmap / prefetch) 見 pdfconv.sources。
+"""
+import threading
+from collections import OrderedDict
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+
+from .profiler import NULL_PROFILER
+from .sources import open_source
+
+PDFIUM_LOCK = threading.RLock()
+
+
+class DocumentSessions:
+    def __init__(self, limit=32, prof=NULL_PROFILER, read="lazy", prefetcher=None):
+        self.limit = max(1, limit)
+        self.prof = prof               # 量測開啟 (解密、解析) 文件的 open 階段
+        self.read = read               # 讀取方式：lazy / mmap / prefetch
+        self.prefetcher = prefetcher   # 背景預讀 (prefetch 模式，僅主行程)
+        self.handles = OrderedDict()   # path -> PdfDocument (LRU 順序)
+        self.meta = {}                 # path -> {"Pages", "_pw", "sizes", "objects"}
+
+    def open(self, path, password=None):
+        """取得已開啟的文件；尚未開啟 (或已被淘汰) 時才真正開啟"""
+        pdf = self.handles.get(path)
+        if pdf is not None:
+            self.handles.move_to_end(path)
+            return pdf
+
+        if password is None and path in self.meta:
+            password = self.meta[path]["_pw"]
+        with self.prof.stage("open", path):
+            source = open_source(path, self.read, self.prefetcher)  # 整檔讀入時不佔用 PDFIUM_LOCK
+            with PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(source, password=password)
+                self.handles[path] = pdf
+                if path not in self.meta:
+                    self.meta[path] = {
+                        "Pages": len(pdf),
+                        "_pw": password,
+                        "sizes": [pdf.get_page_size(i) for i in range(len(pdf))],
+                    }
+        self._evict()
+        return pdf
+
+    def info(self, path, password=None):
+        """開啟文件並回傳解析結果 (頁數、密碼、各頁尺寸，單位為 PDF 點)"""
+        if path not in self.meta:
+            self.open(path, password)
+        return self.meta[path]
+
+    def page_objects(self, path):
+        """各頁的頁面物件數 (需載入頁面內容，只在排程需要時才計算並保留)"""
+        meta = self.meta[path]
+        if "objects" not in meta:
+            pdf = self.open(path)
+            counts = []
+            with PDFIUM_LOCK:
+                for i in range(len(pdf)):
+                    page = pdf[i]
+                    counts.append(pdfium_c.FPDFPage_CountObjects(page.raw))
+                    page.close()
+            meta["objects"] = counts
+        return meta["objects"]
+
+    def release(self, path):
+        """文件已處理完畢：關閉檔案但保留解析結果"""
+        pdf = self.handles.pop(path, None)
+        if pdf is not None:
+            with PDFIUM_LOCK:
+                pdf.close()
+
+    def close_all(self):
+        with PDFIUM_LOCK:
+            while self.handles:
+                _, pdf = self.handles.popitem(last=False)
+                pdf.close()
+
+    def _evict(self):
+        with PDFIUM_LOCK:
+            while len(self.handles) > self.limit:
+                _, pdf = self.handles.popitem(last=False)
+                pdf.close()
@@ -0,0 +1,54 @@
+"""依頁面尺寸逐頁決定渲染解析度
+
+固定 DPI 對混合尺寸的批次並不合適：A4 頁面剛好的 300 DPI，用在 A0 工程圖上會產生上億像素的點陣圖，
+之後還得另外縮小。以下設定在渲染前由頁面尺寸 (pdfium 的 point，不需渲染) 算出每頁的 DPI：
+
+- fit_px：最長邊縮放至指定像素 (取代固定 DPI，小頁面會放大)
+- min_dpi / max_dpi：限制上述結果的 DPI 範圍 (例如最長邊 2000 px，但小頁面不超過 600 DPI)
+- max_mp：單頁像素數上限 (百萬像素)，最後套用，超大頁面一律縮小至上限內
+
+皆未設定時即為原本的固定 DPI。旋轉不影響最長邊與像素數。
+"""
+import math
+
+SIZING_KEYS = ["fit_px", "max_mp", "min_dpi", "max_dpi"]
+
+# 避免浮點誤差讓 ceil 後的邊長多出 1 像素
+_EPSILON = 1e-9
+
+
+def page_dpi(size, settings):
+    """單頁實際渲染的 DPI；size 為頁面的 (寬, 高) point"""
+    width, height = size
+    dpi = float(settings["dpi"])
+    if settings["fit_px"]:
+        dpi = settings["fit_px"] * 72.0 / max(width, height)
+    if settings["max_dpi"]:
+        dpi = min(dpi, settings["max_dpi"])
+    if settings["min_dpi"]:
+        dpi = max(dpi, settings["min_dpi"])
+    if settings["max_mp"]:
+        dpi = min(dpi, max_mp_scale(width, height, settings["max_mp"] * 1e6) * 72.0)
+    return dpi * (1 - _EPSILON)
+
+
+def max_mp_scale(width, height, pixels):
+    """像素數不超過 pixels 的最大 scale；寬高各以無條件進位計，故解 (w·s + 1)(h·s + 1) = pixels"""
+    a, b, c = width * height, width + height, 1 - pixels
+    return max((-b + math.sqrt(b * b - 4 * a * c)) / (2 * a), 1.0 / max(width, height))
+
+
+def page_scale(size, settings):
+    """page.render 的 scale 參數 (每 point 的像素數)"""
+    return page_dpi(size, settings) / 72.0
+
+
+def check_sizing(settings):
+    """檢查尺寸設定並轉為數值 (0 = 不使用)"""
+    for key in ("fit_px", "min_dpi", "max_dpi"):
+        settings[key] = int(settings[key] or 0)
+    settings["max_mp"] = float(settings["max_mp"] or 0)
+    if any(settings[k] < 0 for k in SIZING_KEYS):
+        raise ValueError("尺寸設定不可為負數")
+    if settings["min_dpi"] and settings["max_dpi"] and settings["min_dpi"] > settings["max_dpi"]:
+        raise ValueError(f"最小 DPI ({settings['min_dpi']}) 不可大於最大 DPI ({settings['max_dpi']})")
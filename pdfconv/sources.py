@@ -0,0 +1,126 @@
+"""PDF 來源的讀取方式
+
+- lazy：把路徑交給 pdfium，渲染時才依需要隨機讀取檔案的各個區段 (預設，記憶體用量最低)
+- mmap：記憶體對應檔案，由作業系統分頁讀入；同一檔案被多個行程開啟時共用頁面快取
+- prefetch：整個檔案一次循序讀入記憶體後再交給 pdfium。網路磁碟上每次小區段的隨機讀取
+  都是一次往返，循序讀完整個檔案通常快得多；主行程另以背景 I/O 執行緒先讀取接下來的檔案，
+  讀檔與分析、渲染重疊進行
+
+超過 PREFETCH_MAX_MB 的檔案不整檔讀入，改用 mmap。
+"""
+import ctypes
+import mmap
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .profiler import NULL_PROFILER
+
+READ_MODES = ["lazy", "mmap", "prefetch"]
+
+# 整檔預讀的單檔上限 (MB)，避免大型 PDF 佔滿記憶體
+PREFETCH_MAX_MB = 512
+
+# 背景預讀時，領先目前分析中檔案的檔案數
+PREFETCH_AHEAD = 2
+
+# 循序讀取的區塊大小
+_READ_CHUNK = 8 << 20
+
+
+def read_whole(path):
+    """以大區塊循序讀入整個檔案，回傳可交給 pdfium 的 ctypes 陣列 (不另外複製)"""
+    size = os.path.getsize(path)
+    buf = bytearray(size)
+    view = memoryview(buf)
+    pos = 0
+    with open(path, "rb", buffering=0) as f:
+        while pos < size:
+            n = f.readinto(view[pos:pos + _READ_CHUNK])
+            if not n:
+                break
+            pos += n
+    view.release()
+    return (ctypes.c_char * pos).from_buffer(buf)
+
+
+def map_file(path):
+    """記憶體對應檔案，回傳可交給 pdfium 的 ctypes 陣列 (參照住 mmap，文件關閉後一併釋放)
+
+    以 ACCESS_COPY 對應：pdfium 只會讀取，但 ctypes 需要可寫的緩衝區，寫入也不會回寫檔案。
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            raise ValueError(f"檔案是空的: {path}")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    return (ctypes.c_char * size).from_buffer(mm)
+
+
+def open_source(path, read, prefetcher=None):
+    """依讀取方式取得 PdfDocument 的輸入 (路徑，或 mmap / 記憶體內容的 ctypes 陣列)"""
+    if read == "lazy":
+        return path
+    if read == "prefetch" and os.path.getsize(path) <= PREFETCH_MAX_MB << 20:
+        data = prefetcher.take(path) if prefetcher is not None else None
+        return data if data is not None else read_whole(path)
+    return map_file(path)
+
+
+class Prefetcher:
+    """背景 I/O 執行緒：在檔案被開啟前先整檔讀入記憶體
+
+    ahead(files) 包裝輸入清單，每產出一個檔案時，其後 PREFETCH_AHEAD 個檔案已在背景讀取；
+    開啟文件時以 take(path) 取用 (尚未讀完則等待)。同時只保留少量已讀入的檔案。
+    """
+
+    def __init__(self, prof=NULL_PROFILER, depth=PREFETCH_AHEAD):
+        self.prof = prof
+        self.depth = max(1, depth)
+        self.lock = threading.Lock()
+        self.pending = {}   # path -> Future (read_whole 的結果)
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="pdfconv-io")
+
+    def _read(self, path):
+        with self.prof.stage("read", path):
+            return read_whole(path)
+
+    def _submit(self, path):
+        try:
+            if os.path.getsize(path) > PREFETCH_MAX_MB << 20:
+                return
+        except OSError:
+            return  # 讀不到的檔案交給開啟時回報錯誤
+        with self.lock:
+            if path not in self.pending:
+                self.pending[path] = self.executor.submit(self._read, path)
+
+    def ahead(self, files):
+        """逐一產出 files，同時預讀接下來的檔案"""
+        window = deque()
+        for f in files:
+            window.append(f)
+            self._submit(f)
+            if len(window) > self.depth:
+                yield window.popleft()
+        while window:
+            yield window.popleft()
+
+    def take(self, path):
+        """取出已預讀的內容；沒有預讀或讀取失敗時回傳 None (改為當場讀取)"""
+        with self.lock:
+            future = self.pending.pop(path, None)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except OSError:
+            return None
+
+    def close(self):
+        """丟棄尚未取用的預讀內容 (批次結束時呼叫；I/O 執行緒保留給下一批)"""
+        with self.lock:
+            futures, self.pending = list(self.pending.values()), {}
+        for future in futures:
+            future.cancel()
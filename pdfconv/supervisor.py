@@ -0,0 +1,333 @@
+"""受監督的渲染子行程
+
+pdfium 遇到損毀或極端複雜的頁面時，可能長時間卡在單一次 render 呼叫、耗盡記憶體，甚至讓行程直接崩潰，
+這些都無法在行程內攔截。SupervisedPool 的每個子行程由主行程的監督執行緒看管：
+
+- 子行程開始渲染每一頁前先回報頁碼 (page_started)，渲染完成後回報 (page_rendered)；
+  單頁渲染超過時間上限即強制結束該子行程 (timeout)。編碼與寫檔不計時，排在管線中的其他頁面也不會算到這一頁
+- 子行程內的監看執行緒檢查自身記憶體用量，超過上限時回報後自行結束 (memory)
+- 子行程意外結束時 (crash)，以最後回報的頁碼判定是哪一頁
+- 取消時仍在渲染的子行程於短暫寬限後直接結束 (cancelled)，不必等整頁渲染完
+
+以上情況只有該子行程受影響：它的工作以 WorkerLost 結束 (附上工作、頁碼與原因)，子行程隨即重新啟動，
+其他子行程照常執行。與子行程之間以 Pipe 同步傳送訊息 (不經背景執行緒)，子行程結束前送出的訊息不會遺失。
+"""
+import ctypes
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait
+from multiprocessing import connection
+
+SUPERVISE_INTERVAL = 0.1  # 監督執行緒檢查逾時與取消的間隔 (秒)
+CANCEL_GRACE = 0.3        # 取消後等待子行程自行停下的秒數，之後強制結束
+MEMORY_POLL = 0.1         # 子行程檢查自身記憶體用量的間隔 (秒)
+MAX_START_FAILURES = 3    # 子行程連續無法啟動的次數上限，超過即放棄並讓所有工作失敗
+
+# 子行程端的狀態 (只在受監督的子行程中設定)
+_child = {"send": None, "memory_mb": 0}
+
+
+class WorkerLost(Exception):
+    """子行程在工作途中結束；reason 為 crash / timeout / memory / cancelled，page 為當時處理中的頁碼 (可能為 None)"""
+
+    def __init__(self, item, page, reason, detail=""):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.item = item
+        self.page = page
+        self.reason = reason
+        self.detail = detail
+
+
+def current_rss():
+    """目前行程的常駐記憶體 (bytes)；無法取得目前值的平台 (macOS) 以峰值代替"""
+    if sys.platform == "win32":
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong)] + \
+                       [(name, ctypes.c_size_t) for name in (
+                           "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                           "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def page_started(page):
+    """子行程回報開始處理某一頁 (逾時由此時起算)；不在受監督的子行程中時不做任何事"""
+    if _child["send"] is not None:
+        _child["send"](("page", page))
+
+
+def page_rendered():
+    """子行程回報目前頁面已渲染完成，停止計時 (崩潰時仍歸咎於此頁，直到下一頁開始)"""
+    if _child["send"] is not None:
+        _child["send"](("rendered", None))
+
+
+class _ChildEvents:
+    """子行程的事件出口，介面同 Queue.put；由監督執行緒轉送到 SupervisedPool.events"""
+
+    def __init__(self, send):
+        self.send = send
+
+    def put(self, event):
+        self.send(("event", event))
+
+
+def _watch_memory():
+    while True:
+        time.sleep(MEMORY_POLL)
+        limit = _child["memory_mb"]
+        if limit and current_rss() > limit << 20:
+            _child["send"](("abort", ("memory", f"{current_rss() >> 20} MB，上限 {limit} MB")))
+            os._exit(1)
+
+
+def _worker_main(conn, cancel_event, run, init):
+    lock = threading.Lock()
+
+    def send(msg):
+        with lock:  # 管線的寫檔執行緒也會送出事件
+            conn.send(msg)
+
+    _child["send"] = send
+    if init is not None:
+        init(cancel_event, _ChildEvents(send))
+    threading.Thread(target=_watch_memory, daemon=True).start()
+    send(("ready", os.getpid()))
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        if msg[0] == "stop":
+            return
+        _, item, memory_mb = msg
+        _child["memory_mb"] = memory_mb
+        try:
+            result = run(item)
+        finally:
+            _child["memory_mb"] = 0
+        send(("done", result))
+
+
+class _Job:
+    def __init__(self, item, timeout, memory_mb):
+        self.future = Future()
+        self.item = item
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.ready = False
+        self.job = None
+        self.page = None
+        self.started = None       # 目前頁面開始渲染的時間；尚未開始或渲染完成後為 None (不計時)
+        self.abort = None         # (原因, 說明)：由監督執行緒強制結束或子行程自行回報
+        self.cancel_since = None
+
+
+class SupervisedPool:
+    """受監督的子行程池：submit(item) 回傳 Future，於子行程中執行 run(item)
+
+    init(cancel_event, events) 於子行程啟動時呼叫；子行程以 events.put() 送出的事件
+    依序出現在 self.events (queue.Queue)。cancel_event 設定後，子行程應盡快停止目前的工作。
+    """
+
+    def __init__(self, workers, run, init=None):
+        self.workers = max(1, workers)
+        self.run = run
+        self.init = init
+        self.ctx = multiprocessing.get_context("spawn")
+        self.cancel_event = self.ctx.Event()
+        self.events = queue.Queue()
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.broken = None
+        self.start_failures = 0
+        self.wake_r, self.wake_w = self.ctx.Pipe(duplex=False)
+        self.slots = [self._spawn() for _ in range(self.workers)]
+        self.thread = threading.Thread(target=self._supervise, name="pdfconv-supervisor", daemon=True)
+        self.thread.start()
+
+    def _spawn(self):
+        parent_conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(target=_worker_main, args=(child_conn, self.cancel_event, self.run, self.init),
+                                   daemon=True)
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _wake(self):
+        try:
+            self.wake_w.send_bytes(b"")
+        except OSError:
+            pass
+
+    def warm(self, timeout=60):
+        """等待所有子行程啟動完成 (已載入 pdfium / Pillow)"""
+        deadline = time.monotonic() + timeout
+        while not all(w.ready for w in self.slots) and time.monotonic() < deadline and self.broken is None:
+            time.sleep(0.02)
+
+    def submit(self, item, timeout=0, memory_mb=0):
+        """排入工作；timeout 為單頁秒數上限，memory_mb 為子行程記憶體上限 (0 = 不限制)"""
+        job = _Job(item, timeout, memory_mb)
+        with self.lock:
+            if self.closed or self.broken is not None:
+                raise RuntimeError(self.broken or "子行程池已關閉")
+            self.pending.append(job)
+        self._wake()
+        return job.future
+
+    def cancel(self, futures):
+        """取消尚未開始的工作，執行中的工作於寬限時間後連同子行程結束；等待全部結束"""
+        self.cancel_event.set()
+        for fut in futures:
+            fut.cancel()
+        self._wake()
+        wait(futures)
+
+    def shutdown(self):
+        with self.lock:
+            self.closed = True
+            jobs, self.pending = list(self.pending), deque()
+        for job in jobs:
+            job.future.cancel()
+        self._wake()
+        self.thread.join()
+        for w in self.slots:
+            try:
+                w.conn.send(("stop",))
+            except OSError:
+                pass
+        for w in self.slots:
+            w.process.join(timeout=5)
+            if w.process.is_alive():
+                w.process.kill()
+                w.process.join()
+            if w.job is not None:
+                w.job.future.set_exception(WorkerLost(w.job.item, w.page, "cancelled"))
+
+    # ---------- 監督執行緒 ----------
+    def _supervise(self):
+        while not self.closed:
+            conns = {w.conn: w for w in self.slots}
+            sentinels = {w.process.sentinel: w for w in self.slots}
+            ready = connection.wait(list(conns) + list(sentinels) + [self.wake_r], timeout=SUPERVISE_INTERVAL)
+            while self.wake_r.poll():
+                self.wake_r.recv_bytes()
+            for obj in ready:
+                if obj in conns:
+                    self._drain(conns[obj])
+            for obj in ready:
+                if obj in sentinels:
+                    self._lost(sentinels[obj])
+            self._check_limits()
+            self._dispatch()
+
+    def _drain(self, w):
+        """讀取子行程送來的所有訊息"""
+        while True:
+            try:
+                if not w.conn.poll():
+                    return
+                kind, data = w.conn.recv()
+            except (EOFError, OSError):
+                return
+            if kind == "event":
+                self.events.put(data)
+            elif kind == "page":
+                w.page, w.started = data, time.monotonic()
+            elif kind == "rendered":
+                w.started = None
+            elif kind == "done":
+                job, w.job, w.page, w.started = w.job, None, None, None
+                job.future.set_result(data)
+            elif kind == "abort":
+                w.abort = data
+            elif kind == "ready":
+                w.ready = True
+                self.start_failures = 0
+
+    def _lost(self, w):
+        """子行程已結束：讓它的工作以 WorkerLost 結束，並在原位置重新啟動子行程"""
+        self._drain(w)  # 結束前送出的訊息 (已完成的頁面) 先處理
+        w.process.join()
+        if w.job is not None:
+            reason, detail = w.abort or ("crash", f"子行程異常結束 (結束代碼 {w.process.exitcode})")
+            w.job.future.set_exception(WorkerLost(w.job.item, w.page, reason, detail))
+        w.conn.close()
+        if not w.ready:
+            self.start_failures += 1
+        if self.start_failures >= MAX_START_FAILURES:
+            self._break(f"子行程無法啟動 (結束代碼 {w.process.exitcode})")
+            return
+        self.slots[self.slots.index(w)] = self._spawn()
+
+    def _break(self, message):
+        """無法維持子行程：停止監督，等待中的工作全部失敗"""
+        with self.lock:
+            self.broken = message
+            self.closed = True
+            jobs, self.pending = list(self.pending), deque()
+        for job in jobs:
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_exception(RuntimeError(message))
+
+    def _check_limits(self):
+        now = time.monotonic()
+        cancelling = self.cancel_event.is_set()
+        for w in self.slots:
+            if w.job is None or w.abort is not None:
+                w.cancel_since = None
+                continue
+            if w.job.timeout and w.started is not None and now - w.started > w.job.timeout:
+                w.abort = ("timeout", f"超過 {w.job.timeout:g} 秒")
+                w.process.kill()
+            elif cancelling:
+                if w.cancel_since is None:
+                    w.cancel_since = now
+                elif now - w.cancel_since > CANCEL_GRACE:
+                    w.abort = ("cancelled", "")
+                    w.process.kill()
+            else:
+                w.cancel_since = None
+
+    def _dispatch(self):
+        for w in self.slots:
+            if w.job is not None or not w.ready or not w.process.is_alive():
+                continue  # 尚未啟動完成的子行程不派送，逾時才不會算入啟動時間
+            with self.lock:
+                job = None
+                while self.pending:
+                    candidate = self.pending.popleft()
+                    if candidate.future.set_running_or_notify_cancel():
+                        job = candidate
+                        break
+            if job is None:
+                return
+            # 開啟文件等前置工作不計時，由子行程的 page_started 開始計算第一頁
+            w.job, w.page, w.started, w.abort = job, None, None, None
+            try:
+                w.conn.send(("run", job.item, job.memory_mb))
+            except OSError:
+                pass  # 子行程剛好結束，由 _lost 處理
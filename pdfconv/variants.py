@@ -0,0 +1,74 @@
+"""一次渲染、多種尺寸輸出 (縮圖、預覽圖)
+
+每頁只以主設定的 DPI 呼叫一次 page.render，其餘尺寸由同一張點陣圖縮小而來
+(reducing_gap 讓 Pillow 先以整數倍 reduce 快速縮小，再做高品質重取樣)；
+各尺寸可有自己的格式與編碼設定檔，輸出檔名為 page_<頁碼>_<後綴>.<副檔名>。
+"""
+import io
+
+from PIL import Image
+
+from .encoders import ENCODER_PROFILES, PIL_FORMATS, extension, pil_format, save_options, supports_rgbx
+
+
+def parse_variant(spec):
+    """解析 "後綴:最長邊像素[:格式[:編碼設定]]"，例如 thumb:150:JPG 或 preview:1024:WEBP:fast"""
+    parts = spec.split(":")
+    if len(parts) < 2 or len(parts) > 4:
+        raise ValueError(f"尺寸設定格式錯誤 (後綴:最長邊像素[:格式[:編碼設定]]): {spec}")
+    try:
+        max_px = int(parts[1])
+    except ValueError:
+        raise ValueError(f"尺寸設定的像素值錯誤: {spec}") from None
+    return {"suffix": parts[0], "max_px": max_px,
+            "fmt": parts[2] if len(parts) > 2 else None,
+            "encoder": parts[3] if len(parts) > 3 else None}
+
+
+def normalize_variants(variants, fmt, encoder):
+    """檢查尺寸設定；未指定格式與編碼設定者沿用主設定"""
+    result = []
+    for v in variants or []:
+        if isinstance(v, str):
+            v = parse_variant(v)
+        v = {"suffix": v["suffix"], "max_px": int(v["max_px"]),
+             "fmt": (v.get("fmt") or fmt).upper(), "encoder": v.get("encoder") or encoder}
+        if not v["suffix"] or not v["suffix"].replace("-", "").replace("_", "").isalnum():
+            raise ValueError(f"尺寸後綴只能使用英數字、- 與 _: {v['suffix']}")
+        if v["max_px"] <= 0:
+            raise ValueError(f"尺寸必須大於 0: {v['suffix']}")
+        if v["fmt"] not in PIL_FORMATS:
+            raise ValueError(f"不支援的圖片格式: {v['fmt']}")
+        if v["encoder"] not in ENCODER_PROFILES:
+            raise ValueError(f"不支援的編碼設定: {v['encoder']}")
+        if any(r["suffix"] == v["suffix"] for r in result):
+            raise ValueError(f"尺寸後綴重複: {v['suffix']}")
+        result.append(v)
+    return result
+
+
+def variant_filename(stem, variant):
+    """主輸出檔名 (不含副檔名) 加上後綴與該尺寸的副檔名"""
+    return f"{stem}_{variant['suffix']}.{extension(variant['fmt'])}"
+
+
+def resize_to_fit(image, max_px):
+    """等比例縮小至最長邊不超過 max_px；原圖已夠小時直接回傳 (不放大)"""
+    width, height = image.size
+    scale = max_px / max(width, height)
+    if scale >= 1:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+def encode_variant(image, variant):
+    """由主點陣圖產生並編碼一個尺寸，回傳 bytes"""
+    if image.mode == "1":
+        image = image.convert("L")  # 1-bit 主圖縮小時以灰階重取樣，避免鋸齒
+    im = resize_to_fit(image, variant["max_px"])
+    if im.mode == "RGBX" and not supports_rgbx(variant["fmt"]):
+        im = im.convert("RGB")
+    buf = io.BytesIO()
+    im.save(buf, pil_format(variant["fmt"]), **save_options(variant["fmt"], variant["encoder"], im.mode))
+    return buf.getbuffer()
@@ -0,0 +1,184 @@
+"""資料夾監看服務：掃描器或上游系統把 PDF 放進收件資料夾後自動轉檔
+
+- 有安裝 watchdog 時以檔案系統通知 (Linux inotify、Windows ReadDirectoryChangesW) 即時喚醒，
+  否則定期輪詢；兩者都以重新掃描資料夾為準，通知只用來縮短等待時間。
+- 檔案大小與修改時間連續 settle 秒不變、且可以開啟時，才視為寫入完成。
+- 平行轉檔使用預熱過的常駐 RenderPool，每個檔案的延遲不含行程啟動與載入 pdfium 的時間。
+- 每個 PDF 處理完後在旁邊寫入 <檔名>.pdf.done (失敗為 .failed) 標記，內容為 JSON 結果；
+  標記比 PDF 新時不再重複處理，刪除標記或更新 PDF 即可重新轉檔。
+"""
+import json
+import os
+import threading
+import time
+
+from .discovery import collect_inputs
+from .engine import ConversionEngine, RenderPool, needs_pool
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+DONE_SUFFIX = ".done"
+FAILED_SUFFIX = ".failed"
+
+# 單批最多處理的檔案數：持續有檔案湧入時，新到的檔案不必等待過長的批次
+MAX_BATCH = 32
+
+
+def marker_path(path, ok):
+    return path + (DONE_SUFFIX if ok else FAILED_SUFFIX)
+
+
+def is_processed(path, st):
+    """已有比 PDF 新的完成 / 失敗標記"""
+    for suffix in (DONE_SUFFIX, FAILED_SUFFIX):
+        try:
+            if os.stat(path + suffix).st_mtime_ns >= st.st_mtime_ns:
+                return True
+        except OSError:
+            pass
+    return False
+
+
+def write_marker(path, result, seconds):
+    """寫入完成標記 (先寫暫存檔再更名，讓下游看到的標記一定是完整的)"""
+    ok = result["status"] == "done"
+    other = marker_path(path, not ok)
+    if os.path.exists(other):
+        os.remove(other)
+    target = marker_path(path, ok)
+    tmp = target + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.basename(path), "seconds": round(seconds, 3), **result},
+                  f, ensure_ascii=False, indent=2)
+    os.replace(tmp, target)
+    return target
+
+
+def _can_open(path):
+    """Windows 上寫入中的檔案通常被鎖定而無法開啟"""
+    try:
+        with open(path, "rb"):
+            return True
+    except OSError:
+        return False
+
+
+class FolderWatcher:
+    def __init__(self, dirs, recursive=False, settle=2.0, poll_interval=2.0):
+        self.dirs = list(dirs)
+        self.recursive = recursive
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.wake = threading.Event()
+        self.seen = {}          # 路徑 -> ((大小, 修改時間), 最後一次變動的時間)
+        self.observer = None
+
+    def start(self):
+        if not WATCHDOG_AVAILABLE:
+            return
+        wake = self.wake
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake.set()
+
+        self.observer = Observer()
+        for d in self.dirs:
+            self.observer.schedule(_Handler(), d, recursive=self.recursive)
+        self.observer.start()
+
+    def stop(self):
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+
+    def ready_files(self):
+        """掃描一次，回傳已寫入完成且尚未處理的 PDF"""
+        now = time.monotonic()
+        ready = []
+        present = set()
+        for path in collect_inputs(self.dirs, recursive=self.recursive):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if is_processed(path, st):
+                continue
+            present.add(path)
+            sig = (st.st_size, st.st_mtime_ns)
+            prev = self.seen.get(path)
+            if prev is None or prev[0] != sig:
+                self.seen[path] = (sig, now)
+            elif st.st_size > 0 and now - prev[1] >= self.settle and _can_open(path):
+                ready.append(path)
+        for path in list(self.seen):
+            if path not in present:
+                del self.seen[path]
+        return ready
+
+    def wait(self):
+        """等待下一次掃描：有檔案尚在寫入時縮短間隔，有通知時提前喚醒"""
+        timeout = min(self.poll_interval, self.settle / 2) if self.seen else self.poll_interval
+        self.wake.wait(timeout)
+        self.wake.clear()
+
+
+class WatchService:
+    """常駐轉檔服務；stop_event 設定後於目前批次結束時停止"""
+
+    def __init__(self, dirs, settings, recursive=False, settle=2.0, poll_interval=2.0,
+                 on_event=None, ask_password=None, stop_event=None):
+        self.settings = settings
+        self.watcher = FolderWatcher(dirs, recursive, settle, poll_interval)
+        self.on_event = on_event or (lambda kind, data: None)
+        self.ask_password = ask_password
+        self.stop_event = stop_event or threading.Event()
+
+    def log(self, msg):
+        self.on_event("log", msg)
+
+    def serve(self):
+        pool = None
+        if needs_pool(self.settings):
+            pool = RenderPool(self.settings["workers"])
+            pool.warm()
+        self.watcher.start()
+        how = "檔案系統通知" if self.watcher.observer is not None else f"每 {self.watcher.poll_interval:g} 秒輪詢"
+        self.log(f"👀 開始監看 ({how})：{', '.join(self.watcher.dirs)}")
+        try:
+            while not self.stop_event.is_set():
+                batch = self.watcher.ready_files()[:MAX_BATCH]
+                if batch:
+                    self.convert(batch, pool)
+                else:
+                    self.watcher.wait()
+        finally:
+            self.watcher.stop()
+            if pool is not None:
+                pool.shutdown()
+
+    def convert(self, batch, pool=None):
+        t0 = time.perf_counter()
+        engine = ConversionEngine(self.settings, on_event=self.on_event, ask_password=self.ask_password,
+                                  stop_event=self.stop_event, pool=pool)
+        status = engine.run(batch)
+        if status == "cancelled":
+            return
+        seconds = time.perf_counter() - t0
+        for path in batch:
+            result = engine.results.get(path) or {"status": "error", "outputs": [], "error": None}
+            if result["status"] == "skipped":
+                result = dict(result, error=result["error"] or "無法開啟或無頁面可轉換")
+            try:
+                write_marker(path, result, seconds)
+            except OSError as e:
+                self.log(f"⚠️ 無法寫入完成標記：{os.path.basename(path)} ({e})")
+                continue
+            icon = "✅" if result["status"] == "done" else "❌"
+            self.log(f"{icon} {os.path.basename(path)}：{len(result['outputs'])} 個輸出 (本批耗時 {seconds:.2f} 秒)")
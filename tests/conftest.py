@@ -0,0 +1,93 @@
+"""測試共用的設定與 fixture
+
+子行程以 spawn 啟動，會沿用主行程的 sys.path；專案根目錄加入 sys.path 後，
+子行程也能載入 pdfconv 與本資料夾中的輔助模組。
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def write_pdf(path, pages, size=(200, 300)):
+    """建立空白 PDF：pages 為頁數 (各頁皆為 size) 或各頁 (寬, 高) 的清單，單位為 point"""
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument.new()
+    for page_size in ([size] * pages if isinstance(pages, int) else pages):
+        pdf.new_page(*page_size)
+    pdf.save(str(path))
+    pdf.close()
+    return str(path)
+
+
+def write_marked_pdf(path, size=(200, 300), mark=(0, 0, 0)):
+    """建立單頁的圖片 PDF (如同掃描頁)，左上角有 mark 顏色的方塊，可用來判斷輸出的方向"""
+    from PIL import Image
+
+    image = Image.new("RGB", size, "white")
+    image.paste(mark, (0, 0, size[0] // 3, size[1] // 4))
+    image.save(str(path), "PDF", resolution=72)
+    return str(path)
+
+
+def write_vector_pdf(path, size=(595, 842), stroke=(20, 20, 160)):
+    """建立單頁的向量 PDF：stroke 顏色的細斜線與多列黑色文字 (反鋸齒邊緣多，可用來比較不同渲染路徑的差異)"""
+    import ctypes
+
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as raw
+
+    pdf = pdfium.PdfDocument.new()
+    page = pdf.new_page(*size)
+    width, height = size
+    for i in range(int(width // 15)):
+        line = raw.FPDFPageObj_CreateNewPath(10 + i * 13.3, 10)
+        raw.FPDFPath_LineTo(line, 14.1 + i * 13.3, height - 10)
+        raw.FPDFPageObj_SetStrokeColor(line, *stroke, 255)
+        raw.FPDFPageObj_SetStrokeWidth(line, 0.6)
+        raw.FPDFPath_SetDrawMode(line, raw.FPDF_FILLMODE_NONE, True)
+        raw.FPDFPage_InsertObject(page.raw, line)
+    font = raw.FPDFText_LoadStandardFont(pdf.raw, b"Helvetica")
+    for row in range(int((height - 60) // 25)):
+        text = raw.FPDFPageObj_CreateTextObj(pdf.raw, font, 9.3)
+        chars = ctypes.create_string_buffer(f"Quarterly report line {row}".encode("utf-16-le") + b"\0\0")
+        raw.FPDFText_SetText(text, ctypes.cast(chars, ctypes.POINTER(raw.FPDF_WCHAR)))
+        raw.FPDFPageObj_Transform(text, 1, 0, 0, 1, 30.37, height - 40 - row * 25.1)
+        raw.FPDFPage_InsertObject(page.raw, text)
+    raw.FPDFPage_GenerateContent(page.raw)
+    pdf.save(str(path))
+    pdf.close()
+    return str(path)
+
+
+def mean_diff(a, b):
+    """兩張同尺寸圖片的平均像素差 (0~255) 與不同像素的比例"""
+    from PIL import ImageChops, ImageStat
+
+    diff = ImageChops.difference(a.convert("RGB"), b.convert("RGB")).convert("L")
+    histogram = diff.histogram()
+    return ImageStat.Stat(diff).mean[0], 1 - histogram[0] / sum(histogram)
+
+
+def quadrant(image):
+    """圖片中最暗的象限 (0 左上、1 右上、2 左下、3 右下)"""
+    from PIL import ImageStat
+
+    gray = image.convert("L")
+    w, h = gray.size
+    boxes = [(0, 0, w // 2, h // 2), (w // 2, 0, w, h // 2), (0, h // 2, w // 2, h), (w // 2, h // 2, w, h)]
+    means = [ImageStat.Stat(gray.crop(box)).mean[0] for box in boxes]
+    return means.index(min(means))
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """make_pdf(名稱, 頁數) -> 於暫存資料夾 (或指定的 folder) 建立 PDF 並回傳路徑"""
+    def make(name, pages, size=(200, 300), folder=None):
+        return write_pdf((folder or tmp_path) / name, pages, size)
+    return make
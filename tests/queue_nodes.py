@@ -0,0 +1,9 @@
+"""test_distributed 於子行程中執行的工作節點 (須可由 spawn 子行程匯入)"""
+from pdfconv.distributed import QueueNode
+from pdfconv.engine import make_settings
+
+LEASE = 1.0
+
+
+def serve(root):
+    QueueNode(root, make_settings(dpi=20, workers=1), lease=LEASE, poll_interval=0.2).serve()
@@ -0,0 +1,45 @@
+"""test_supervisor 於受監督子行程中執行的工作 (須可由 spawn 子行程匯入)
+
+每個工作為 (動作, 出事的頁碼) ，依序處理 0..PAGES-1 頁：
+    ok      正常完成
+    crash   處理到該頁時行程直接結束
+    hang    渲染該頁時卡住
+    slow    每頁渲染完成後仍花時間編碼 (不應計入逾時)
+    grow    處理到該頁時持續配置記憶體
+    open    開始第一頁之前先花時間 (例如開啟大型文件，不應計入逾時)
+"""
+import os
+import time
+
+from pdfconv.supervisor import page_rendered, page_started
+
+PAGES = 3
+
+_events = {"queue": None}
+
+
+def init(cancel_event, events):
+    _events["queue"] = events
+
+
+def run(item):
+    action, bad_page = item
+    hoard = []
+    if action == "open":
+        time.sleep(0.6)
+    for page in range(PAGES):
+        page_started(page)
+        if page == bad_page:
+            if action == "crash":
+                os._exit(3)
+            if action == "hang":
+                time.sleep(60)
+            if action == "grow":
+                for _ in range(40):
+                    hoard.append(b"\x01" * (16 << 20))  # 實際寫入，計入常駐記憶體
+                    time.sleep(0.02)
+        page_rendered()
+        if action == "slow":
+            time.sleep(0.4)
+        _events["queue"].put(("page", page))
+    return action
@@ -0,0 +1,79 @@
+"""ZIP / 多頁 TIFF 封存：頁面依頁碼順序附加，提早完成的頁面超過上限時改存暫存檔"""
+import io
+import zipfile
+
+import pytest
+from PIL import Image, ImageSequence
+
+from pdfconv.archives import TiffArchiveWriter, ZipArchiveWriter
+from pdfconv.engine import ConversionEngine, make_settings
+
+
+def tiff_page(width):
+    buf = io.BytesIO()
+    Image.new("L", (width, 10)).save(buf, "TIFF")
+    return buf.getvalue()
+
+
+def frame_widths(path):
+    with Image.open(path) as image:
+        return [frame.width for frame in ImageSequence.Iterator(image)]
+
+
+def test_tiff_writer_orders_pages_and_spills_past_limit(tmp_path):
+    path = tmp_path / "out.tif"
+    data = {p: tiff_page(p * 10) for p in range(1, 7)}
+    writer = TiffArchiveWriter(str(path), range(1, 7), max_pending=len(data[6]) * 2)
+    for p_num in (6, 5, 4, 3, 2):
+        writer.add(p_num, f"page_{p_num}.tif", data[p_num])
+        assert writer.pending_bytes <= writer.max_pending
+    assert writer.spill is not None  # 超過上限的頁面已改存暫存檔
+    writer.add(1, "page_1.tif", data[1])
+    assert writer.pending == {} and writer.pending_bytes == 0
+    writer.close()
+    assert frame_widths(path) == [10, 20, 30, 40, 50, 60]
+
+
+def test_zip_writer_orders_pages_with_variants_and_skips(tmp_path):
+    path = tmp_path / "out.zip"
+    writer = ZipArchiveWriter(str(path), [1, 2, 3, 4])
+    writer.add(3, "page_3_thumb.jpg", b"t3", last=False)
+    writer.add(3, "page_3.png", b"3")
+    writer.skip(2)
+    writer.add(1, "page_1_thumb.jpg", b"t1", last=False)
+    assert writer.next == 0  # 第 1 頁的主頁面尚未送達
+    writer.add(1, "page_1.png", b"1")
+    writer.add(4, "page_4.png", b"4")
+    writer.close()
+    assert zipfile.ZipFile(path).namelist() == ["page_1_thumb.jpg", "page_1.png", "page_3_thumb.jpg",
+                                                "page_3.png", "page_4.png"]
+
+
+def test_close_appends_pages_after_a_missing_one(tmp_path):
+    path = tmp_path / "out.tif"
+    writer = TiffArchiveWriter(str(path), [1, 2, 3])
+    writer.add(3, "page_3.tif", tiff_page(30))
+    writer.add(1, "page_1.tif", tiff_page(10))
+    writer.close()  # 第 2 頁轉換失敗
+    assert frame_widths(path) == [10, 30]
+
+
+# 各頁寬度不同，可由輸出判斷頁面順序；第 2、5 頁最大，成本優先時會最先派送
+SIZES = [(100, 100), (400, 400), (120, 100), (140, 100), (400, 410), (160, 100)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_multipage_tiff_frames_in_page_order(make_pdf, workers):
+    path = make_pdf("a.pdf", SIZES)
+    engine = ConversionEngine(make_settings(dpi=72, mode="tiff", workers=workers))
+    assert engine.run([path]) == "done"
+    assert frame_widths(engine.results[path]["outputs"][0]) == [w for w, _ in SIZES]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_zip_entries_in_page_order(make_pdf, workers):
+    path = make_pdf("a.pdf", SIZES)
+    engine = ConversionEngine(make_settings(dpi=72, mode="zip", workers=workers, variants=["thumb:50:JPG"]))
+    assert engine.run([path]) == "done"
+    names = zipfile.ZipFile(engine.results[path]["outputs"][0]).namelist()
+    assert names == [n for p in range(1, len(SIZES) + 1) for n in (f"page_{p}_thumb.jpg", f"page_{p}.png")]
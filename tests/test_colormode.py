@@ -0,0 +1,43 @@
+"""色彩模式：auto 依頁面內容選擇彩色 / 灰階 / 黑白，灰階與黑白輸出為 L 與 1-bit"""
+import pytest
+from PIL import Image
+
+from conftest import write_marked_pdf, write_vector_pdf
+from pdfconv.engine import ConversionEngine, make_settings
+
+COMPRESSION = 259
+GROUP4 = 4
+
+
+def convert(path, **overrides):
+    engine = ConversionEngine(make_settings(dpi=72, **overrides))
+    assert engine.run([path]) == "done"
+    image = Image.open(engine.results[path]["outputs"][0])
+    image.load()
+    return image
+
+
+@pytest.mark.parametrize("make, expected", [
+    (lambda d: write_vector_pdf(d / "blue_lines.pdf"), "RGB"),              # 彩色路徑
+    (lambda d: write_vector_pdf(d / "black.pdf", stroke=(0, 0, 0)), "1"),   # 只有純黑的文字與路徑
+    (lambda d: write_vector_pdf(d / "gray.pdf", stroke=(128, 128, 128)), "L"),
+    (lambda d: write_marked_pdf(d / "scan.pdf"), "L"),                      # 無色彩的圖片：試渲染後判斷
+    (lambda d: write_marked_pdf(d / "red_scan.pdf", mark=(220, 30, 30)), "RGB"),
+], ids=["color-path", "black-text", "gray-path", "gray-image", "color-image"])
+def test_auto_detects_page_colors(tmp_path, make, expected):
+    assert convert(make(tmp_path), color="auto").mode == expected
+
+
+@pytest.mark.parametrize("fmt, color, expected", [
+    ("PNG", "gray", "L"), ("PNG", "mono", "1"), ("JPG", "gray", "L"),
+    ("JPG", "mono", "L"),   # JPEG 沒有 1-bit，改以灰階輸出
+    ("WEBP", "mono", "RGB"),  # WebP 只有 RGB / RGBA
+])
+def test_forced_color_modes(tmp_path, fmt, color, expected):
+    assert convert(write_vector_pdf(tmp_path / "a.pdf"), fmt=fmt, color=color).mode == expected
+
+
+def test_mono_tiff_uses_group4(tmp_path):
+    image = convert(write_vector_pdf(tmp_path / "a.pdf"), fmt="TIFF", color="mono")
+    assert image.mode == "1"
+    assert image.tag_v2[COMPRESSION] == GROUP4
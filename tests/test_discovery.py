@@ -0,0 +1,54 @@
+"""輸入探索：資料夾與萬用字元展開的結果與 glob 相同，且找到的 PDF 立即產出"""
+import glob
+import os
+import threading
+import time
+
+import pytest
+
+from pdfconv.discovery import collect_inputs, iter_inputs
+
+FILES = ["top.pdf", "a/1.pdf", "a/b/2.pdf", "a/b/c/3.PDF", "a/b/c/notes.txt", "a/.hidden/4.pdf",
+         "x/r1.pdf", "x/r22.pdf", ".dot.pdf"]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for name in FILES:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+    return tmp_path
+
+
+@pytest.mark.parametrize("pattern", ["**/*.pdf", "a/**/*.pdf", "*/*.pdf", "a/*/*.pdf", "x/r?.pdf",
+                                     "**/c/*.PDF", "*/r[0-9]*.pdf", "*.pdf"])
+def test_glob_matches_like_glob_module(tree, pattern):
+    pattern = os.path.join(str(tree), pattern)
+    expected = sorted(f for f in glob.glob(pattern, recursive=True) if f.lower().endswith(".pdf"))
+    assert sorted(iter_inputs([pattern])) == expected
+
+
+def test_folder_and_glob_inputs_are_collected_once_and_sorted(tree):
+    files = collect_inputs([str(tree / "x"), str(tree / "x" / "*.pdf"), str(tree / "top.pdf")])
+    assert files == [str(tree / "x" / "r1.pdf"), str(tree / "x" / "r22.pdf"), str(tree / "top.pdf")]
+
+
+def test_glob_yields_before_the_walk_finishes(tree, monkeypatch):
+    # 列舉 a/b 時卡住，直到第一個結果已被取走：整棵樹走完才產出的實作會在此逾時
+    release = threading.Event()
+    scandir = os.scandir
+
+    def slow_scandir(path="."):
+        if os.path.basename(str(path)) == "b":
+            release.wait(10)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", slow_scandir)
+    found = iter_inputs([os.path.join(str(tree), "**", "*.pdf")])
+    started = time.monotonic()
+    first = next(found)
+    assert time.monotonic() - started < 5
+    release.set()
+    assert sorted([first, *found]) == sorted(str(tree / n) for n in ("top.pdf", "a/1.pdf", "a/b/2.pdf",
+                                                                      "x/r1.pdf", "x/r22.pdf"))
@@ -0,0 +1,61 @@
+"""共用資料夾工作佇列：多個節點行程同時領取，每個項目只完成一次，失聯節點的項目會被回收"""
+import json
+import multiprocessing
+import os
+
+import queue_nodes
+from pdfconv.distributed import MAX_ATTEMPTS, WorkQueue
+from pdfconv.engine import make_settings
+
+PAGES = 12
+ITEM_PAGES = 2
+
+
+def done_record(queue, item_id):
+    with open(queue.path("done", f"{item_id}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_nodes_finish_each_item_once_and_reclaim_expired_lease(tmp_path, make_pdf):
+    path = make_pdf("a.pdf", PAGES)
+    queue = WorkQueue(str(tmp_path / "queue"), queue_nodes.LEASE)
+    job = queue.submit([path], make_settings(dpi=20), item_pages=ITEM_PAGES)
+    assert len(job["items"]) == PAGES // ITEM_PAGES
+
+    # 領取後不再送出心跳：模擬當機的節點
+    dead_item, _ = queue.claim("deadnode")
+
+    ctx = multiprocessing.get_context("spawn")
+    nodes = [ctx.Process(target=queue_nodes.serve, args=(queue.root,)) for _ in range(3)]
+    for node in nodes:
+        node.start()
+    for node in nodes:
+        node.join(120)
+        assert node.exitcode == 0
+
+    status = queue.status()
+    assert status["finished"]
+    assert (status["todo"], status["claimed"], status["failed"]) == (0, 0, 0)
+    assert sorted(n[:-len(".json")] for n in queue.names("done")) == sorted(job["items"])
+    # 各節點回報完成的項目數合計等於項目總數：沒有項目被重複完成
+    assert len(status["nodes"]) == 3
+    assert sum(n["items"] for n in status["nodes"]) == len(job["items"])
+    assert sum(n["pages"] for n in status["nodes"]) == PAGES
+    assert done_record(queue, dead_item["id"])["node"] != "deadnode"
+
+    out_dir = os.path.splitext(path)[0] + "_images"
+    assert sorted(os.listdir(out_dir)) == sorted(f"page_{p}.png" for p in range(1, PAGES + 1))
+
+
+def test_reap_requeues_then_fails_after_max_attempts(tmp_path, make_pdf):
+    queue = WorkQueue(str(tmp_path / "queue"), lease=0)
+    queue.submit([make_pdf("a.pdf", 1)], make_settings(dpi=20))
+
+    for attempt in range(MAX_ATTEMPTS):
+        item, claimed = queue.claim("deadnode")
+        assert claimed.endswith(f".{attempt}@deadnode.json")
+        assert queue.reap() == []  # 第一次只記錄修改時間
+        assert queue.reap() == [item["id"]]
+    assert queue.names("todo") == []
+    assert queue.names("failed") == [f"{item['id']}.json"]
+    assert queue.status()["finished"]
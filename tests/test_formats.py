@@ -0,0 +1,25 @@
+"""輸出格式：TIFF 以 RGB (每像素 3 個樣本) 儲存，不帶多餘的 X 通道"""
+import pytest
+from PIL import Image
+
+from conftest import write_marked_pdf
+from pdfconv.engine import ConversionEngine, make_settings
+
+SAMPLES_PER_PIXEL = 277
+
+
+@pytest.mark.parametrize("overrides", [
+    {"queue_depth": 0},
+    {"queue_depth": 4},
+    {"max_page_mb": 1},          # 分帶渲染
+    {"mode": "tiff"},            # 多頁 TIFF 封存
+], ids=["sync", "pipeline", "tiled", "archive"])
+@pytest.mark.parametrize("encoder", ["fast", "balanced"])
+def test_tiff_has_three_samples_per_pixel(tmp_path, overrides, encoder):
+    path = write_marked_pdf(tmp_path / "a.pdf")
+    engine = ConversionEngine(make_settings(dpi=300, fmt="TIFF", encoder=encoder, **overrides))
+    assert engine.run([path]) == "done"
+    with Image.open(engine.results[path]["outputs"][0]) as image:
+        assert image.mode == "RGB"
+        assert image.tag_v2[SAMPLES_PER_PIXEL] == 3
+        assert image.size == (834, 1250)
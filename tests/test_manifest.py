@@ -0,0 +1,106 @@
+"""增量轉換：manifest 略過已完成的頁面，來源或設定變更時取代舊輸出"""
+import os
+import time
+
+from pdfconv.engine import ConversionEngine, make_settings
+from pdfconv.manifest import OutputManifest
+
+SETTINGS = make_settings(dpi=20, incremental=True, queue_depth=0)
+
+
+def touch(path):
+    with open(path, "wb") as f:
+        f.write(b"x")
+    return path
+
+
+def test_is_done_requires_same_digest_settings_and_file(tmp_path):
+    manifest = OutputManifest(str(tmp_path))
+    manifest.record("abc", 1, SETTINGS, "a.pdf", touch(tmp_path / "page_1.png"))
+    manifest.save()
+
+    manifest = OutputManifest(str(tmp_path))  # 重新載入
+    assert manifest.is_done("abc", 1, SETTINGS)
+    assert not manifest.is_done("def", 1, SETTINGS)
+    assert not manifest.is_done("abc", 1, dict(SETTINGS, dpi=30))
+    os.remove(tmp_path / "page_1.png")
+    assert not manifest.is_done("abc", 1, SETTINGS)
+
+
+def test_stale_target_overwrites_same_format_and_deletes_others(tmp_path):
+    manifest = OutputManifest(str(tmp_path))
+    png = touch(tmp_path / "page_1.png")
+    jpg = touch(tmp_path / "page_2.jpg")
+    manifest.record("old", 1, SETTINGS, "a.pdf", png)
+    manifest.record("old", 2, dict(SETTINGS, fmt="JPG"), "a.pdf", jpg)
+
+    assert manifest.stale_target("a.pdf", 1, "png") == str(png)
+    assert manifest.stale_target("a.pdf", 2, "png") is None
+    assert not os.path.exists(jpg)  # 格式已改變，舊檔刪除
+    assert manifest.entries == {}
+
+
+def test_prune_removes_outputs_of_old_content(tmp_path):
+    manifest = OutputManifest(str(tmp_path))
+    for p in (1, 2, 3):
+        manifest.record("old", p, SETTINGS, "a.pdf", touch(tmp_path / f"page_{p}.png"))
+    manifest.record("new", 1, SETTINGS, "a.pdf", str(tmp_path / "page_1.png"))
+    manifest.record("other", 1, SETTINGS, "b.pdf", touch(tmp_path / "b_1.png"))
+
+    assert manifest.prune("a.pdf", "new") == 3
+    # 仍被新內容紀錄使用的檔案不刪除，其他來源檔不受影響
+    assert sorted(os.listdir(tmp_path)) == ["b_1.png", "page_1.png"]
+    assert len(manifest.entries) == 2
+
+
+def test_shared_output_removed_with_its_last_record(tmp_path):
+    manifest = OutputManifest(str(tmp_path))
+    shared = touch(tmp_path / "page_1.png")  # 重複頁面：兩筆紀錄指向同一檔案
+    manifest.record("a1", 1, SETTINGS, "a.pdf", shared)
+    manifest.record("b1", 1, SETTINGS, "b.pdf", shared)
+
+    assert manifest.prune("a.pdf", "new") == 1
+    assert os.path.exists(shared)
+    assert manifest.prune("b.pdf", "new") == 1
+    assert not os.path.exists(shared)
+
+
+def test_prune_scales_linearly(tmp_path):
+    manifest = OutputManifest(str(tmp_path))
+    for p in range(1, 20001):
+        manifest.record("old", p, SETTINGS, "a.pdf", str(tmp_path / f"page_{p}.png"))
+        manifest.record("other", p, SETTINGS, "b.pdf", str(tmp_path / f"b_{p}.png"))
+    started = time.monotonic()
+    assert manifest.prune("a.pdf", "new") == 20000
+    assert time.monotonic() - started < 2  # 逐筆掃描全部紀錄時需要數十秒
+    assert len(manifest.entries) == 20000
+
+
+def run(path, **overrides):
+    engine = ConversionEngine(dict(SETTINGS, **overrides))
+    assert engine.run([path]) == "done"
+    return engine
+
+
+def outputs(path):
+    out_dir = os.path.splitext(path)[0] + "_images"
+    return sorted(n for n in os.listdir(out_dir) if not n.startswith("."))
+
+
+def test_incremental_run_skips_and_replaces(make_pdf):
+    path = make_pdf("a.pdf", 4)
+    assert len(run(path).results[path]["outputs"]) == 4
+
+    engine = run(path)  # 未變更：全部略過
+    assert engine.results[path]["outputs"] == []
+    assert engine.results[path]["status"] == "done"
+
+    run(path, dpi=30)  # 設定變更：覆寫原本的檔案，不產生 page_N_1.png
+    assert outputs(path) == ["page_1.png", "page_2.png", "page_3.png", "page_4.png"]
+
+    run(path, dpi=30, fmt="JPG")  # 格式變更：刪除舊格式的檔案
+    assert outputs(path) == ["page_1.jpg", "page_2.jpg", "page_3.jpg", "page_4.jpg"]
+
+    make_pdf("a.pdf", 2, (210, 300))  # 來源變短：已不存在的頁面輸出一併刪除
+    run(path, dpi=30, fmt="JPG")
+    assert outputs(path) == ["page_1.jpg", "page_2.jpg"]
@@ -0,0 +1,63 @@
+"""略過空白頁與合併重複頁面"""
+import json
+import os
+import zipfile
+
+import pypdfium2 as pdfium
+import pytest
+
+from conftest import write_marked_pdf, write_pdf
+from pdfconv.engine import ConversionEngine, make_settings
+
+# 各頁內容：black / red 為左上角有色塊的掃描頁，blank 為空白頁
+PAGES = ["black", "blank", "red", "black", "blank", "red"]
+
+
+@pytest.fixture
+def mixed_pdf(tmp_path):
+    sources = {"black": write_marked_pdf(tmp_path / "black.pdf"),
+               "red": write_marked_pdf(tmp_path / "red.pdf", mark=(220, 30, 30)),
+               "blank": write_pdf(tmp_path / "blank.pdf", 1)}
+    pdf = pdfium.PdfDocument.new()
+    for kind in PAGES:
+        src = pdfium.PdfDocument(sources[kind])
+        pdf.import_pages(src)
+        src.close()
+    path = str(tmp_path / "mixed.pdf")
+    pdf.save(path)
+    pdf.close()
+    return path
+
+
+def convert(path, **overrides):
+    engine = ConversionEngine(make_settings(dpi=36, **overrides))
+    assert engine.run([path]) == "done"
+    return engine
+
+
+def test_skip_blank_pages(mixed_pdf):
+    engine = convert(mixed_pdf, skip_blank=True)
+    result = engine.results[mixed_pdf]
+    assert sorted(result["blank_pages"]) == [2, 5]
+    out_dir = os.path.dirname(result["outputs"][0])
+    assert sorted(os.listdir(out_dir)) == ["page_1.png", "page_3.png", "page_4.png", "page_6.png"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_dedup_links_duplicate_pages(mixed_pdf, workers):
+    engine = convert(mixed_pdf, dedup=True, workers=workers)
+    out_dir = os.path.dirname(engine.results[mixed_pdf]["outputs"][0])
+    page = {p: os.path.join(out_dir, f"page_{p}.png") for p in range(1, len(PAGES) + 1)}
+    assert os.path.samefile(page[4], page[1])
+    assert os.path.samefile(page[5], page[2])
+    assert os.path.samefile(page[6], page[3])
+    assert not os.path.samefile(page[1], page[3])
+    assert engine.state["duplicates"] == 3
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_dedup_zip_records_duplicates_json(mixed_pdf, workers):
+    engine = convert(mixed_pdf, dedup=True, skip_blank=True, mode="zip", workers=workers)
+    with zipfile.ZipFile(engine.results[mixed_pdf]["outputs"][0]) as zf:
+        assert zf.namelist() == ["page_1.png", "page_3.png", "duplicates.json"]
+        assert json.loads(zf.read("duplicates.json")) == {"page_4.png": "page_1.png", "page_6.png": "page_3.png"}
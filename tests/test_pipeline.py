@@ -0,0 +1,114 @@
+"""PagePipeline 的錯誤與取消路徑"""
+import threading
+import time
+
+from pdfconv.pipeline import PagePipeline
+
+
+class Recorder:
+    def __init__(self):
+        self.written, self.errors, self.threads = [], [], set()
+
+    def on_written(self, item, save_path):
+        self.threads.add(threading.current_thread().name)
+        self.written.append(item["p_num"])
+
+    def on_error(self, item, exc):
+        self.threads.add(threading.current_thread().name)
+        self.errors.append((item["p_num"], str(exc)))
+
+
+def make(rec, encode=None, write=None, on_written=None, depth=2):
+    encode = encode or (lambda item: b"data")
+    write = write or (lambda item, data: f"page_{item['p_num']}")
+    return PagePipeline(encode, write, on_written or rec.on_written, rec.on_error, encoders=2, depth=depth)
+
+
+def test_pages_written_in_order_on_writer_thread():
+    rec = Recorder()
+    pipeline = make(rec, encode=lambda item: b"x")
+    for p in range(1, 6):
+        pipeline.submit({"p_num": p})
+    pipeline.close()
+    assert sorted(rec.written) == [1, 2, 3, 4, 5]
+    assert rec.threads == {pipeline.writer.name}
+
+
+def test_encode_error_reported_on_writer_thread():
+    rec = Recorder()
+
+    def encode(item):
+        if item["p_num"] == 2:
+            raise ValueError("壞掉的頁面")
+        return b"x"
+
+    pipeline = make(rec, encode=encode)
+    for p in range(1, 5):
+        pipeline.submit({"p_num": p})
+    pipeline.close()
+    assert rec.errors == [(2, "壞掉的頁面")]
+    assert sorted(rec.written) == [1, 3, 4]
+    # 編碼失敗也經由寫檔執行緒回報，引擎狀態只會在單一執行緒中更新
+    assert rec.threads == {pipeline.writer.name}
+
+
+def test_write_error_does_not_stop_pipeline():
+    rec = Recorder()
+
+    def write(item, data):
+        if item["p_num"] == 1:
+            raise OSError("磁碟已滿")
+        return "ok"
+
+    pipeline = make(rec, write=write)
+    for p in range(1, 4):
+        pipeline.submit({"p_num": p})
+    pipeline.close()
+    assert rec.errors == [(1, "磁碟已滿")]
+    assert sorted(rec.written) == [2, 3]
+
+
+def test_on_written_error_goes_to_on_error_and_close_returns():
+    rec = Recorder()
+
+    def on_written(item, save_path):
+        if item["p_num"] == 1:
+            raise RuntimeError("manifest 寫入失敗")
+        rec.on_written(item, save_path)
+
+    pipeline = make(rec, on_written=on_written, depth=1)
+    # 佇列深度 1：寫檔執行緒若因例外結束，後續 submit 會永遠阻塞
+    done = threading.Event()
+
+    def feed():
+        for p in range(1, 8):
+            pipeline.submit({"p_num": p})
+        pipeline.close()
+        done.set()
+
+    threading.Thread(target=feed, daemon=True).start()
+    assert done.wait(10)
+    assert rec.errors == [(1, "manifest 寫入失敗")]
+    assert sorted(rec.written) == [2, 3, 4, 5, 6, 7]
+
+
+def test_abort_discards_pending_pages():
+    rec = Recorder()
+    release = threading.Event()
+
+    def encode(item):
+        release.wait(5)
+        return b"x"
+
+    pipeline = make(rec, encode=encode, depth=4)
+    for p in range(1, 5):
+        pipeline.submit({"p_num": p})
+    t = threading.Timer(0.2, release.set)
+    t.start()
+    started = time.monotonic()
+    pipeline.abort()
+    t.join()
+    assert time.monotonic() - started < 5
+    # 取消時正在編碼的頁面也不會再寫出
+    assert rec.written == [] and rec.errors == []
+    assert not pipeline.writer.is_alive()
@@ -0,0 +1,21 @@
+"""頁面預覽與轉檔輸出的方向一致"""
+import io
+
+import pytest
+from PIL import Image
+
+from conftest import quadrant, write_marked_pdf
+from pdfconv.engine import ConversionEngine, make_settings
+from pdfconv.preview import _render_preview
+
+
+@pytest.mark.parametrize("angle", [0, 90, 180, 270])
+def test_preview_matches_output_orientation(tmp_path, angle):
+    path = write_marked_pdf(tmp_path / f"rotated_{angle}.pdf")
+    engine = ConversionEngine(make_settings(dpi=72, angle=angle))
+    assert engine.run([path]) == "done"
+    output = Image.open(engine.results[path]["outputs"][0])
+
+    preview = Image.open(io.BytesIO(_render_preview(path, 1, 300, angle)["png"]))
+    assert preview.size == output.size
+    assert quadrant(preview) == quadrant(output)
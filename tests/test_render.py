@@ -0,0 +1,44 @@
+"""render_page：旋轉交給 pdfium，結果與先渲染再以 PIL 旋轉只有反鋸齒邊緣的差異"""
+import pypdfium2 as pdfium
+import pytest
+
+from conftest import mean_diff, write_marked_pdf, write_vector_pdf
+from pdfconv.engine import make_settings, release_buffer, render_page
+
+
+def render(path, **overrides):
+    pdf = pdfium.PdfDocument(path)
+    try:
+        image, buffer = render_page(pdf, 1, make_settings(**overrides))
+        copy = image.convert("RGB")
+        del image
+        release_buffer(buffer)
+        return copy
+    finally:
+        pdf.close()
+
+
+@pytest.mark.parametrize("angle", [90, 180, 270])
+def test_native_rotation_close_to_pil_rotation(tmp_path, angle):
+    path = write_vector_pdf(tmp_path / "vector.pdf")
+    native = render(path, dpi=150, angle=angle, fmt="JPG")
+    rotated = render(path, dpi=150, fmt="JPG").rotate(angle, expand=True)
+    assert native.size == rotated.size
+    mean, differing = mean_diff(native, rotated)
+    # 次像素的位移只影響反鋸齒的邊緣：個別像素可差很多，整體平均很小
+    assert mean < 4
+    assert differing < 0.5
+
+
+@pytest.mark.parametrize("angle", [90, 180, 270])
+def test_native_rotation_of_scanned_page(tmp_path, angle):
+    path = write_marked_pdf(tmp_path / "scan.pdf")
+    native = render(path, dpi=72, angle=angle)
+    rotated = render(path, dpi=72).rotate(angle, expand=True)
+    assert native.size == rotated.size
+    assert mean_diff(native, rotated)[0] < 1
+
+
+def test_rgbx_and_rgb_paths_match(tmp_path):
+    path = write_vector_pdf(tmp_path / "vector.pdf")
+    assert mean_diff(render(path, dpi=100, fmt="JPG"), render(path, dpi=100, fmt="PNG")) == (0, 0)
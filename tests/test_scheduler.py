@@ -0,0 +1,74 @@
+"""分片切割與 ShardScheduler 的派送順序"""
+from pdfconv.engine import make_settings
+from pdfconv.scheduler import ShardScheduler, page_cost, page_memory, shard_memory, split_by_cost
+
+A4, A0 = (595, 842), (2384, 3370)
+
+
+def shard(shard_id, cost, memory=0):
+    return {"id": shard_id, "cost": cost, "memory": memory}
+
+
+def test_page_cost_grows_with_pixels_and_objects():
+    settings = make_settings(dpi=300)
+    assert page_cost(A0, 0, settings) > 10 * page_cost(A4, 0, settings)
+    assert page_cost(A4, 5000, settings) > page_cost(A4, 10, settings)
+    assert page_cost(A4, 0, make_settings(dpi=600)) > page_cost(A4, 0, settings)
+
+
+def test_page_memory_by_color_and_tiling_budget():
+    assert page_memory(A4, make_settings(dpi=72)) == 595 * 842 * 4
+    assert page_memory(A4, make_settings(dpi=72, color="gray")) == 595 * 842
+    assert page_memory(A0, make_settings(dpi=300, max_page_mb=64)) == 64 << 20  # 分帶渲染的頁面以預算為上限
+
+
+def test_shard_memory_counts_pages_in_flight():
+    pages = [10, 50, 40, 30, 20]
+    assert shard_memory(pages, make_settings(queue_depth=0)) == 50
+    # 渲染中 1 頁 + 佇列 2 頁 + 編碼執行緒 1 頁：取最大的 4 頁
+    assert shard_memory(pages, make_settings(queue_depth=2, encoders=1)) == 50 + 40 + 30 + 20
+
+
+def test_split_by_cost_respects_target_and_max_pages():
+    costs = {1: 1.0, 2: 1.0, 3: 5.0, 4: 1.0, 5: 1.0, 6: 1.0}
+    chunks = split_by_cost(list(costs), costs, target=2.5, max_pages=2)
+    assert [pages for pages, _ in chunks] == [[1, 2], [3], [4, 5], [6]]
+    assert [cost for _, cost in chunks] == [2.0, 5.0, 2.0, 1.0]
+
+
+def test_highest_cost_first_within_slots():
+    scheduler = ShardScheduler(2)
+    for i, cost in enumerate([1.0, 9.0, 5.0]):
+        scheduler.add(shard(i, cost))
+    assert [s["id"] for s in scheduler.take()] == [1, 2]
+    assert scheduler.take() == []  # 名額已滿
+    scheduler.done(1)
+    assert [s["id"] for s in scheduler.take()] == [0]
+    scheduler.done(0)
+    scheduler.done(2)
+    assert not scheduler.busy()
+
+
+def test_memory_budget_holds_back_large_shard():
+    scheduler = ShardScheduler(4, budget_bytes=100)
+    scheduler.add(shard("big", 9.0, memory=80))
+    scheduler.add(shard("huge", 8.0, memory=90))
+    scheduler.add(shard("small", 1.0, memory=10))
+    assert [s["id"] for s in scheduler.take()] == ["big"]
+    # 不跳過等待中的大分片改派小分片
+    assert scheduler.take() == []
+    scheduler.done("big")
+    assert [s["id"] for s in scheduler.take()] == ["huge", "small"]
+
+
+def test_ordered_mode_dispatches_by_file_and_page():
+    scheduler = ShardScheduler(1, ordered=True)
+    scheduler.add({"id": "a9", "path": "a.pdf", "pages": [9, 10], "cost": 1.0, "memory": 0})
+    scheduler.add({"id": "b1", "path": "b.pdf", "pages": [1, 2], "cost": 9.0, "memory": 0})
+    scheduler.add({"id": "a1", "path": "a.pdf", "pages": [1, 2], "cost": 5.0, "memory": 0})
+    order = []
+    while scheduler.busy():
+        for s in scheduler.take():
+            order.append(s["id"])
+            scheduler.done(s["id"])
+    assert order == ["a1", "a9", "b1"]
@@ -0,0 +1,115 @@
+"""HTTP 轉檔服務的狀態碼"""
+import http.client
+import io
+import json
+import threading
+import zipfile
+from urllib.parse import quote
+
+import pytest
+
+from pdfconv.engine import make_settings
+from pdfconv.server import AdmissionQueue, ConversionServer
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    allowed = tmp_path_factory.mktemp("allowed")
+    server = ConversionServer(("127.0.0.1", 0), make_settings(dpi=20, workers=1), concurrency=1,
+                              request_timeout=60, path_roots=[str(allowed)])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.allowed = allowed
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, url, body=b""):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=60)
+    conn.request(method, url, body=body, headers={"Content-Length": str(len(body))})
+    resp = conn.getresponse()
+    data = resp.read()
+    conn.close()
+    return resp, data
+
+
+def post(server, query, body=b""):
+    resp, data = request(server, "POST", f"/convert?{query}", body)
+    return resp.status, data
+
+
+def pdf_bytes(make_pdf, pages):
+    with open(make_pdf("upload.pdf", pages), "rb") as f:
+        return f.read()
+
+
+def test_upload_returns_zip(server, make_pdf):
+    status, data = post(server, "dpi=20", pdf_bytes(make_pdf, 2))
+    assert status == 200
+    assert sorted(zipfile.ZipFile(io.BytesIO(data)).namelist()) == ["page_1.png", "page_2.png"]
+
+
+@pytest.mark.parametrize("query", ["dpi=abc", "dpi=0", "fmt=BMP", "angle=45"])
+def test_invalid_settings_return_400(server, make_pdf, query):
+    status, data = post(server, query, pdf_bytes(make_pdf, 1))
+    assert status == 400
+    assert json.loads(data)["error"]
+
+
+def test_missing_body_returns_400(server):
+    status, _ = post(server, "dpi=20")
+    assert status == 400
+
+
+def test_path_outside_roots_returns_403(server, make_pdf):
+    outside = make_pdf("outside.pdf", 1)
+    status, _ = post(server, f"path={quote(outside)}")
+    assert status == 403
+
+
+def test_path_inside_roots_is_converted(server, make_pdf):
+    path = make_pdf("inside.pdf", 1, folder=server.allowed)
+    status, data = post(server, f"path={quote(path)}")
+    assert status == 200
+    assert zipfile.ZipFile(io.BytesIO(data)).namelist() == ["page_1.png"]
+
+
+def test_unreadable_pdf_returns_422(server):
+    status, data = post(server, "dpi=20", b"%PDF-1.4 not really a pdf")
+    assert status == 422
+    assert json.loads(data)["error"]
+
+
+def test_health_reports_slots(server):
+    resp, data = request(server, "GET", "/health")
+    assert resp.status == 200
+    assert json.loads(data) == {"status": "ok", "slots": 1, "busy": 0, "waiting": 0}
+
+
+def test_unknown_route_and_missing_file_return_404(server):
+    assert request(server, "GET", "/nope")[0].status == 404
+    assert request(server, "POST", "/other")[0].status == 404
+    status, _ = post(server, f"path={quote(str(server.allowed / 'missing.pdf'))}")
+    assert status == 404
+
+
+def test_busy_server_returns_503(server, make_pdf, monkeypatch):
+    monkeypatch.setattr(server, "queue_timeout", 0.2)
+    slot = server.admission.acquire(1)  # 佔住唯一的名額
+    try:
+        resp, _ = request(server, "POST", "/convert?dpi=20", pdf_bytes(make_pdf, 1))
+        assert resp.status == 503
+        assert resp.getheader("Retry-After") == "5"
+    finally:
+        server.admission.release(slot)
+    assert post(server, "dpi=20", pdf_bytes(make_pdf, 1))[0] == 200
+
+
+def test_admission_queue_rejects_when_waiting_list_full():
+    admission = AdmissionQueue(["pool"], max_waiting=0)
+    slot = admission.acquire(1)
+    assert slot == "pool"
+    assert admission.acquire(5) is None  # 沒有空位也不能排隊：立即拒絕
+    admission.release(slot)
+    assert admission.acquire(1) == "pool"
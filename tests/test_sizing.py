@@ -0,0 +1,61 @@
+"""依頁面尺寸決定解析度：fit_px 的最長邊、min/max DPI 與 max_mp 的像素上限"""
+import os
+
+import pytest
+from PIL import Image
+
+from pdfconv.engine import ConversionEngine, make_settings
+
+# A4 直式、A4 橫式、A0 與名片，各頁的最長邊與像素數差異很大
+SIZES = [(595, 842), (842, 595), (2384, 3370), (252, 144)]
+
+
+def output_sizes(path, **overrides):
+    engine = ConversionEngine(make_settings(**overrides))
+    assert engine.run([path]) == "done"
+    out_dir = os.path.dirname(engine.results[path]["outputs"][0])
+    sizes = []
+    for p_num in range(1, len(SIZES) + 1):
+        output = os.path.join(out_dir, f"page_{p_num}.png")
+        with Image.open(output) as image:
+            sizes.append(image.size)
+        os.remove(output)  # 下一次轉換使用相同的檔名
+    return sizes
+
+
+def test_fit_px_sets_longest_edge(make_pdf):
+    path = make_pdf("mixed.pdf", SIZES)
+    assert [max(s) for s in output_sizes(path, fit_px=1000)] == [1000] * len(SIZES)
+
+
+def test_fit_px_longest_edge_with_rotation(make_pdf):
+    path = make_pdf("mixed.pdf", SIZES)
+    assert output_sizes(path, fit_px=1000, angle=90)[0] == (1000, 707)
+
+
+def test_fit_px_clamped_by_dpi_range(make_pdf):
+    path = make_pdf("mixed.pdf", SIZES)
+    sizes = output_sizes(path, fit_px=1000, min_dpi=50, max_dpi=150)
+    assert sizes[2] == (1656, 2341)               # A0 約 21 DPI，提高到 50 DPI
+    assert sizes[3] == (525, 300)                 # 名片 286 DPI，限制為 150 DPI
+
+
+@pytest.mark.parametrize("max_mp", [1, 2.5])
+def test_max_mp_limits_pixels_only_for_large_pages(make_pdf, max_mp):
+    path = make_pdf("mixed.pdf", SIZES)
+    fixed = output_sizes(path, dpi=150)
+    limited = output_sizes(path, dpi=150, max_mp=max_mp)
+    for (fw, fh), (w, h) in zip(fixed, limited):
+        if fw * fh <= max_mp * 1e6:
+            assert (w, h) == (fw, fh)             # 本來就在上限內的頁面不變
+        else:
+            assert w * h <= max_mp * 1e6
+            assert w * h > max_mp * 1e6 * 0.99    # 縮小到剛好不超過上限
+            assert abs(w / h - fw / fh) < 0.01
+
+
+def test_invalid_sizing_rejected():
+    with pytest.raises(ValueError):
+        make_settings(fit_px=-1)
+    with pytest.raises(ValueError):
+        make_settings(min_dpi=300, max_dpi=100)
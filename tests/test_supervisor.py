@@ -0,0 +1,78 @@
+"""SupervisedPool：逾時、崩潰、記憶體上限與取消時能判定出事的頁面，且子行程自動重啟"""
+import sys
+import time
+
+import pytest
+
+import supervised_jobs
+from pdfconv.supervisor import SupervisedPool, WorkerLost
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SupervisedPool(2, supervised_jobs.run, supervised_jobs.init)
+    pool.warm()
+    yield pool
+    pool.shutdown()
+
+
+def lost(future):
+    exc = future.exception(timeout=30)
+    assert isinstance(exc, WorkerLost), exc
+    return exc
+
+
+def drain(pool):
+    events = []
+    while not pool.events.empty():
+        events.append(pool.events.get_nowait())
+    return events
+
+
+def test_ok_job_returns_result_and_forwards_events(pool):
+    drain(pool)
+    assert pool.submit(("ok", None), timeout=5).result(timeout=30) == "ok"
+    assert drain(pool) == [("page", 0), ("page", 1), ("page", 2)]
+
+
+def test_timeout_attributed_to_page(pool):
+    drain(pool)
+    exc = lost(pool.submit(("hang", 1), timeout=0.5))
+    assert (exc.item, exc.page, exc.reason) == (("hang", 1), 1, "timeout")
+    # 逾時前完成的頁面事件都已送達
+    assert drain(pool) == [("page", 0)]
+
+
+def test_crash_attributed_to_page_and_worker_restarts(pool):
+    exc = lost(pool.submit(("crash", 2)))
+    assert (exc.page, exc.reason) == (2, "crash")
+    # 崩潰的子行程已重新啟動，後續工作照常執行
+    futures = [pool.submit(("ok", None)) for _ in range(3)]
+    assert [f.result(timeout=30) for f in futures] == ["ok"] * 3
+
+
+def test_time_after_render_not_counted(pool):
+    # 每頁渲染後再花 0.4 秒編碼，總時間遠超過 0.3 秒的單頁上限，但渲染本身很快
+    assert pool.submit(("slow", None), timeout=0.3).result(timeout=30) == "slow"
+
+
+def test_time_before_first_page_not_counted(pool):
+    # 開啟文件花了 0.6 秒，超過 0.3 秒的單頁上限，但計時從第一頁開始渲染才起算
+    assert pool.submit(("open", None), timeout=0.3).result(timeout=30) == "open"
+
+
+@pytest.mark.skipif(sys.platform == "darwin", reason="macOS 只能取得峰值記憶體")
+def test_memory_limit_attributed_to_page(pool):
+    exc = lost(pool.submit(("grow", 1), memory_mb=200))
+    assert (exc.page, exc.reason) == (1, "memory")
+
+
+def test_cancel_stops_inflight_job_quickly(pool):
+    future = pool.submit(("hang", 0))
+    time.sleep(0.5)
+    started = time.monotonic()
+    pool.cancel([future])
+    assert time.monotonic() - started < 5
+    assert lost(future).reason == "cancelled"
+    pool.cancel_event.clear()
+    assert pool.submit(("ok", None)).result(timeout=30) == "ok"
@@ -0,0 +1,50 @@
+"""分帶渲染：超過 max_page_mb 的頁面逐帶渲染，結果與整頁渲染只有反鋸齒的些微差異"""
+import os
+
+import pytest
+from PIL import Image
+
+from conftest import mean_diff, write_marked_pdf, write_vector_pdf
+from pdfconv.engine import ConversionEngine, make_settings
+
+
+def convert(path, **overrides):
+    engine = ConversionEngine(make_settings(**overrides))
+    assert engine.run([path]) == "done"
+    [output] = engine.results[path]["outputs"]
+    with Image.open(output) as image:
+        image.load()
+    os.remove(output)
+    return image
+
+
+@pytest.mark.parametrize("fmt", ["PNG", "TIFF"])
+@pytest.mark.parametrize("angle", [0, 90])
+def test_tiled_vector_page_within_documented_tolerance(tmp_path, fmt, angle):
+    path = write_vector_pdf(tmp_path / "vector.pdf")
+    full = convert(path, dpi=150, fmt=fmt, angle=angle)
+    tiled = convert(path, dpi=150, fmt=fmt, angle=angle, max_page_mb=1)  # 整頁約 8 MB，分成多條帶
+    assert tiled.size == full.size and tiled.mode == full.mode
+    mean, differing = mean_diff(tiled, full)
+    assert differing < 0.03
+    assert mean < 1
+
+
+@pytest.mark.parametrize("color", ["color", "gray"])
+def test_tiled_scanned_page_is_identical(tmp_path, color):
+    path = write_marked_pdf(tmp_path / "scan.pdf")
+    full = convert(path, dpi=300, color=color)
+    tiled = convert(path, dpi=300, color=color, max_page_mb=1)
+    assert tiled.mode == full.mode == ("RGB" if color == "color" else "L")
+    assert mean_diff(tiled, full) == (0, 0)
+
+
+def test_tiled_jpeg_and_variants(tmp_path):
+    path = write_vector_pdf(tmp_path / "vector.pdf")
+    engine = ConversionEngine(make_settings(dpi=150, fmt="JPG", max_page_mb=1, variants=["thumb:200:JPG"]))
+    assert engine.run([path]) == "done"
+    [output] = engine.results[path]["outputs"]
+    with Image.open(output) as image:
+        assert image.size == (1240, 1755)
+    with Image.open(output.replace(".jpg", "_thumb.jpg")) as thumb:
+        assert max(thumb.size) == 200
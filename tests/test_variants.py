@@ -0,0 +1,46 @@
+"""多種尺寸輸出：同一次渲染縮小產生各尺寸，檔名、格式與尺寸依設定"""
+import os
+
+import pytest
+from PIL import Image
+
+from conftest import mean_diff, write_vector_pdf
+from pdfconv.engine import ConversionEngine, make_settings
+from pdfconv.variants import normalize_variants
+
+
+@pytest.mark.parametrize("queue_depth", [0, 4])
+def test_variants_written_next_to_each_page(make_pdf, queue_depth):
+    path = make_pdf("a.pdf", 2, (200, 300))
+    engine = ConversionEngine(make_settings(dpi=144, queue_depth=queue_depth,
+                                            variants=["thumb:60:JPG", "preview:200:WEBP:fast", "big:5000"]))
+    assert engine.run([path]) == "done"
+    out_dir = os.path.dirname(engine.results[path]["outputs"][0])
+    expected = {"page_{}.png": (400, 600), "page_{}_thumb.jpg": (40, 60), "page_{}_preview.webp": (133, 200),
+                "page_{}_big.png": (400, 600)}  # 不放大超過主輸出的尺寸
+    assert sorted(os.listdir(out_dir)) == sorted(n.format(p) for n in expected for p in (1, 2))
+    for name, size in expected.items():
+        with Image.open(os.path.join(out_dir, name.format(1))) as image:
+            assert image.size == size
+
+
+def test_variant_matches_downscaled_main_output(tmp_path):
+    path = write_vector_pdf(tmp_path / "vector.pdf")
+    engine = ConversionEngine(make_settings(dpi=100, variants=["half:584"]))
+    assert engine.run([path]) == "done"
+    [output] = engine.results[path]["outputs"]
+    with Image.open(output) as main, Image.open(output.replace(".png", "_half.png")) as half:
+        expected = main.resize(half.size, Image.Resampling.LANCZOS)
+        assert mean_diff(half, expected)[0] < 2
+
+
+@pytest.mark.parametrize("spec", ["thumb", "thumb:abc", "thumb:0", "th umb:100", "thumb:100:BMP",
+                                  "thumb:100:JPG:tiny"])
+def test_invalid_variant_rejected(spec):
+    with pytest.raises(ValueError):
+        normalize_variants([spec], "PNG", "balanced")
+
+
+def test_duplicate_suffix_rejected():
+    with pytest.raises(ValueError):
+        normalize_variants(["thumb:100", "thumb:200"], "PNG", "balanced")
@@ -0,0 +1,50 @@
+"""資料夾監看：檔案寫入完成後才轉檔，處理後寫入 .done / .failed 標記且不再重複處理"""
+import json
+import os
+import threading
+import time
+
+from pdfconv.engine import make_settings
+from pdfconv.watch import FolderWatcher, WatchService
+
+
+def wait_for(predicate, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_file_ready_only_after_it_settles(tmp_path):
+    watcher = FolderWatcher([str(tmp_path)], settle=0.3)
+    path = tmp_path / "incoming.pdf"
+    path.write_bytes(b"%PDF-")
+    assert watcher.ready_files() == []  # 第一次看到：開始計時
+    time.sleep(0.2)
+    path.write_bytes(b"%PDF-1.7 still writing")
+    assert watcher.ready_files() == []  # 仍在變動
+    time.sleep(0.4)
+    assert watcher.ready_files() == [str(path)]
+
+
+def test_service_converts_and_writes_markers(tmp_path, make_pdf):
+    stop = threading.Event()
+    service = WatchService([str(tmp_path)], make_settings(dpi=20), settle=0.2, poll_interval=0.05,
+                           stop_event=stop)
+    thread = threading.Thread(target=service.serve)
+    thread.start()
+    try:
+        good = make_pdf("scan.pdf", 2)
+        bad = tmp_path / "broken.pdf"
+        bad.write_bytes(b"%PDF-1.4 not really a pdf")
+        assert wait_for(lambda: os.path.exists(good + ".done") and os.path.exists(f"{bad}.failed"))
+    finally:
+        stop.set()
+        thread.join(30)
+    with open(good + ".done", encoding="utf-8") as f:
+        marker = json.load(f)
+    assert marker["status"] == "done" and len(marker["outputs"]) == 2
+    # 已有較新的標記：不再重複處理
+    assert service.watcher.ready_files() == []